@@ -0,0 +1,151 @@
+import os, io, mmap, struct
+
+## Packed resource archive: a header, a table of contents, then every file back to back
+ARCHIVE = "res/assets.pak"
+PACKED = ["img", "char", "persona", "stage", "script"] ## Folders under res/ that go into the archive
+MAGIC = b"P4RPAK01"
+HEADER = "<8sII"  ## Magic, file count, table of contents size in bytes
+ENTRY = "<QQH"    ## Offset, size and name length, followed by the name itself
+
+def pack(root="res", path=ARCHIVE, folders=PACKED):
+    ## Build step: pack the given folders into one archive, returns (files, bytes). File names are kept
+    ## exactly as the game opens them, e.g. "res/img/logo.png".
+    names = []
+    for folder in folders:
+        for name in sorted(os.listdir(os.path.join(root, folder))):
+            if os.path.isfile(os.path.join(root, folder, name)):
+                names.append("%s/%s/%s" %(root, folder, name))
+
+    toc_size = sum(struct.calcsize(ENTRY) + len(name.encode("utf-8")) for name in names)
+    offset = struct.calcsize(HEADER) + toc_size
+    entries = []
+    for name in names:
+        size = os.path.getsize(name)
+        entries.append((name, offset, size))
+        offset += size
+
+    ## Written next to the old archive and swapped in, so a running game never sees half an archive
+    with open(path + ".tmp", "wb") as f:
+        f.write(struct.pack(HEADER, MAGIC, len(entries), toc_size))
+        for name, start, size in entries:
+            encoded = name.encode("utf-8")
+            f.write(struct.pack(ENTRY, start, size, len(encoded)))
+            f.write(encoded)
+        for name, start, size in entries:
+            with open(name, "rb") as g:
+                f.write(g.read())
+    os.replace(path + ".tmp", path)
+    return len(entries), offset
+
+## Read-only view of a packed archive ##
+########################################
+class Archive(object):
+    def __init__(self, path):
+        ## The whole archive is mapped once; files are slices of the mapping, nothing is copied
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+
+        magic, count, toc_size = struct.unpack_from(HEADER, self.map, 0)
+        if magic != MAGIC:
+            raise IOError("%s is not an asset archive" %path)
+
+        self.index = {} ## Name -> (offset, size)
+        pos = struct.calcsize(HEADER)
+        for n in range(count):
+            offset, size, length = struct.unpack_from(ENTRY, self.map, pos)
+            pos += struct.calcsize(ENTRY)
+            name = str(self.view[pos:pos+length], "utf-8")
+            pos += length
+            self.index[name] = (offset, size)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def read(self, name):
+        offset, size = self.index[name]
+        return self.view[offset:offset+size]
+
+## Read-only file over one packed file, reading straight out of the mapping ##
+###############################################################################
+class ArchiveFile(io.RawIOBase):
+    def __init__(self, view):
+        self.view = view ## The file's slice of the mapping
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        ## Copies only what the reader asks for, into the reader's own buffer
+        data = self.view[self.pos:self.pos+len(buffer)]
+        buffer[:len(data)] = data
+        self.pos += len(data)
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.pos
+        elif whence == io.SEEK_END:
+            offset += len(self.view)
+        self.pos = max(0, offset)
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+## Resource files, from the archive if there is one and loose on disk otherwise ##
+##################################################################################
+class ResourceFiles(object):
+    def __init__(self, path=ARCHIVE):
+        ## Without a built archive, e.g. while developing, everything comes straight from res/
+        self.archive = Archive(path) if os.path.isfile(path) else None
+
+    def packed(self, path):
+        ## The archive name of a file if it's in the archive, otherwise None
+        if self.archive == None:
+            return None
+        name = os.path.normpath(path).replace(os.sep, "/")
+        return name if name in self.archive else None
+
+    def read(self, path):
+        ## Raw contents; a slice of the mapping when packed
+        name = self.packed(path)
+        if name != None:
+            return self.archive.read(name)
+        with open(path, "rb") as f:
+            return f.read()
+
+    def file(self, path):
+        ## Something pygame can load from: a file object over the packed bytes, or the loose path
+        name = self.packed(path)
+        if name != None:
+            return ArchiveFile(self.archive.read(name))
+        return path
+
+    def listdir(self, path):
+        ## Sorted names of the files in a folder, e.g. ["0.dat", "1.dat", ...] for "res/stage"
+        if self.archive != None:
+            prefix = os.path.normpath(path).replace(os.sep, "/") + "/"
+            names = [name[len(prefix):] for name in self.archive.index if name.startswith(prefix)]
+            if names:
+                return sorted(name for name in names if "/" not in name)
+        return sorted(name for name in os.listdir(path) if os.path.isfile(os.path.join(path, name)))
+
+    def lines(self, path):
+        ## Lines of a text file, the same as open(path, "r").readlines()
+        name = self.packed(path)
+        if name != None:
+            return io.StringIO(str(self.archive.read(name), "utf-8"), newline=None).readlines()
+        with open(path, "r") as f:
+            return f.readlines()
+
+## Shared by everything that reads from res/
+resources = ResourceFiles()
+
+if __name__ == "__main__":
+    count, size = pack()
+    print("Packed %d files, %d bytes, into %s" %(count, size, ARCHIVE))
@@ -0,0 +1,254 @@
+import pygame, os
+from pygame.locals import *
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from archive import resources
+
+## Colors tried in order as the colorkey of an image whose pixels are all either opaque or invisible;
+## the first one the image doesn't already use wins
+COLORKEYS = [(255,0,255), (0,255,255), (0,255,0), (255,0,254)]
+
+## Central image and sound loader, normalizes every image to the display format ##
+##################################################################################
+class AssetLoader(object):
+    def __init__(self, root="res/img", sound_root="res/sound", workers=4):
+        self.root = root             ## Directory images are loaded from
+        self.sound_root = sound_root ## Directory sounds are loaded from
+        self.slow = []               ## (name, reason) of images left in a format that's converted on every blit
+
+        ## Files can be decoded ahead of time on worker threads, see preload()
+        self.workers = workers
+        self.pool = None   ## Started on the first preload
+        self.pending = {}  ## Path -> future of the decoded file, until image() or sound() takes it
+        self.queued = []   ## Every future preloaded so far, for progress()
+
+    def preload(self, images=(), sounds=()):
+        ## Start decoding files in the background. Only the decoding happens there; image() still does
+        ## the conversion, since that needs the display, and blocks if the file isn't done yet.
+        if self.pool == None:
+            self.pool = ThreadPoolExecutor(self.workers)
+        for name in images:
+            self.submit(os.path.join(self.root, name), self.decode_image)
+        for name in sounds:
+            self.submit(os.path.join(self.sound_root, name), self.decode_sound)
+
+    def submit(self, path, decode):
+        if path not in self.pending:
+            future = self.pool.submit(decode, path)
+            self.pending[path] = future
+            self.queued.append(future)
+
+    def decoded(self, path, decode):
+        ## The preloaded result if there is one, otherwise decode right here
+        future = self.pending.pop(path, None)
+        if future != None:
+            return future.result()
+        return decode(path)
+
+    def progress(self):
+        ## Fraction of the preloaded files that are decoded, 1.0 if nothing was preloaded
+        if not self.queued:
+            return 1.0
+        return sum(future.done() for future in self.queued) / float(len(self.queued))
+
+    def image(self, name, scaled=False, convert=True):
+        ## Load an image in whichever display format blits fastest for it:
+        ## - no transparency at all: plain convert()
+        ## - pixels either fully opaque or fully invisible: convert() with a colorkey
+        ## - real translucency: convert_alpha()
+        ## Colorkeyed images are also RLE encoded, unless they're scaled or rotated later, since every
+        ## transform would have to unpack them first. convert=False only loads, e.g. for the window
+        ## icon, which is needed before the display exists.
+        surface = self.decoded(os.path.join(self.root, name), self.decode_image)
+        if not convert:
+            return surface
+
+        ## Palette images can key out one index while another index has the same color, so their
+        ## colorkey is turned into real alpha first and a fresh key picked below
+        rle = 0 if scaled else RLEACCEL
+        if surface.get_colorkey() != None:
+            surface = surface.convert_alpha()
+        if surface.get_flags() & SRCALPHA:
+            alpha = pygame.surfarray.array_alpha(surface)
+            if (alpha == 255).all():
+                surface = surface.convert()
+            elif ((alpha == 0) | (alpha == 255)).all():
+                surface = self.keyed(surface, alpha == 0, rle)
+            else:
+                surface = surface.convert_alpha()
+        else:
+            surface = surface.convert()
+
+        self.check(name, surface)
+        return surface
+
+    def sound(self, name):
+        ## A Sound for a file under the sound root; see SoundBank for effects several owners play
+        path = os.path.join(self.sound_root, name)
+        return pygame.mixer.Sound(buffer=self.decoded(path, self.decode_sound))
+
+    def decode_image(self, path):
+        ## From the packed archive if it has the file; the path doubles as the format hint
+        return pygame.image.load(resources.file(path), path)
+
+    def decode_sound(self, path):
+        return pygame.mixer.Sound(path).get_raw()
+
+    def keyed(self, surface, invisible, rle):
+        ## Swap per-pixel alpha for a colorkey painted into the invisible pixels
+        rgb = pygame.surfarray.array3d(surface)
+        visible = rgb[~invisible]
+        for key in COLORKEYS:
+            if not (visible == key).all(axis=1).any():
+                rgb[invisible] = key
+                keyed = pygame.surfarray.make_surface(rgb).convert()
+                keyed.set_colorkey(key, rle)
+                return keyed
+        return surface.convert_alpha()
+
+    def check(self, name, surface):
+        ## Note an image that still doesn't match the display's pixel layout
+        display = pygame.display.get_surface()
+        if display == None:
+            return
+        if surface.get_flags() & SRCALPHA:
+            if surface.get_bitsize() != 32 or surface.get_masks()[:3] != display.get_masks()[:3]:
+                self.slow.append((name, "per-pixel alpha in a foreign layout"))
+        elif surface.get_bitsize() != display.get_bitsize() or surface.get_masks() != display.get_masks():
+            self.slow.append((name, "%d-bit, display is %d-bit" %(surface.get_bitsize(), display.get_bitsize())))
+
+    def report(self):
+        ## One line per image that will be converted on every blit; empty if everything is in order
+        return ["%s: %s" %(name, reason) for name, reason in self.slow]
+
+## Shared by everything that loads images or sounds
+loader = AssetLoader()
+
+## Sound effects decoded once and played by many owners ##
+##########################################################
+class SoundBank(object):
+    def __init__(self, loader):
+        self.loader = loader
+        self.sounds = {} ## Name -> the one Sound decoded for it
+        self.voices = {} ## Character number -> names of its voice clips that are loaded
+
+    def sound(self, name, volume):
+        ## The shared Sound, decoded on first use. Everyone asking for an effect asks at the same volume.
+        sound = self.sounds.get(name)
+        if sound == None:
+            sound = self.loader.sound(name)
+            sound.set_volume(volume)
+            self.sounds[name] = sound
+        return sound
+
+    def handle(self, name, volume):
+        return SoundHandle(self.sound(name, volume))
+
+    def voice(self, num, clip, volume):
+        ## One of a character's voice clips, numbered from 1 like the files
+        name = "%d/voice%d.ogg" %(num+1, clip)
+        self.voices.setdefault(num, set()).add(name)
+        return self.handle(name, volume)
+
+    def cast(self, nums):
+        ## Drop the voices of every character that isn't in the coming race
+        for num in list(self.voices):
+            if num not in nums:
+                for name in self.voices.pop(num):
+                    self.sounds.pop(name, None)
+
+## One owner's hold on a shared Sound, so stopping it leaves everyone else's playback alone ##
+#############################################################################################
+class SoundHandle(object):
+    def __init__(self, sound):
+        self.sound = sound
+        self.channel = None ## Channel our last play went out on
+
+    def play(self, loops=0):
+        self.channel = self.sound.play(loops)
+        return self.channel
+
+    def playing(self):
+        ## Whether our last play is still going; the channel may have moved on to another sound since
+        return self.channel != None and self.channel.get_busy() and self.channel.get_sound() is self.sound
+
+    def get_num_channels(self):
+        ## Like Sound.get_num_channels, but only counting our own playback
+        return 1 if self.playing() else 0
+
+    def stop(self):
+        if self.playing():
+            self.channel.stop()
+        self.channel = None
+
+## Shared by every racer
+sound_bank = SoundBank(loader)
+
+## Images loaded on first use and dropped again once no scene needs them ##
+###########################################################################
+class ImageRegistry(object):
+    def __init__(self, loader, budget=32*1024*1024):
+        self.loader = loader
+        self.budget = budget          ## Memory cap in bytes for the surfaces kept around
+        self.used = 0                 ## Bytes currently held
+        self.surfaces = OrderedDict() ## Name -> surface, least recently used first
+        self.holders = {}             ## Name -> scenes that have used it and haven't left yet
+        self.scenes = []              ## Scenes entered and not yet left, innermost last
+
+    def get(self, name, scaled=False):
+        ## Fetch an image, loading it if it isn't resident; the current scene holds on to it
+        surface = self.surfaces.get(name)
+        if surface != None:
+            self.surfaces.move_to_end(name)
+        else:
+            surface = self.loader.image(name, scaled)
+            self.surfaces[name] = surface
+            self.used += self.size_of(surface)
+        if self.scenes:
+            self.holders.setdefault(name, set()).add(self.scenes[-1])
+        self.evict()
+        return surface
+
+    def enter(self, scene):
+        ## Images fetched from now on belong to this scene until it's left
+        self.scenes.append(scene)
+
+    def leave(self):
+        ## Let go of everything the innermost scene held, so it can be evicted if memory is short
+        scene = self.scenes.pop()
+        for name in list(self.holders):
+            self.holders[name].discard(scene)
+            if not self.holders[name]:
+                del self.holders[name]
+        self.evict()
+
+    def evict(self):
+        ## Drop the least recently used images no scene is holding until we're back under budget
+        for name in list(self.surfaces):
+            if self.used <= self.budget:
+                break
+            if name not in self.holders:
+                self.used -= self.size_of(self.surfaces.pop(name))
+
+    def size_of(self, surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+## Numbered images fetched from a registry by index, standing in for a preloaded list ##
+########################################################################################
+class ImageList(object):
+    def __init__(self, registry, pattern, count, first=1, scaled=False):
+        self.registry = registry
+        self.pattern = pattern ## File name with a number in it, e.g. "p%03d.png"
+        self.count = count     ## How many images there are
+        self.first = first     ## Number of the first image
+        self.scaled = scaled   ## Passed through to the loader
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("image index out of range")
+        return self.registry.get(self.pattern %(self.first + index), self.scaled)
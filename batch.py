@@ -0,0 +1,382 @@
+import numpy, time
+from const import ROAD
+from sim import Race
+
+## Many races at once, every racer's state an array shaped (races, racers) ##
+#############################################################################
+class BatchRace(object):
+    def __init__(self, racers, geometry, races, seed=None, capacity=32,
+                 segment_length=150.0, rumble_length=1, step=1/60.):
+        ## racers are Racers giving the lineup, the same in every race; each race shuffles the starting
+        ## lanes like Main.main does. Everyone is driven by the CPU rules, racer 0 included, so there
+        ## are no hama or mudo casters dimming their own view. capacity is how many fireballs and ice
+        ## chunks a race can have out at once; one launched beyond that fizzles.
+        ## The rules are Race.update's, but all racers advance from the state at the start of the step
+        ## rather than one after another, and several hits landing in one step add up.
+        self.rng = numpy.random.default_rng(seed)
+        self.races = races
+        self.count = len(racers)
+        self.step = step
+        self.steps = 0 ## Steps simulated so far
+
+        ## The track, tarot cards and base speeds come from an ordinary race with the same lineup
+        race = Race(racers, geometry, False, segment_length, rumble_length, step)
+        self.segment_length = segment_length
+        self.track_length = race.track_length
+        self.curve = race.track.curve
+        self.max_speed = race.max_speed
+        self.accel = race.accel
+        self.braking = race.braking
+        self.decel = race.decel
+        self.offroad_decel = race.offroad_decel
+        self.offroad_limit = race.offroad_limit
+        self.gravity = race.gravity
+        self.max_laps = race.max_laps
+        ## Tarot cards grouped into rows, (z, lateral positions of the cards in the row)
+        rows = {}
+        for item in race.items:
+            rows.setdefault(item.xzd[1], []).append(item.xzd[0])
+        self.cards = [(z, numpy.array(xs)) for z, xs in rows.items()]
+
+        ## Per-racer stats, shaped (racers,) so they broadcast across races
+        def stat(name):
+            return numpy.array([getattr(racer, name) for racer in racers], dtype=numpy.float64)
+        self.max_speed_mod = stat("max_speed_mod")
+        self.braking_mod = stat("braking_mod")
+        self.decel_mod = stat("decel_mod")
+        self.accel_mod = stat("accel_mod")
+        self.offroad_decel_mod = stat("offroad_decel_mod")
+        self.offroad_limit_mod = stat("offroad_limit_mod")
+        self.recovery = stat("recovery")
+        self.threshold = stat("threshold")
+        self.max_health = stat("max_health")
+
+        ## Skill lists padded to the longest; choices are drawn below each racer's own length
+        self.choice_count = numpy.array([len(racer.item_choice) for racer in racers])
+        self.choices = numpy.zeros((self.count, max(self.choice_count)), dtype=numpy.int8)
+        for n, racer in enumerate(racers):
+            self.choices[n,:len(racer.item_choice)] = racer.item_choice
+
+        shape = (races, self.count)
+        lanes = numpy.linspace(-1.0, 1.0, self.count) if self.count > 1 else numpy.zeros(1)
+        self.player_x = self.rng.permuted(numpy.tile(lanes, (races, 1)), axis=1)
+        self.lane = self.player_x.copy()
+        self.position = numpy.zeros(shape)
+        self.player_y = numpy.zeros(shape)
+        self.speed = numpy.zeros(shape)
+        self.laps = numpy.ones(shape, dtype=numpy.int32) ## Everyone starts on lap 1, see Race.get_new_lap
+        self.place = numpy.zeros(shape, dtype=numpy.int32)
+        self.finish = numpy.full(shape, -1, dtype=numpy.int64) ## Step the racer crossed the line for good
+        self.item = numpy.zeros(shape, dtype=numpy.int8)  ## 0 for no item, otherwise 1 to 7 as in Race
+        self.item_scrolling = numpy.zeros(shape)
+        self.boost = numpy.zeros(shape)
+        self.boost_diff = numpy.zeros(shape)
+        self.has_boosted = numpy.zeros(shape, dtype=numpy.int64)
+        self.no_control = numpy.zeros(shape)
+        self.speed_up = numpy.zeros(shape)
+        self.frozen = numpy.zeros(shape)
+        self.lightning = numpy.zeros(shape)
+        self.flying = numpy.zeros(shape, dtype=bool)
+        self.attack = numpy.zeros(shape)
+        self.accumulator = numpy.zeros(shape)
+        self.health = numpy.tile(stat("health"), (races, 1))
+        self.display_health = self.health.copy()
+        self.recover = numpy.zeros(shape, dtype=bool)
+        self.mudo = numpy.zeros(shape, dtype=bool)
+        self.mudo_alpha = numpy.zeros(shape)
+        self.hama = numpy.zeros(shape, dtype=bool)
+        self.hama_alpha = numpy.zeros(shape)
+        self.inputs = numpy.zeros((3,) + shape, dtype=bool) ## Left, right, faster
+
+        ## Fireballs and ice chunks in fixed slots, shaped (races, capacity)
+        slots = (races, capacity)
+        self.shot = numpy.zeros(slots, dtype=bool) ## Whether the slot is in use
+        self.shot_num = numpy.zeros(slots, dtype=numpy.int8)
+        self.shot_x = numpy.zeros(slots)
+        self.shot_z = numpy.zeros(slots)
+        self.shot_speed = numpy.zeros(slots)
+        self.shot_owner = numpy.zeros(slots, dtype=numpy.int32)
+        self.shot_life = numpy.zeros(slots)
+        self.shot_level = 3 ## Every skill launches at level 3
+
+    def segment_curve(self, z):
+        return self.curve[(numpy.floor(z / self.segment_length) % len(self.curve)).astype(numpy.int64)]
+
+    def done(self):
+        ## Which races everyone has finished
+        return (self.laps == self.max_laps).all(axis=1)
+
+    def step_all(self):
+        ## One step of every race, in Main.main's order
+        self.update()
+        self.get_cpu_inputs()
+        self.update_places()
+
+    def run(self, max_steps=60*60*10):
+        ## Step until every race is over or max_steps have passed; returns wall seconds taken
+        start = time.perf_counter()
+        while self.steps < max_steps and not self.done().all():
+            self.step_all()
+        return time.perf_counter() - start
+
+    def update_places(self):
+        ## Same ordering as Race.update_places, finished racers keep the place they finished in
+        key = self.position + self.laps * self.track_length
+        finished = self.laps == self.max_laps
+        key = key + numpy.where(finished, (6 - self.place) * self.track_length, 0)
+        order = numpy.argsort(key, axis=1, kind="stable")
+        rows = numpy.arange(self.races)[:,None]
+        self.place[rows, order] = self.count - numpy.arange(self.count)
+
+    def get_cpu_inputs(self):
+        in_control = (self.no_control <= 0) & (self.frozen <= 0)
+        curve = self.segment_curve(self.position)
+        left = in_control & (((curve < 0) & (self.player_x > self.lane)) | (self.player_x > 1))
+        right = in_control & ~left & (((curve > 0) & (self.player_x < self.lane)) | (self.player_x < -1))
+        dazed = (self.hama_alpha > 0) | (self.mudo_alpha > 0) ## Steering is reversed
+
+        self.inputs[0] = (left & ~dazed) | (right & dazed)
+        self.inputs[1] = (right & ~dazed) | (left & dazed)
+        self.inputs[2] = in_control
+
+        ## Steering builds up the mini-turbo, letting go of the wheel releases it
+        charging = (left | right) & ~dazed & (self.lightning <= 0)
+        self.boost += numpy.where(charging, 0.04, 0.0)
+        coasting = in_control & ~left & ~right
+        self.boost_diff = numpy.where(coasting & (self.boost > self.boost_diff), self.boost, self.boost_diff)
+        self.boost -= numpy.where(coasting, 0.1, 0.0)
+        self.boost += numpy.where(coasting & (self.boost < 0), 0.1, 0.0)
+
+        ## 2% chance to use a skill every step
+        use = in_control & (self.item != 0) & (self.item_scrolling <= 0.0) & (self.rng.random(self.item.shape) < 1/50.)
+        if use.any():
+            self.use_items(use)
+
+    def use_items(self, use):
+        item = numpy.where(use, self.item, 0)
+        self.item[use] = 0
+
+        ## Agi and Bufu launch a projectile into the first free slot
+        for num, shot in [(1, 8), (2, 9)]:
+            for race, owner in zip(*numpy.nonzero(item == num)):
+                free = numpy.flatnonzero(~self.shot[race])
+                if len(free) == 0:
+                    continue
+                slot = free[0]
+                self.shot[race, slot] = True
+                self.shot_num[race, slot] = shot
+                self.shot_x[race, slot] = self.player_x[race, owner]
+                self.shot_z[race, slot] = self.position[race, owner] + self.segment_length*2
+                self.shot_speed[race, slot] = max(self.speed[race, owner], self.max_speed*2)
+                self.shot_owner[race, slot] = owner
+                self.shot_life[race, slot] = 10
+
+        ## Garu
+        garu = item == 3
+        self.speed_up[garu] = 0.3 * 2
+        self.speed[garu] = self.max_speed * 1.5
+
+        ## Zio, Hama and Mudo reach everyone placed ahead of the caster; ahead[r,p,i] is p ahead of i
+        ahead = (self.place[:,:,None] < self.place[:,None,:]) & ~numpy.eye(self.count, dtype=bool)
+        zio = (ahead & (item == 4)[:,None,:]).sum(axis=2)
+        zapped = (zio > 0) & (self.laps != self.max_laps) & ~self.recover
+        if zapped.any():
+            side = self.rng.choice((-1, 1), self.item.shape)
+            self.lightning += numpy.where(zapped, side * (0.5 + self.place / 16.0) * zio, 0)
+            self.flying |= zapped
+            self.boost[zapped] = -1
+            self.no_control += numpy.where(zapped, numpy.abs(self.lightning), 0)
+            self.health -= numpy.where(zapped, 25 * zio, 0)
+
+        open_to = (self.hama_alpha <= 0) & (self.mudo_alpha <= 0) & (self.no_control <= 0) & (self.frozen <= 0)
+        self.hama |= open_to & (ahead & (item == 5)[:,None,:]).any(axis=2)
+        self.mudo |= open_to & (ahead & (item == 6)[:,None,:]).any(axis=2)
+
+        ## Physical
+        self.attack[item == 7] = 90
+
+    def update_items(self, dt):
+        racing = (self.laps != self.max_laps) & (self.player_y <= 0)
+
+        ## Tarot cards start the item roulette for anyone without an item driving over them
+        reach = numpy.abs(dt * self.speed)
+        picked = numpy.zeros(self.item.shape, dtype=bool)
+        for z, xs in self.cards:
+            beside = numpy.abs(self.player_x[:,:,None] - xs).min(axis=2) <= 0.48
+            picked |= (numpy.abs(self.position - z) < reach) & beside
+        picked &= racing & (self.item == 0)
+        self.item_scrolling[picked] = 2.5
+
+        ## Projectiles hit anyone but their owner. Only the slots in use are looked at: hit[k,p] is
+        ## racer p of shot k's race hit by shot k.
+        race, slot = numpy.nonzero(self.shot)
+        if len(race):
+            z = self.shot_z[race, slot]
+            gap = numpy.abs(dt * self.speed[race] - dt * self.shot_speed[race, slot][:,None])
+            hit = numpy.abs(self.position[race] - z[:,None]) < gap
+            hit &= numpy.abs(self.player_x[race] - self.shot_x[race, slot][:,None]) <= 0.48
+            hit &= self.shot_owner[race, slot][:,None] != numpy.arange(self.count)
+            hit &= (racing & ~self.recover)[race]
+            ## Hits summed per (race, racer), several shots can land in one step
+            cell = (race[:,None] * self.count + numpy.arange(self.count)).ravel()
+            fire = numpy.bincount(cell, (hit & (self.shot_num[race, slot] == 8)[:,None]).ravel(), self.item.size)
+            ice = numpy.bincount(cell, (hit & (self.shot_num[race, slot] == 9)[:,None]).ravel(), self.item.size)
+            fire = fire.reshape(self.item.shape)
+            ice = ice.reshape(self.item.shape)
+
+            progress = (self.position + (self.laps - 1) * self.track_length) / self.track_length
+            self.flying |= (fire > 0) | (ice > 0)
+            self.health -= 100 * fire + 50 * ice
+            self.no_control += fire * (self.shot_level/4.0 + progress * 0.6)
+            self.frozen = numpy.where(ice > 0, self.shot_level - 1 + progress * 0.8, self.frozen)
+
+            ## Move along the road, wrapping at the line, and burn out after ten seconds
+            z = numpy.minimum(z + dt * self.shot_speed[race, slot], self.track_length)
+            self.shot_z[race, slot] = numpy.where(z >= self.track_length, z - self.track_length, z)
+            self.shot_life[race, slot] -= dt
+            self.shot[race, slot] = self.shot_life[race, slot] > 0
+
+    def update(self, dt=None):
+        dt = self.step if dt == None else dt
+        self.update_items(dt)
+        track_length = self.track_length
+
+        ## How far ahead the leader is, from everyone else's point of view
+        total = self.position + (self.laps - 1) * track_length
+        lead = numpy.where(self.place == 1, total, 0.0)
+        first_pos = lead.sum(axis=1)[:,None] - lead
+
+        is_player_done = self.laps == self.max_laps
+        self.item[is_player_done] = 0
+        self.item_scrolling[is_player_done] = 0
+
+        ## Mini-turbo, almost always a boost but a spin out after too many
+        release = self.boost_diff > self.threshold
+        if release.any():
+            lucky = self.rng.integers(0, self.has_boosted + 2) <= 50
+            boosted = release & lucky
+            self.has_boosted += boosted
+            self.speed_up[boosted] = 0.6
+            self.speed[boosted] = self.max_speed * 1.2
+            self.no_control += numpy.where(release & ~lucky, self.boost_diff / 10, 0)
+            self.boost = numpy.where(boosted, -1 * self.boost_diff, numpy.where(release, -2 * self.boost_diff, self.boost))
+            self.boost_diff[release] = 0.0
+
+        ## Launched racers fall back down
+        flying = self.flying
+        self.player_y += numpy.where(flying, 6 + self.gravity * self.accumulator, 0)
+        self.accumulator += flying
+        landed = flying & (self.player_y <= 0)
+        self.player_y[landed] = 0
+        self.accumulator[landed] = 0
+        self.flying &= ~landed
+
+        self.no_control -= numpy.where(self.no_control > 0, dt * self.recovery, 0)
+
+        ## Physical attacks hit everyone close by; struck[r,p,q] is racer q struck by racer p
+        attacking = self.attack > 0
+        if attacking.any():
+            self.attack = numpy.maximum(self.attack - numpy.where(attacking, 8, 0), 0)
+            struck = attacking[:,:,None] & ~numpy.eye(self.count, dtype=bool)
+            struck &= numpy.abs(self.position[:,:,None] - self.position[:,None,:]) < self.segment_length * 3
+            struck &= numpy.abs(self.player_x[:,:,None] - self.player_x[:,None,:]) <= 0.75
+            struck &= ~self.recover[:,None,:]
+            hits = struck.sum(axis=1)
+            self.no_control += 0.2 * hits
+            self.flying |= hits > 0
+            self.health -= 10 * hits
+
+        ## Health drains into the display, and a knocked out racer recovers to full
+        self.health = numpy.maximum(self.health, 0)
+        out = self.display_health <= 0
+        self.no_control += numpy.where(out, 1.5, 0)
+        self.flying |= out
+        self.display_health = numpy.where(out, numpy.floor(self.max_health), self.display_health)
+        self.recover |= out
+        draining = self.health < self.display_health
+        healing = draining & self.recover
+        self.health = numpy.where(healing, numpy.floor(self.health + 3), self.health)
+        healed = healing & (self.health >= numpy.floor(self.max_health))
+        self.health = numpy.where(healed, numpy.floor(self.max_health), self.health)
+        self.recover &= ~healed
+        self.display_health -= numpy.where(draining & ~healing, 5, 0)
+
+        self.frozen -= numpy.where(self.frozen > 0, dt * self.recovery, 0)
+
+        for cast, alpha in [("mudo", "mudo_alpha"), ("hama", "hama_alpha")]:
+            on = getattr(self, cast)
+            value = getattr(self, alpha)
+            value = numpy.where(on, value + 5, numpy.where(value > 0, value - 5, value))
+            setattr(self, alpha, value)
+            setattr(self, cast, on & (value < 512))
+
+        ## Item roulette
+        scrolling = self.item_scrolling > 0
+        if scrolling.any():
+            self.item_scrolling -= numpy.where(scrolling, dt, 0)
+            pick = (self.rng.random(self.item.shape) * self.choice_count).astype(numpy.int64)
+            self.item = numpy.where(scrolling, self.choices[numpy.arange(self.count), pick], self.item)
+
+        self.lightning -= numpy.where(self.lightning > 0, dt * self.recovery, 0)
+        self.lightning += numpy.where(self.lightning < 0, dt * self.recovery, 0)
+
+        temp_factor_2 = 1.0 + self.speed_up*5
+        self.speed_up -= numpy.where(self.speed_up > 0, dt, 0)
+
+        ## Forward movement, a little faster on the outside of a curve and when far behind the leader
+        old_curve = self.segment_curve(self.position)
+        temp_factor_4 = numpy.where(old_curve < 0, numpy.maximum((24 - self.player_x*2) / 24, 1.0),
+                        numpy.where(old_curve > 0, numpy.maximum((24 + self.player_x*2) / 24, 1.0), 1.0))
+        speed_scale = (first_pos - total) / (first_pos+1) + 1.0
+        temp_factor_1 = numpy.maximum(1.0, speed_scale)
+        self.position = numpy.clip(self.position + dt * self.speed * temp_factor_4 * temp_factor_1, 0, track_length*2)
+        new_curve = self.segment_curve(self.position)
+
+        ## Sideways movement
+        top_speed = self.max_speed * self.max_speed_mod
+        offroad = (self.player_x < -1) | (self.player_x > 1)
+        dx = dt * self.speed / (top_speed * temp_factor_4 * temp_factor_1) * numpy.where(offroad, 3.0, 1.7)
+        self.player_x += numpy.where(self.inputs[0], -dx, numpy.where(self.inputs[1], dx, 0))
+        self.player_x += numpy.where(self.lightning < -0.1, -dx * 2.5, numpy.where(self.lightning > 0.1, dx * 2.5, 0))
+        drift = self.accel * self.accel_mod * new_curve / float(ROAD.CURVE.HARD) * -1 * self.speed / top_speed * 0.0005
+        self.player_x += numpy.where(self.speed > 0, drift * dt, 0)
+
+        ## Speed up or slow down
+        self.speed += dt * numpy.where(is_player_done, self.braking * self.braking_mod * 2.5,
+                                numpy.where(self.frozen > 0, self.braking * self.braking_mod * 1.0,
+                                numpy.where(self.no_control > 0, self.decel * self.decel_mod * 0.4, 0)))
+        accelerating = self.inputs[2] & (self.no_control <= 0) & (self.frozen <= 0)
+        self.speed += dt * numpy.where(accelerating, self.accel * self.accel_mod * temp_factor_1,
+                                numpy.where(self.inputs[2], 0, self.decel * self.decel_mod))
+        offroad = (self.player_x < -1) | (self.player_x > 1)
+        slowing = offroad & (self.speed > self.offroad_limit * self.offroad_limit_mod)
+        self.speed += numpy.where(slowing, dt * self.offroad_decel * self.offroad_decel_mod, 0)
+
+        self.player_x = numpy.clip(self.player_x, -2.5, 2.5)
+        jitter = self.rng.integers(99, 102, self.speed.shape) / 100.0
+        self.speed = numpy.clip(self.speed, 0, top_speed * temp_factor_2) * jitter
+
+        ## New laps
+        crossed = self.position >= track_length
+        self.position -= numpy.where(crossed, track_length, 0)
+        self.laps += crossed
+        self.steps += 1
+        self.finish[(self.laps == self.max_laps) & (self.finish < 0)] = self.steps
+
+    def throughput(self, seconds):
+        ## Race seconds simulated per wall second, for a run that took seconds
+        return self.races * self.steps * self.step / seconds
+
+if __name__ == "__main__":
+    import sys
+    from course import Course
+    from sim import Racer
+    from rng import streams
+    races = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    streams.reseed(0)
+    racers = [Racer(num, "CPU", 0, player_x=0.0, position=0) for num in range(6)]
+    batch = BatchRace(racers, Course(0).geometry, races, seed=0)
+    seconds = batch.run()
+    print("%d races of %d racers, %d steps in %.2fs: %.0f race-seconds per second"
+          %(races, len(racers), batch.steps, seconds, batch.throughput(seconds)))
+    print("Win rate by racer:", ["%.3f" %rate for rate in (batch.place == 1).mean(axis=0)])
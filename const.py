@@ -26,3 +26,13 @@ class COLORS:
     BLACK_SMOKE = [47,47,47] ## Burnout smoke
     BOOST1 = [128,128,255]   ## Turbo flash 1
     BOOST2 = [164,164,255]   ## Turbo flash 2
+
+## Engine classes by the number stored in the options; every stat drops with the class number
+ENGINE_CLASSES = {0:"150cc", 1:"100cc", 2:"50cc"}
+
+## Stage names by the number of their res/stage file
+STAGE_NAMES = ["Yukiko's Castle","Steamy Bathhouse","Marukyu Striptease",
+               "Secret Laboratory","Yomotsu Hirasaka","Tartarus - Thebel",
+               "Tartarus - Arqa","Tartarus - Yabbashah","Tartarus - Tziah",
+               "Tartarus - Harabah","Tartarus - Adamah",
+               "Yasogami High","Velvet Room"]
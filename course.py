@@ -1,4 +1,10 @@
-import random
+import math
+from archive import resources
+from rng import streams
+
+## Fraction of a color left visible through exponential fog at a relative distance of 0 to 1
+def exponential_fog(distance, density):
+    return 1 / math.pow(math.e, distance*distance*density)
 
 ## Course texture colors ##
 ###########################
@@ -23,7 +29,7 @@ class Course(object):
         for i in range(7):
             ## Add a segment that's different from the previous one
             self.geometry[i] = last_seg
-            last_seg += random.choice((-1,1))
+            last_seg += streams.track.choice((-1,1))
             if last_seg < 1:
                 last_seg = 3
             elif last_seg > 3:
@@ -34,7 +40,7 @@ class Course(object):
         self.road = 2  ## Road
 
         ## Load texture colors to overwrite defaults
-        f = open("res/stage/%d.dat" %num, "r").readlines()
+        f = resources.lines("res/stage/%d.dat" %num)
         for line in f:
             if line.startswith("fog = "): ## Fog color to fade into
                 temp = line.strip("fog = ").split(",")
@@ -77,3 +83,26 @@ class Course(object):
         self.finish = [white, white, dark_wall, white, fog, white]
         self.dark_colors = [dark_road, dark_offroad, dark_wall, dark_rumble, fog, None, ceiling]
         self.light_colors = [light_road, light_offroad, light_wall, light_rumble, fog, white, ceiling]
+
+        ## Indexed by Track.LIGHT, Track.DARK, Track.START and Track.FINISH
+        self.palette = [self.light_colors, self.dark_colors, self.start, self.finish]
+
+    def build_fog(self, draw_distance, density=0.0):
+        ## Precompute the fogged palette for every draw-distance slot so that rendering never blends
+        ## colors. self.fog[color index][n] has the same layout as the palette entries. Walls fade
+        ## linearly into the fog color; a density above zero fades every surface exponentially instead.
+        self.fog = []
+        for colors in self.palette:
+            slots = []
+            for n in range(draw_distance):
+                temp = list(colors)
+                if density > 0:
+                    visible = exponential_fog(n/float(draw_distance), density)
+                    for k in (0,1,2,3,5):
+                        if temp[k] != None:
+                            temp[k] = [int(colors[4][i] + (colors[k][i]-colors[4][i])*visible) for i in range(3)]
+                else:
+                    ## color[2] = wall, color[4] = fog
+                    temp[2] = [int(colors[2][i] - n*float(colors[2][i]-colors[4][i])/draw_distance) for i in range(3)]
+                slots.append(temp)
+            self.fog.append(slots)
@@ -0,0 +1,43 @@
+## Draw distance governor, trades horizon for frame time ##
+###########################################################
+class DrawDistance(object):
+    def __init__(self, start, minimum, maximum, budget, step=10, patience=30, fixed=False):
+        self.minimum = min(minimum, maximum) ## Fewest segments we'll ever draw, at most the maximum
+        self.maximum = maximum               ## Most segments we'll ever draw
+        self.budget = budget     ## Target render time per frame, in seconds
+        self.step = step         ## Segments added or removed per adjustment
+        self.patience = patience ## Frames a trend has to last before we act on it
+        self.fixed = fixed       ## Always draw the maximum, ignoring the budget
+
+        self.distance = maximum if fixed else max(self.minimum, min(maximum, start))
+        self.average = budget ## Smoothed render time
+        self.over = 0         ## Frames in a row the average has been over budget
+        self.under = 0        ## Frames in a row the average has been comfortably under budget
+
+    def update(self, elapsed):
+        ## Feed in the render time of the frame just drawn and get the draw distance for the next one
+        if self.fixed:
+            return self.distance
+
+        self.average += (elapsed - self.average) * 0.1
+
+        ## Between 70% and 100% of the budget nothing changes, so the distance doesn't flicker
+        ## back and forth around the target
+        if self.average > self.budget:
+            self.over += 1
+            self.under = 0
+        elif self.average < self.budget * 0.7:
+            self.under += 1
+            self.over = 0
+        else:
+            self.over = 0
+            self.under = 0
+
+        ## Back off quickly when we're slow, but take twice as long to be sure before drawing more
+        if self.over >= self.patience and self.distance > self.minimum:
+            self.distance = max(self.minimum, self.distance - self.step)
+            self.over = 0
+        elif self.under >= self.patience * 2 and self.distance < self.maximum:
+            self.distance = min(self.maximum, self.distance + self.step)
+            self.under = 0
+        return self.distance
@@ -0,0 +1,47 @@
+import pygame
+from pygame.locals import *
+
+## Cached HUD layer for one subscreen ##
+########################################
+class HudLayer(object):
+    def __init__(self):
+        self.order = []   ## Region names in the order they're drawn
+        self.regions = {} ## Name -> (inputs it was composed from, composed surface, screen position)
+
+    def stale(self, name, inputs):
+        ## Whether a region has to be recomposed because the values it shows have changed
+        region = self.regions.get(name)
+        return region == None or region[0] != inputs
+
+    def compose(self, name, inputs, blits):
+        ## Compose a region from (surface, screen position) pairs, drawn in order, into one surface just
+        ## big enough to hold them all. A region with nothing to blit keeps its place in the order.
+        if name not in self.regions:
+            self.order.append(name)
+        if not blits:
+            self.regions[name] = (inputs, None, None)
+            return
+
+        rect = pygame.Rect(blits[0][1], blits[0][0].get_size())
+        for surface, pos in blits[1:]:
+            rect.union_ip(pygame.Rect(pos, surface.get_size()))
+
+        ## Layers are stacked with premultiplied alpha. Plain alpha blending onto the transparent region
+        ## would darken every translucent edge once here and again when the region is drawn.
+        composed = pygame.Surface(rect.size, SRCALPHA)
+        composed.blits([(self.premultiply(surface), (pos[0]-rect.x, pos[1]-rect.y), None, BLEND_PREMULTIPLIED)
+                        for surface, pos in blits], False)
+        self.regions[name] = (inputs, composed, rect.topleft)
+
+    def premultiply(self, surface):
+        ## premul_alpha needs per-pixel alpha, and doesn't respect a subsurface's pitch
+        if not surface.get_flags() & SRCALPHA:
+            surface = surface.convert_alpha()
+        elif surface.get_parent() != None:
+            surface = surface.copy()
+        return surface.premul_alpha()
+
+    def draw(self, screen):
+        ## Every region in a single pass
+        screen.blits([(region[1], region[2], None, BLEND_PREMULTIPLIED)
+                      for region in [self.regions[name] for name in self.order] if region[1] != None], False)
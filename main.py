@@ -4,14 +4,24 @@
 #
 # Licensed under the MIT License
 
-import pygame, os, random, math
+import pygame, os, math, time
 from collections import namedtuple
 from pygame.locals import *
 from const import *
 from render import *
 
 from course import Course
-from text import Text
+from sim import Race
+from sprite import flip_frames, rotation_frames
+from scanline import ScanlineRoad
+from governor import DrawDistance
+from projection import Projector, SCALE1, X1, Y1, SCALE2, X2, Y2
+from text import Text, DigitText
+from hud import HudLayer
+from assets import loader, sound_bank, ImageRegistry, ImageList
+from archive import resources
+from roster import roster
+from rng import streams
 from player import Player
 
 ## Center the display screen
@@ -35,7 +45,7 @@ class Main:
 
         ## Set the caption and icon
         pygame.display.set_caption("P4R: Persona 4 Racing All Afternoon")
-        icon = pygame.image.load("res/img/icon.png")
+        icon = loader.image("icon.png", convert=False)
         pygame.display.set_icon(icon)
 
         ## Fullscreen data
@@ -48,8 +58,18 @@ class Main:
         ## FPS used to be mutable but really, there's no point in changing it anymore
         self.fps = 60.
         self.step = 1/60.
+        ## The race runs in fixed steps whatever the frame rate, see ticks()
+        self.max_ticks = 5 ## Most steps run for one frame; a longer stall is dropped rather than caught up
+        self.seed = None   ## Seed for every race to replay, a fresh one per race if None
+        self.race_seed = 0 ## Seed the current or last race was played with
+        self.lag = 0.0     ## Real time in seconds that hasn't been simulated yet
         self.clock = pygame.time.Clock()
 
+        ## Draw distance follows the render time unless it's fixed in the options; the learned value
+        ## carries over from race to race
+        self.draw_governor = DrawDistance(50, 30, self.max_draw_distance, self.render_budget / 1000.0,
+                                          fixed=self.distance_index == 1)
+
         ## Create a default or full screen, depending on the loaded options
         if self.screen_index == 0:
             self.screen = pygame.display.set_mode((720,480))
@@ -58,7 +78,7 @@ class Main:
 
         self.width = 720            ## Window width
         self.height = 480           ## Window height
-        self.segments = []          ## Array of road parts
+        self.track = None           ## Store of road parts
         self.items = []             ## Array of items in play
         self.resolution = None
         self.segment_length = 150.0 ## Length of segment
@@ -69,124 +89,25 @@ class Main:
                          False, False, False, False, False) ## Whether we've unlocked characters
 
         ## Universal graphics stuff
-        self.logo = pygame.image.load("res/img/logo.png")
-        self.logo = self.logo.convert_alpha()                         ## Handles transparencies and fade-in for logo
+        self.logo = loader.image("logo.png")                          ## Handles transparencies and fade-in for logo
         self.logo_mask = pygame.Surface((720,480))
         self.logo_mask.fill((255,255,255))
         self.logo_mask = self.logo_mask.convert()
         self.logo_mask.set_alpha(255)
         self.logo_alpha = 255
 
-        self.credits_01 = pygame.image.load("res/img/credits_01.png").convert()
-        self.credits_02 = pygame.image.load("res/img/credits_02.png").convert()
+        ## Everything past the splash screen decodes in the background while it plays, see load_graphics
+        self.has_loaded = False
+        self.preload()
 
-        self.red_arrow = pygame.image.load("res/img/red_arrow.png")
-        self.yellow_arrow = pygame.image.load("res/img/yellow_arrow.png")
-        self.arrow_tick = 0
-
-        self.bg_top = pygame.Surface((self.width, self.height/3+29))
-        self.bg_top = self.bg_top.convert()
-        self.bg_mid = pygame.Surface((self.width, self.height*3/20))
-        self.bg_mid = self.bg_mid.convert()
-        self.bg_bot = pygame.Surface((self.width, self.height/3))
-        self.bg_bot = self.bg_bot.convert()
-
-        self.overlay = pygame.image.load("res/img/overlay.png").convert_alpha()
-        self.bar_1 = pygame.image.load("res/img/bar_1.png").convert_alpha()
-        self.bar_2 = pygame.image.load("res/img/bar_2.png").convert_alpha()
-        self.bar_3 = pygame.image.load("res/img/bar_3.png").convert_alpha()
-        
-        self.up_arrow = pygame.image.load("res/img/up_arrow.png")
-        self.down_arrow = pygame.image.load("res/img/down_arrow.png")
-        self.left_arrow = pygame.image.load("res/img/left_arrow.png")
-        self.right_arrow = pygame.image.load("res/img/right_arrow.png")
-        self.arrow_pos = 0
-
-        self.place_1 = pygame.image.load("res/img/place_1.png")
-        self.place_2 = pygame.image.load("res/img/place_2.png")
-        self.place_3 = pygame.image.load("res/img/place_3.png")
-        self.place_4 = pygame.image.load("res/img/place_4.png")
-        self.place_5 = pygame.image.load("res/img/place_5.png")
-        self.place_6 = pygame.image.load("res/img/place_6.png")
-
-        lightning_1 = pygame.image.load("res/img/lightning_1.png").convert_alpha()
-        lightning_2 = pygame.image.load("res/img/lightning_2.png").convert_alpha()
-        self.lightning_img = [lightning_1, lightning_2]
-
-        self.portraits = []
-        self.silhouettes = []
-        for i in range(19):
-            temp = pygame.image.load("res/img/portrait_%d.png" %(i+1))
-            self.portraits.append(temp)
-            if i < 17:
-                temp = pygame.image.load("res/img/silhouette_%d.png" %(i+1))
-                self.silhouettes.append(temp)
-
-        ## Dialogue Box
-        self.text_box = pygame.image.load("res/img/text_box.png")
+        ## Large menu and story art is only loaded when a scene first shows it, see ImageRegistry
+        self.images = ImageRegistry(loader, self.image_budget*1024*1024)
+        self.portraits = ImageList(self.images, "portrait_%d.png", 19)
+        self.silhouettes = ImageList(self.images, "silhouette_%d.png", 17)
 
         ## Persona images
-        self.persona_img = []
-        for i in range(84):
-            temp = pygame.image.load("res/img/p%03d.png" %(i+1))
-            self.persona_img.append(temp)
-
-        ## Lit-up skill images on character selection screen
-        self.small_img = []
-        for i in range(7):
-            temp = pygame.image.load("res/img/small_%d.png" %(i+1))
-            self.small_img.append(temp)
-
-        ## Darkened skill images on character selection screen
-        self.dark_img = []
-        for i in range(7):
-            temp = pygame.image.load("res/img/dark_%d.png" %(i+1))
-            self.dark_img.append(temp)
-
-        ## Rotating images for menus
-        self.rotate_img = []
-        for i in range(10):
-            temp = pygame.image.load("res/img/menu_rotate_%02d.png" %(i+1))
-            self.rotate_img.append(temp)
-
-        self.rotate_angle = 0.0
-
-        ## Skill images for in-race purposes
+        self.persona_img = ImageList(self.images, "p%03d.png", 84)
 
-        item_img_0 = pygame.image.load("res/img/mystery.png")
-        item_img_1 = pygame.image.load("res/img/item_1.png")
-        item_img_2 = pygame.image.load("res/img/item_2.png")
-        item_img_3 = pygame.image.load("res/img/item_3.png")
-        item_img_4 = pygame.image.load("res/img/item_4.png")
-        item_img_5 = pygame.image.load("res/img/item_5.png")
-        item_img_6 = pygame.image.load("res/img/item_6.png")
-        item_img_7 = pygame.image.load("res/img/item_7.png")
-        item_img_8 = pygame.image.load("res/img/item_8.png")
-        item_img_9 = pygame.image.load("res/img/item_9.png")
-        self.item_img = [item_img_0,item_img_1,item_img_2,item_img_3,
-                         item_img_4,item_img_5,item_img_6,item_img_9,
-                         item_img_7,item_img_8]
-
-        ## Lap reminder images; we don't use text because text rending is hella slow
-        lap_img_1 = pygame.image.load("res/img/lap_1.png")
-        lap_img_2 = pygame.image.load("res/img/lap_2.png")
-        lap_img_3 = pygame.image.load("res/img/lap_3.png")
-        lap_img_4 = pygame.image.load("res/img/lap_4.png")
-        lap_img_5 = pygame.image.load("res/img/lap_5.png")
-        lap_img_6 = pygame.image.load("res/img/lap_6.png")
-        self.lap_img = [lap_img_1,lap_img_2,lap_img_3,
-                        lap_img_4,lap_img_5,lap_img_6]
-
-        ## Give the illusion of a rotating card / spinning fireball
-        self.mystery_width = 64
-        self.mystery_width_increase = False
-        self.fire_rot = 0.0
-
-        ## One of the rare instances we use text rendering in-race: Counting down
-        self.countdown_text = Text("", (0,0), size=256, num=2)
-
-        self.shadow = pygame.image.load("res/img/shadow.png")
-        
         ## Fade in the stage names
         self.stage_mask = pygame.Surface((720,480))
         self.stage_mask.fill((0,0,0))
@@ -195,53 +116,38 @@ class Main:
         self.stage_alpha = 255
 
         ## Strings for stage names
-        self.stage_names = ["Yukiko's Castle","Steamy Bathhouse","Marukyu Striptease",
-                            "Secret Laboratory","Yomotsu Hirasaka","Tartarus - Thebel",
-                            "Tartarus - Arqa","Tartarus - Yabbashah","Tartarus - Tziah",
-                            "Tartarus - Harabah","Tartarus - Adamah",
-                            "Yasogami High","Velvet Room"]
+        self.stage_names = STAGE_NAMES
         ## Strings for irregular button names
         self.button_names = {1001:"Hat Up", 999:"Hat Down", 990:"Hat Left", 1010:"Hat Right"}
         ## Strings for engine classes
-        self.engine_string = {0:"150cc", 1:"100cc", 2:"50cc"}
-
-        ## The named tuples that define the objects that we make literally tens of thousands of
-        ## Named tuples are immutable and are thus incredibly so much faster than traditional class structures
-        self.Segment = namedtuple("Segment", "index p1 p2 curve color cars")
-        self.Camera = namedtuple("Camera", "x y z")
-        self.Screen = namedtuple("Screen", "scale x y w")
-        self.World = namedtuple("World", "x y z camera screen")
-        self.Wall = namedtuple("Wall", "color offset point1 point2 point3 point4")
-        self.Item = namedtuple("Item", "num level speed owner xzd")
+        self.engine_string = ENGINE_CLASSES
+
+        ## Named tuple for story scenes; road segments live in the Track store and items in the Race
         self.Scene = namedtuple("Scene", "pos char1 char2 bgm background lines")
 
         ## Sound effects
         if self.is_audio_enabled:
-            self.scroll_sound = pygame.mixer.Sound("res/sound/scroll.ogg")             ## Used for item scrolling
+            self.scroll_sound = loader.sound("scroll.ogg")                             ## Used for item scrolling
             self.scroll_sound.set_volume(0.2)
-            self.countdown_start = pygame.mixer.Sound("res/sound/countdown_start.ogg") ## Used when counting down 3, 2, 1...
+            self.countdown_start = loader.sound("countdown_start.ogg")                 ## Used when counting down 3, 2, 1...
             self.countdown_start.set_volume(0.2)
-            self.countdown_end = pygame.mixer.Sound("res/sound/countdown_end.ogg")     ## Used to kick off a race
+            self.countdown_end = loader.sound("countdown_end.ogg")                     ## Used to kick off a race
             self.countdown_end.set_volume(0.2)
-            self.menu_sound = pygame.mixer.Sound("res/sound/menu.ogg")                 ## Used when a menu selection is made
+            self.menu_sound = loader.sound("menu.ogg")                                 ## Used when a menu selection is made
             self.menu_sound.set_volume(0.5)
-            self.select_sound = pygame.mixer.Sound("res/sound/select.ogg")             ## Used when moving through a menu
+            self.select_sound = loader.sound("select.ogg")                             ## Used when moving through a menu
             self.select_sound.set_volume(0.5)
-            self.confirm_sound = pygame.mixer.Sound("res/sound/confirm.ogg")            ## Used when moving through a menu
+            self.confirm_sound = loader.sound("confirm.ogg")                            ## Used when moving through a menu
             self.confirm_sound.set_volume(0.5)
-            self.text_scroll = pygame.mixer.Sound("res/sound/text_scroll.ogg")
+            self.text_scroll = loader.sound("text_scroll.ogg")
             self.text_scroll.set_volume(0.9)
             
-        ## Base speeds for cars
-        self.max_speed = self.segment_length / self.step ## Top speed
-        self.accel = self.max_speed / 5      ## Acceleration rate
-        self.braking = -1 * self.max_speed   ## Deceleration for brakes
-        self.decel = -1 * self.max_speed / 5 ## Natural deceleration
-        self.offroad_decel = -1 * self.max_speed / 2 ## Offroad deceleration
-        self.offroad_limit = self.max_speed / 2      ## Speed limit when offroad
+        ## Top speed of cars, for the engine sounds and the title drive; the other base speeds are the Race's
+        self.max_speed = self.segment_length / self.step
 
         ## Other global images
         self.subscreen1 = pygame.Surface((self.width, self.height))       ## The main screen to draw to; can be scaled
+        self.scanline = ScanlineRoad(self.width, self.height)             ## Alternative road rasterizer, see render_index
         self.pause_subscreen = pygame.Surface((self.width, self.height))  ## The pause screen that displays when pause is on
         self.pause_subscreen = self.pause_subscreen.convert()
         self.pause_subscreen.fill((255,255,255))
@@ -261,17 +167,9 @@ class Main:
         self.mudo_mask.fill((0,0,0))
         self.mudo_mask = self.mudo_mask.convert()
 
-        ## Load the title splash
-        self.title_img = pygame.image.load("res/img/title_img.png")
-        self.title_back = []
-        for i in range(1,8):
-            temp = pygame.image.load("res/img/title_back_%02d.png" %i)
-            self.title_back.append(temp)
-
-        self.menu_back = []
-        for i in range(1,6):
-            temp = pygame.image.load("res/img/menu_back_%02d.png" %i)
-            self.menu_back.append(temp)
+        ## Title and menu backgrounds
+        self.title_back = ImageList(self.images, "title_back_%02d.png", 7)
+        self.menu_back = ImageList(self.images, "menu_back_%02d.png", 5)
 
         ## Joystick initialization
         pygame.joystick.init()
@@ -279,15 +177,136 @@ class Main:
         for j in self.js_list:
             j.init()
 
+    def preload(self):
+        ## Hand the files the splash and title block on to the loader's worker threads: everything
+        ## load_graphics() loads, plus the title screen's images. The menu sounds go first, since they're
+        ## used right away. Menu backdrops, racer sheets and voices are left to load on first use, since a
+        ## preloaded file is held outside the image registry's budget until someone asks for it.
+        images = ["red_arrow.png", "yellow_arrow.png", "overlay.png", "bar_1.png", "bar_2.png", "bar_3.png",
+                  "up_arrow.png", "down_arrow.png", "left_arrow.png", "right_arrow.png", "lightning_1.png",
+                  "lightning_2.png", "mystery.png", "shadow.png", "title_img.png"]
+        images += ["place_%d.png" %(i+1) for i in range(6)] + ["lap_%d.png" %(i+1) for i in range(6)]
+        images += ["small_%d.png" %(i+1) for i in range(7)] + ["dark_%d.png" %(i+1) for i in range(7)]
+        images += ["item_%d.png" %(i+1) for i in range(9)]
+        images += ["title_back_01.png"] ## The title opens on its first menu entry
+
+        sounds = []
+        if self.is_audio_enabled:
+            sounds = ["scroll.ogg", "countdown_start.ogg", "countdown_end.ogg", "menu.ogg", "select.ogg",
+                      "confirm.ogg", "text_scroll.ogg", "engine01.ogg", "engine02.ogg", "engine03.ogg",
+                      "thunder.ogg", "whoosh.ogg", "long_whoosh.ogg", "crash.ogg", "flame.ogg", "damage.ogg"]
+        loader.preload(sounds=sounds)
+        loader.preload(images=images)
+
+    def load_graphics(self):
+        ## Images for the menus and races; by the end of the splash screen they're mostly decoded already
+        self.red_arrow = loader.image("red_arrow.png")
+        self.yellow_arrow = loader.image("yellow_arrow.png")
+        self.arrow_tick = 0
+
+        ## Sky, horizon and ground bands of the current course, composed once per race
+        self.background = pygame.Surface((self.width, self.height))
+        self.background = self.background.convert()
+
+        self.overlay = loader.image("overlay.png")
+        self.bar_1 = loader.image("bar_1.png")
+        self.bar_2 = loader.image("bar_2.png")
+        self.bar_3 = loader.image("bar_3.png")
+        
+        self.up_arrow = loader.image("up_arrow.png")
+        self.down_arrow = loader.image("down_arrow.png", scaled=True)
+        self.left_arrow = loader.image("left_arrow.png")
+        self.right_arrow = loader.image("right_arrow.png")
+        self.arrow_pos = 0
+
+        self.place_1 = loader.image("place_1.png")
+        self.place_2 = loader.image("place_2.png")
+        self.place_3 = loader.image("place_3.png")
+        self.place_4 = loader.image("place_4.png")
+        self.place_5 = loader.image("place_5.png")
+        self.place_6 = loader.image("place_6.png")
+
+        lightning_1 = loader.image("lightning_1.png", scaled=True)
+        lightning_2 = loader.image("lightning_2.png", scaled=True)
+        self.lightning_img = [lightning_1, lightning_2]
+
+        ## Lit-up skill images on character selection screen
+        self.small_img = []
+        for i in range(7):
+            temp = loader.image("small_%d.png" %(i+1))
+            self.small_img.append(temp)
+
+        ## Darkened skill images on character selection screen
+        self.dark_img = []
+        for i in range(7):
+            temp = loader.image("dark_%d.png" %(i+1))
+            self.dark_img.append(temp)
+
+        ## Rotating images for menus
+        self.rotate_img = ImageList(self.images, "menu_rotate_%02d.png", 10, scaled=True)
+
+        self.rotate_angle = 0.0
+
+        ## Skill images for in-race purposes
+
+        item_img_0 = loader.image("mystery.png", scaled=True)
+        item_img_1 = loader.image("item_1.png", scaled=True)
+        item_img_2 = loader.image("item_2.png", scaled=True)
+        item_img_3 = loader.image("item_3.png", scaled=True)
+        item_img_4 = loader.image("item_4.png", scaled=True)
+        item_img_5 = loader.image("item_5.png", scaled=True)
+        item_img_6 = loader.image("item_6.png", scaled=True)
+        item_img_7 = loader.image("item_7.png", scaled=True)
+        item_img_8 = loader.image("item_8.png", scaled=True)
+        item_img_9 = loader.image("item_9.png", scaled=True)
+        self.item_img = [item_img_0,item_img_1,item_img_2,item_img_3,
+                         item_img_4,item_img_5,item_img_6,item_img_9,
+                         item_img_7,item_img_8]
+
+        ## Lap reminder images; we don't use text because text rending is hella slow
+        lap_img_1 = loader.image("lap_1.png")
+        lap_img_2 = loader.image("lap_2.png")
+        lap_img_3 = loader.image("lap_3.png")
+        lap_img_4 = loader.image("lap_4.png")
+        lap_img_5 = loader.image("lap_5.png")
+        lap_img_6 = loader.image("lap_6.png")
+        self.lap_img = [lap_img_1,lap_img_2,lap_img_3,
+                        lap_img_4,lap_img_5,lap_img_6]
+
+        ## Give the illusion of a rotating card / spinning fireball
+        self.mystery_width = 64
+        self.mystery_width_increase = False
+        self.fire_rot = 0.0
+
+        ## Every flip width and rotation angle is rendered once here and played back by index
+        self.mystery_frames = flip_frames(self.item_img[0], 64, 2, 64)
+        self.fire_frames = rotation_frames(self.item_img[8], 5)
+
+        ## One of the rare instances we use text rendering in-race: Counting down
+        self.countdown_text = Text("", (0,0), size=256, num=2, glyphs=True)
+
+        self.shadow = loader.image("shadow.png", scaled=True)
+
+        ## Anything the loader couldn't bring into the display format gets converted on every blit
+        for line in loader.report():
+            print("Slow image format, %s" %line)
+        self.has_loaded = True
+
     def load_options(self):
         ## Load options from data file
+        ## Older option files don't have these
+        self.render_index = 0
+        self.distance_index = 0
+        self.max_draw_distance = 150
+        self.render_budget = 10
+        self.image_budget = 32
         try:
             f = open("res/data/options.dat", "r").readlines()
             for line in f:
                 ## Whether screen is windowed or full
                 if line.find("screen_index = ") != -1:
                     self.screen_index = int(line.strip("screen_index = "))
-                ## How far to make the draw distance
+                ## Stylish or simple menus
                 elif line.find("interface_index = ") != -1:
                     self.interface_index = int(line.strip("interface_index = "))
                 ## Whether or not BGM is playing
@@ -314,6 +333,21 @@ class Main:
                 ## Engine class (50cc, 100cc, 150cc)
                 elif line.find("engine_class = ") != -1:
                     self.engine_class = int(line.strip("engine_class = "))
+                ## Road rasterizer (polygons or scanlines)
+                elif line.find("render_index = ") != -1:
+                    self.render_index = int(line.strip("render_index = "))
+                ## Whether the draw distance adapts to the render time or stays at the maximum
+                elif line.find("distance_index = ") != -1:
+                    self.distance_index = int(line.strip("distance_index = "))
+                ## Most segments to draw
+                elif line.find("max_draw_distance = ") != -1:
+                    self.max_draw_distance = int(line.strip("max_draw_distance = "))
+                ## Milliseconds of render time per frame to aim for
+                elif line.find("render_budget = ") != -1:
+                    self.render_budget = int(line.strip("render_budget = "))
+                ## Megabytes of menu and story art to keep loaded
+                elif line.find("image_budget = ") != -1:
+                    self.image_budget = int(line.strip("image_budget = "))
         except (IOError, IndexError, ValueError):
             try:
                 os.makedirs("res/data")
@@ -325,7 +359,7 @@ class Main:
             ## Windowed
             self.screen_index = 0
             f.write("screen_index = 0\n")
-            ## Near draw distance
+            ## Stylish interface
             self.interface_index = 0
             f.write("interface_index = 0\n")
             if self.is_audio_enabled:
@@ -351,6 +385,19 @@ class Main:
             ## 100cc
             self.engine_class = 1
             f.write("engine_class = 1\n")
+            ## Polygon road
+            self.render_index = 0
+            f.write("render_index = 0\n")
+            ## Adaptive draw distance of up to 150 segments, aiming for 10ms of rendering a frame
+            self.distance_index = 0
+            f.write("distance_index = 0\n")
+            self.max_draw_distance = 150
+            f.write("max_draw_distance = 150\n")
+            self.render_budget = 10
+            f.write("render_budget = 10\n")
+            ## Up to 32MB of menu and story art kept loaded
+            self.image_budget = 32
+            f.write("image_budget = 32\n")
 
             f.close()
 
@@ -373,6 +420,11 @@ class Main:
                     f.write(",")
             f.write("\n")
             f.write("engine_class = %d\n" %self.engine_class)
+            f.write("render_index = %d\n" %self.render_index)
+            f.write("distance_index = %d\n" %self.distance_index)
+            f.write("max_draw_distance = %d\n" %self.max_draw_distance)
+            f.write("render_budget = %d\n" %self.render_budget)
+            f.write("image_budget = %d\n" %self.image_budget)
 
             f.close()
         except (IOError, IndexError, ValueError):
@@ -394,6 +446,11 @@ class Main:
                     f.write(",")
             f.write("\n")
             f.write("engine_class = %d\n" %self.engine_class)
+            f.write("render_index = %d\n" %self.render_index)
+            f.write("distance_index = %d\n" %self.distance_index)
+            f.write("max_draw_distance = %d\n" %self.max_draw_distance)
+            f.write("render_budget = %d\n" %self.render_budget)
+            f.write("image_budget = %d\n" %self.image_budget)
 
             f.close()
 
@@ -411,12 +468,18 @@ class Main:
 
         while not_yet: ## While we're not displaying the main menu
             self.clock.tick(self.fps)
+            scale = self.frame_scale()
             self.subscreen1.fill((255,255,255))
             self.subscreen1.blit(self.logo, self.logo.get_rect(center=(180*2,120*2)))
             self.warning.update(pos=(0,480-48), right=700)
             self.warning.draw(self.subscreen1)
             self.subscreen1.blit(self.logo_mask, (0,0))
 
+            ## Loading bar along the bottom until the background decoding is done
+            progress = loader.progress()
+            if progress < 1.0:
+                pygame.draw.rect(self.subscreen1, (160,160,160), (0, self.height-4, int(self.width*progress), 4))
+
             ## Fade out logo
             if self.logo_alpha > 255:
                 self.logo_mask.set_alpha(min(255,int(275-self.logo_alpha)))
@@ -436,13 +499,17 @@ class Main:
             pygame.display.flip()
 
             ## Fade the screen
-            self.logo_alpha -= 3 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+            self.logo_alpha -= 3 * scale
 
             ## Allow player to exit out of the game window
             for e in pygame.event.get():
                 if e.type == pygame.QUIT:
                     self._quit()
 
+        ## The first time through, wait for whatever the title still needs
+        if not self.has_loaded:
+            self.load_graphics()
+
         ## Load the title screen BGM
         if self.music_index == 0:
             pygame.mixer.music.load("res/sound/bgm01.ogg")
@@ -453,16 +520,10 @@ class Main:
         ## Close everything once title screen is done
         return
 
-    def update_car(self, car, old_segment, new_segment):
-        ## Update the car's segmented position
-        if old_segment != new_segment:
-            old_segment.cars.remove(car)
-            new_segment.cars.append(car)
-
     def reset(self, players, is_title, course):
         ## Reset the entire rendering module
+        sound_bank.cast([player.num for player in players]) ## Only the racing characters keep their voices
         self.has_changed_music = False ## We have not changed music to end-of-race
-        self.gravity = -3              ## Gravitational constant
         self.pause = False             ## We are not pausing
         self.pause_index = 0           ## Pause menu choice is at the top
         self.has_written = False       ## We have not written achievements to file
@@ -478,8 +539,8 @@ class Main:
         self.segment_length = int(self.segment_length)  ## Length of a segment
         self.rumble_length = int(self.rumble_length)    ## Length of a rumble strip
 
-        self.draw_distance = 50  ## Number of segments to draw
-        self.draw_distance = int(self.draw_distance)
+        self.draw_distance = self.draw_governor.distance ## Number of segments to draw
+        self.fog_density = 0.0   ## Exponential fog density; 0 only fades the walls, linearly
 
         ## Set camera depth and z camera value for all players
         for player in players:
@@ -489,11 +550,13 @@ class Main:
         self.resolution = self.height / 300
         self.reset_road(is_title, course)  ## Reset the road objects
 
-        self.max_laps = 4  ## Maximum laps is 3, but we add 1 at the beginning of the race
+        self.max_laps = self.race.max_laps
         self.subscreens = [self.subscreen1]  ## Single player uses the same subscreen
+        self.huds = [HudLayer() for screen in self.subscreens] ## Cached HUD of each subscreen
 
         self.time = 0.0 ## Time is used only for achievement purposes
-        self.get_new_lap(True) ## Get a new lap at the very start
+        self.lag = 0.0  ## Start on a step boundary, with nothing to blend yet
+        self.snapshot()
         self.cpu_mudo = 0   ## Number of times the CPU's have used Mudo
         self.cpu_hama = 0   ## Number of times the CPU's have used Hama
         self.cpu_zio = 0    ## Number of times the CPU's have used Zio
@@ -501,142 +564,30 @@ class Main:
 
     def get_cpu_inputs(self, dt):
         ## Players 2 through 6
-        for i in range(1,len(self.players)):
-            self.players[i].shake = False      ## Not shaking
-            self.players[i].inputs[0] = False  ## Not steering
-            self.players[i].inputs[1] = False  ## Not steering
-            self.players[i].inputs[2] = False  ## Not accelerating
-
-            ## Do things if not spinning out and not frozen
-            if self.players[i].no_control <= 0 and self.players[i].frozen <= 0:
-                ## Find the current segment we're on for reference
-                segment = self.find_segment(self.players[i].position)
-
-                ## Steer left
-                if (segment.curve < 0 and self.players[i].player_x > self.players[i].lane) or\
-                   self.players[i].player_x > 1:
-                    if self.players[i].hama_alpha <= 0 and self.players[i].mudo_alpha <= 0:
-                        self.players[i].inputs[0] = True
-                        if self.players[i].lightning <= 0:
-                            self.players[i].boost += 0.04 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-                    else:
-                        ## Reverse steering if under hama or mudo
-                        self.players[i].inputs[1] = True
-
-                ## Steer right
-                elif (segment.curve > 0 and self.players[i].player_x < self.players[i].lane) or\
-                     self.players[i].player_x < -1:
-                    if self.players[i].hama_alpha <= 0 and self.players[i].mudo_alpha <= 0:
-                        self.players[i].inputs[1] = True
-                        if self.players[i].lightning <= 0:
-                            self.players[i].boost += 0.04 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-                    else:
-                        ## Reverse steering if under hama or mudo
-                        self.players[i].inputs[0] = True
-                else:
-                    ## If we're not steering, decrease the mini-turbo
-                    if self.players[i].boost > self.players[i].boost_diff:
-                        self.players[i].boost_diff = self.players[i].boost
-                    self.players[i].boost -= 0.1 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-                    if self.players[i].boost < 0:
-                        self.players[i].boost += 0.1 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-
-                self.players[i].inputs[2] = True ## Accelerate
-
-                ## If we have a skill, 2% chance to use it every frame
-                if self.players[i].item != None and random.randint(1,50) == 1 and self.players[i].item_scrolling <= 0.0:
-                    ## Small chance to play "item use" voice once
-                    talk = random.randint(1,3)
-                    if talk == 1 and self.sound_index == 0:
-                        if self.players[i].voice_use[self.players[i].voice_index].get_num_channels() == 0:
-                            self.players[i].voice_use[self.players[i].voice_index].play()
-                            self.players[i].voice_index = 1 if self.players[i].voice_index == 0 else 0
-                    ## Skill 1 - Agi - Launches three fireball projectiles that follow the road
-                    if self.players[i].item == 1:
-                        ## Play whoosh sound to signify launch
-                        if self.sound_index == 0:
-                            self.stop_all_sounds()
-                            self.players[i].whoosh.play()
-                        self.add_item(8, self.players[i].position+self.segment_length*2,
-                                      self.players[i].player_x,
-                                      max(self.players[i].speed, self.max_speed*2),
-                                      i, 3)
-                        ## Remove item from player
-                        self.players[i].item = None
-                    ## Skill 2 - Bufu - Launches one ice chunk that follows the road and freezes on contact
-                    elif self.players[i].item == 2:
-                        ## Play whoosh sound to signify launch
-                        if self.sound_index == 0:
-                            self.stop_all_sounds()
-                            self.players[i].whoosh.play()
-                        ## Add the ice projectile
-                        self.add_item(9, self.players[i].position + self.segment_length*2,
-                                      self.players[i].player_x,
-                                      max(self.players[i].speed, self.max_speed*2),
-                                      i, 3)
-                        ## Remove item from player
-                        self.players[i].item = None
-                    ## Skill 3 - Garu - Grants a temporary speed boost
-                    elif self.players[i].item == 3:
-                        ## Play long whoosh to signify speedup
-                        if self.sound_index == 0:
-                            self.stop_all_sounds()
-                            self.players[i].whoosh_long.play()
-                            ## Small chance to play "zooming" voice clip
-                            if talk > 1 and self.sound_index == 0:
-                                if self.players[i].voice_speed[self.players[i].voice_index].get_num_channels() == 0:
-                                    self.players[i].voice_speed[self.players[i].voice_index].play()
-                                    self.players[i].voice_index = 1 if self.players[i].voice_index == 0 else 0
-                        self.players[i].speed_up = 0.3 * 2
-                        self.players[i].speed = self.max_speed * 1.5
-                        ## Remove item from player
-                        self.players[i].item = None
-                    ## Skill 4 - Zio - Zaps all players ahead of you and pushes them offroad
-                    elif self.players[i].item == 4:
-                        for p in range(len(self.players)):
-                            if p != i and self.players[p].place < self.players[i].place and self.players[p].laps != self.max_laps and not self.players[p].recover:
-                                if self.sound_index == 0:
-                                    self.stop_all_sounds()
-                                    self.players[p].thunder.play()
-                                ## Negative/positive signifies left or right pushing
-                                self.players[p].lightning += random.choice((-1,1)) * (0.5 + self.players[p].place / 16.0)
-
-                                self.players[p].flying = True ## Player gets launched a little when hit
-                                self.players[p].boost = -1    ## Cannot turbo out of it
-                                self.players[p].no_control += abs(self.players[p].lightning) ## A little out of control
-                                self.players[p].item_hit += 1
-                                self.players[p].health -= 25
-                        ## Remove item from player
-                        self.players[i].item = None
-                    ## Skill 5 - Hama - Reverses the steering of all players ahead of you
-                    elif self.players[i].item == 5:
-                        for p in range(len(self.players)):
-                            ## Don't affect people who are under hama/mudo or who are using hama/mudo
-                            if p != i and self.players[p].hama_alpha <= 0 and self.players[p].mudo_alpha <= 0 and\
-                               self.players[p].hama_cast_alpha <= 0 and self.players[p].mudo_cast_alpha <= 0 and\
-                               self.players[p].no_control <= 0 and self.players[p].frozen <= 0 and\
-                               self.players[p].place < self.players[i].place:
-                                self.players[p].hama = True
-                                self.players[p].item_hit += 1
-                        ## Remove player item
-                        self.players[i].item = None
-                    ## Skill 6 - Mudo - Reverses the steering of all players ahead of you
-                    elif self.players[i].item == 6:
-                        for p in range(len(self.players)):
-                            ## Don't affect people who are under hama/mudo or who are using hama/mudo
-                            if p != i and self.players[p].hama_alpha <= 0 and self.players[p].mudo_alpha <= 0 and\
-                               self.players[p].hama_cast_alpha <= 0 and self.players[p].mudo_cast_alpha <= 0 and\
-                               self.players[p].no_control <= 0 and self.players[p].frozen <= 0 and\
-                               self.players[p].place < self.players[i].place:
-                                self.players[p].mudo = True
-                                self.players[p].item_hit += 1
-                        ## Remove player item
-                        self.players[i].item = None
-                    ## Skill 7 - Physical - Damages opponents in a small radius
-                    elif self.players[i].item == 7:
-                        self.players[i].attack = 90 ## Set the attack radius
-                        ## Remove player item
-                        self.players[i].item = None
+        self.race.get_cpu_inputs()
+        self.play_events()
+
+    def use_item(self, owner):
+        ## Use the human player's skill; owner is who its projectiles belong to
+        self.players[0].item_use += 1
+        item = self.race.use_item(0, owner)
+        if item == 1:
+            self.players[0].used_agi += 1
+        elif item == 2:
+            self.players[0].used_bufu += 1
+        elif item == 3:
+            self.players[0].used_garu += 1
+        elif item == 4:
+            self.players[0].used_zio += 1
+        elif item == 5:
+            self.players[0].hama_cast = True
+            self.players[0].used_hama += 1
+        elif item == 6:
+            self.players[0].mudo_cast = True
+            self.players[0].used_mudo += 1
+        elif item == 7:
+            self.players[0].used_phys += 1
+        self.play_events()
 
     def get_inputs(self, dt, is_done):
         ## Get human player inputs
@@ -657,7 +608,7 @@ class Main:
                         if self.players[0].hama_alpha <= 0 and self.players[0].mudo_alpha <= 0:
                             self.players[0].inputs[0] = True
                             if self.players[0].lightning <= 0:
-                                self.players[0].boost += 0.04 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+                                self.players[0].boost += 0.04
                         else:
                             ## Reverse steering if under hama/mudo
                             self.players[0].inputs[1] = True
@@ -667,7 +618,7 @@ class Main:
                         if self.players[0].hama_alpha <= 0 and self.players[0].mudo_alpha <= 0:
                             self.players[0].inputs[1] = True
                             if self.players[0].lightning <= 0:
-                                self.players[0].boost += 0.04 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+                                self.players[0].boost += 0.04
                         else:
                             ## Reverse steering if under hama/mudo
                             self.players[0].inputs[0] = True
@@ -696,7 +647,7 @@ class Main:
                                     if self.players[0].hama_alpha <= 0 and self.players[0].mudo_alpha <= 0:
                                         self.players[0].inputs[0] = True
                                         if self.players[0].lightning <= 0:
-                                            self.players[0].boost += 0.04 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+                                            self.players[0].boost += 0.04
                                     else:
                                         ## Reverse steering if under hama/mudo
                                         self.players[0].inputs[1] = True
@@ -706,7 +657,7 @@ class Main:
                                     if self.players[0].hama_alpha <= 0 and self.players[0].mudo_alpha <= 0:
                                         self.players[0].inputs[1] = True
                                         if self.players[0].lightning <= 0:
-                                            self.players[0].boost += 0.04 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+                                            self.players[0].boost += 0.04
                                     else:
                                         ## Reverse steering if under hama/mudo
                                         self.players[0].inputs[0] = True
@@ -722,7 +673,7 @@ class Main:
                                 if self.players[0].hama_alpha <= 0 and self.players[0].mudo_alpha <= 0:
                                     self.players[0].inputs[0] = True
                                     if self.players[0].lightning <= 0:
-                                        self.players[0].boost += 0.04 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+                                        self.players[0].boost += 0.04
                                 else:
                                     ## Reverse steering if under hama/mudo
                                     self.players[0].inputs[1] = True
@@ -732,7 +683,7 @@ class Main:
                                 if self.players[0].hama_alpha <= 0 and self.players[0].mudo_alpha <= 0:
                                     self.players[0].inputs[1] = True
                                     if self.players[0].lightning <= 0:
-                                        self.players[0].boost += 0.04 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+                                        self.players[0].boost += 0.04
                                 else:
                                     ## Reverse steering if under hama/mudo
                                     self.players[0].inputs[0] = True
@@ -743,9 +694,9 @@ class Main:
         if not self.players[0].inputs[0] and not self.players[0].inputs[1]:
             if self.players[0].boost > self.players[0].boost_diff:
                 self.players[0].boost_diff = self.players[0].boost
-            self.players[0].boost -= 0.1 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+            self.players[0].boost -= 0.1
             if self.players[0].boost < 0:
-                self.players[0].boost += 0.1 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+                self.players[0].boost += 0.1
 
         ## Poll the event queue for inputs
         for e in pygame.event.get():
@@ -825,100 +776,8 @@ class Main:
                         if self.players[0].no_control <= 0 and self.players[0].frozen <= 0:
 
                             if e.button == self.gamepad[5]: ## Item use button
-                                ## Note that the skill usage described here is exactly the same as the skill
-                                ## usage described in the get_cpu_inputs method above. As such I will not
-                                ## repeat myself here. Just scroll down to the next branch if you want.
-
                                 if self.players[0].item != None and self.players[0].item_scrolling <= 0.0:
-                                        self.players[0].item_use += 1
-                                        talk = random.randint(1,3)
-                                        if talk == 1 and self.sound_index == 0:
-                                            if self.players[0].voice_use[self.players[0].voice_index].get_num_channels() == 0:
-                                                self.players[0].voice_use[self.players[0].voice_index].play()
-                                                self.players[0].voice_index = 1 if self.players[0].voice_index == 0 else 0
-                                        ## Skill 1 - Agi
-                                        if self.players[0].item == 1:
-                                            if self.sound_index == 0:
-                                                self.stop_all_sounds()
-                                                self.players[0].whoosh.play()
-                                            self.add_item(8, self.players[0].position+self.segment_length*2,
-                                                          self.players[0].player_x,
-                                                          max(self.players[0].speed, self.max_speed*2),
-                                                          e.joy, 3)
-                                            self.players[0].item = None
-                                            self.players[0].used_agi += 1
-                                        ## Skill 2 - Bufu
-                                        elif self.players[0].item == 2:
-                                            if self.sound_index == 0:
-                                                self.stop_all_sounds()
-                                                self.players[0].whoosh.play()
-                                            self.add_item(9, self.players[0].position + self.segment_length*2,
-                                                          self.players[0].player_x,
-                                                          max(self.players[0].speed, self.max_speed*2),
-                                                          e.joy, 3)
-                                            self.players[0].item = None
-                                            self.players[0].used_bufu += 1
-                                        ## Skill 3 - Garu
-                                        elif self.players[0].item == 3:
-                                            if self.sound_index == 0:
-                                                self.stop_all_sounds()
-                                                self.players[0].whoosh_long.play()
-                                                if talk > 1 and self.sound_index == 0:
-                                                    if self.players[0].voice_speed[self.players[0].voice_index].get_num_channels() == 0:
-                                                        self.players[0].voice_speed[self.players[0].voice_index].play()
-                                                        self.players[0].voice_index = 1 if self.players[0].voice_index == 0 else 0
-                                            self.players[0].speed_up = 0.3 * 2
-                                            self.players[0].speed = self.max_speed * 1.5
-                                            self.players[0].item = None
-                                            self.players[0].used_garu += 1
-                                        ## Skill 4 - Zio
-                                        elif self.players[0].item == 4:
-                                            for p in range(len(self.players)):
-                                                if p != e.joy and self.players[p].place < self.players[0].place and self.players[p].laps != self.max_laps and not self.players[p].recover:
-                                                    if self.sound_index == 0:
-                                                        self.stop_all_sounds()
-                                                        self.players[p].thunder.play()
-                                                    self.players[p].lightning += random.choice((-1,1)) * (0.5 + self.players[p].place / 16.0)
-                                                    self.players[p].flying = True
-                                                    self.players[p].boost = -1
-                                                    self.players[p].no_control += abs(self.players[p].lightning)
-                                                    self.players[p].item_hit += 1
-                                                    self.players[p].health -= 25
-
-                                            self.players[0].item = None
-                                            self.players[0].used_zio += 1
-                                        ## Skill 5 - Hama
-                                        elif self.players[0].item == 5:
-                                            for p in range(len(self.players)):
-                                                if p != e.joy and self.players[p].hama_alpha <= 0 and self.players[p].mudo_alpha <= 0 and\
-                                                   self.players[p].hama_cast_alpha <= 0 and self.players[p].mudo_cast_alpha <= 0 and\
-                                                   self.players[p].no_control <= 0 and self.players[p].frozen <= 0 and\
-                                                   self.players[p].place < self.players[0].place:
-                                                    self.players[p].hama = True
-                                                    self.players[p].item_hit += 1
-
-                                            self.players[0].item = None
-                                            self.players[0].hama_cast = True
-                                            self.players[0].used_hama += 1
-                                        ## Skill 6 - Mudo
-                                        elif self.players[0].item == 6:
-                                            for p in range(len(self.players)):
-                                                if p != e.joy and self.players[p].hama_alpha <= 0 and self.players[p].mudo_alpha <= 0 and\
-                                                   self.players[p].hama_cast_alpha <= 0 and self.players[p].mudo_cast_alpha <= 0 and\
-                                                   self.players[p].no_control <= 0 and self.players[p].frozen <= 0 and\
-                                                   self.players[p].place < self.players[0].place:
-
-                                                    self.players[p].mudo = True
-                                                    self.players[p].item_hit += 1
-
-                                            self.players[0].item = None
-                                            self.players[0].mudo_cast = True
-                                            self.players[0].used_mudo += 1
-                                        ## Skill 7 - Physical
-                                        elif self.players[0].item == 7:
-                                            self.players[0].attack = 90
-                                            self.players[0].item = None
-                                            self.players[0].used_phys += 1
+                                    self.use_item(e.joy)
 
             ## Get key presses. We use polling to get driving commands because these are non-continuous,
             ## one-shot events
@@ -934,6 +793,9 @@ class Main:
                         if self.players[p].engine01.get_num_channels() > 0:
                             self.players[p].engine01.stop()
                     self.pause = True
+                ## F9 swaps between the polygon and scanline road rasterizers, for comparing the two
+                elif e.key == pygame.K_F9:
+                    self.render_index = 1 if self.render_index == 0 else 0
                 ## If we're paused, manipulate the pause menu
                 elif self.pause:
                     if e.key in [pygame.K_UP, pygame.K_w]:
@@ -969,98 +831,8 @@ class Main:
                     ## If not frozen or out of control...
                     if self.players[0].no_control <= 0 and self.players[0].frozen <= 0:
                         if e.key == pygame.K_z:
-                            ## Note that the skill usage described here is exactly the same as the skill
-                            ## usage described in the get_cpu_inputs method above. As such I will not
-                            ## repeat myself here. Just scroll down to the next branch if you want.
                             if self.players[0].item != None and self.players[0].item_scrolling <= 0.0:
-                                self.players[0].item_use += 1
-                                talk = random.randint(1,3)
-                                if talk == 1 and self.sound_index == 0:
-                                    if self.players[0].voice_use[self.players[0].voice_index].get_num_channels() == 0:
-                                        self.players[0].voice_use[self.players[0].voice_index].play()
-                                        self.players[0].voice_index = 1 if self.players[0].voice_index == 0 else 0
-                                ## Skill 1 - Agi
-                                if self.players[0].item == 1:
-                                    if self.sound_index == 0:
-                                        self.stop_all_sounds()
-                                        self.players[0].whoosh.play()
-                                    self.add_item(8, self.players[0].position+self.segment_length*2,
-                                                  self.players[0].player_x,
-                                                  max(self.players[0].speed, self.max_speed*2),
-                                                  0,3)
-                                    self.players[0].item = None
-                                    self.players[0].used_agi += 1
-                                ## Skill 2 - Bufu
-                                elif self.players[0].item == 2:
-                                    if self.sound_index == 0:
-                                        self.stop_all_sounds()
-                                        self.players[0].whoosh.play()
-                                    self.add_item(9, self.players[0].position + self.segment_length*2,
-                                                  self.players[0].player_x,
-                                                  max(self.players[0].speed, self.max_speed*2),
-                                                  0,3)
-                                    self.players[0].item = None
-                                    self.players[0].used_bufu += 1
-                                ## Skill 3 - Garu
-                                elif self.players[0].item == 3:
-                                    if self.sound_index == 0:
-                                        self.stop_all_sounds()
-                                        self.players[0].whoosh_long.play()
-                                        if talk > 1 and self.sound_index == 0:
-                                            if self.players[0].voice_speed[self.players[0].voice_index].get_num_channels() == 0:
-                                                self.players[0].voice_speed[self.players[0].voice_index].play()
-                                                self.players[0].voice_index = 1 if self.players[0].voice_index == 0 else 0
-                                    self.players[0].speed_up = 0.3 * 2
-                                    self.players[0].speed = self.max_speed * 1.5
-                                    self.players[0].item = None
-                                    self.players[0].used_garu += 1
-                                ## Skill 4 - Zio
-                                elif self.players[0].item == 4:
-                                    for p in range(len(self.players)):
-                                        if p != 0 and self.players[p].place < self.players[0].place and self.players[p].laps != self.max_laps and not self.players[p].recover:
-                                            if self.sound_index == 0:
-                                                self.stop_all_sounds()
-                                                self.players[p].thunder.play()
-                                            self.players[p].lightning += random.choice((-1,1)) * (0.5 + self.players[p].place / 16.0)
-                                            self.players[p].flying = True
-                                            self.players[p].boost = -1
-                                            self.players[p].no_control += abs(self.players[p].lightning)
-                                            self.players[p].item_hit += 1
-                                            self.players[p].health -= 25
-
-                                    self.players[0].item = None
-                                    self.players[0].used_zio += 1
-                                ## Skill 5 - Hama
-                                elif self.players[0].item == 5:
-                                    for p in range(len(self.players)):
-                                        if p != 0 and self.players[p].hama_alpha <= 0 and self.players[p].mudo_alpha <= 0 and\
-                                           self.players[p].hama_cast_alpha <= 0 and self.players[p].mudo_cast_alpha <= 0 and\
-                                           self.players[p].no_control <= 0 and self.players[p].frozen <= 0 and\
-                                           self.players[p].place < self.players[0].place:
-                                            self.players[p].hama = True
-                                            self.players[p].item_hit += 1
-
-                                    self.players[0].item = None
-                                    self.players[0].hama_cast = True
-                                    self.players[0].used_hama += 1
-                                ## Skill 6 - Mudo
-                                elif self.players[0].item == 6:
-                                    for p in range(len(self.players)):
-                                        if p != 0 and self.players[p].hama_alpha <= 0 and self.players[p].mudo_alpha <= 0 and\
-                                           self.players[p].hama_cast_alpha <= 0 and self.players[p].mudo_cast_alpha <= 0 and\
-                                           self.players[p].no_control <= 0 and self.players[p].frozen <= 0 and\
-                                           self.players[p].place < self.players[0].place:
-                                            self.players[p].mudo = True
-                                            self.players[p].item_hit += 1
-
-                                    self.players[0].item = None
-                                    self.players[0].used_mudo += 1
-                                    self.players[0].mudo_cast = True
-                                ## Skill 7 - Physical
-                                elif self.players[0].item == 7:
-                                    self.players[0].attack = 90
-                                    self.players[0].item = None
-                                    self.players[0].used_phys += 1
+                                self.use_item(0)
                     else:
                         ## If we're frozen or spinning out, allow player to shake out of it
                         if e.key in [pygame.K_z, pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT]:
@@ -1079,348 +851,147 @@ class Main:
         pygame.quit()
         raise SystemExit
 
-    def increase(self, start, increment, maximum):
-        ## Method that increases a value but restricts to the interval [0,maximum]
-        return max(0, min(maximum, start + increment))
-
-    def accelerate(self, speed, accel, dt):
-        ## Method that accelerates according to dt
-        return speed + accel * dt
-
-    def limit(self, value, minimum, maximum):
-        ## Method that restricts a value to an interval [minimum, maximum]
-        return max(minimum, min(value, maximum))
-
     def rot_center(self, image, rect, angle):
         ## Method that rotates an image about its center; used for fireball effect
         rot_image = pygame.transform.rotate(image, angle)
         rot_rect = rot_image.get_rect(center=rect.center)
         return rot_image, rot_rect
 
-    def project(self, p, camera_x, camera_y, camera_z, camera_depth, width, height, road_width):
-        ## Method that projects XY coordinates in the Z direction
-        temp_cam_x = (p.x or 0) - camera_x
-        temp_cam_y = (p.y or 0) - camera_y
-        temp_cam_z = (p.z or 0) - camera_z
-        temp_scr_scale = camera_depth / max(1,temp_cam_z+1)
-        temp_scr_x = round((width/2) + (temp_scr_scale * temp_cam_x * width / 2))
-        temp_scr_y = round((height/2) - (temp_scr_scale * temp_cam_y * height / 2))
-        temp_scr_w = round((temp_scr_scale * road_width * width / 2))
-
-        temp_cam = self.Camera(temp_cam_x, temp_cam_y, temp_cam_z)
-        temp_scr = self.Screen(temp_scr_scale,
-                               temp_scr_x,
-                               temp_scr_y,
-                               temp_scr_w)
-        ## We are manipulating a namedtuple, so we use the _replace method.
-        return p._replace(camera=temp_cam, screen=temp_scr)
-
-    def add_segment(self, curve, y):
-        ## Method that adds a segment to the road. The road is defined in discrete strips called segments,
-        ## which each have a curve, color, and position.
-        n = len(self.segments)
-        temp_camera_1 = self.Camera(1,1,1)
-        temp_camera_2 = self.Camera(1,1,1)
-        temp_screen_1 = self.Screen(1,1,1,1)
-        temp_screen_2 = self.Screen(1,1,1,1)
-        temp_world_1 = self.World(1, self.last_y(), n*self.segment_length, temp_camera_1, temp_screen_1)
-        temp_world_2 = self.World(1, y, (n+1)*self.segment_length, temp_camera_2, temp_screen_2)
-        temp_color = self.current_course.dark_colors if math.floor(n/self.rumble_length)%2 else self.current_course.light_colors
-
-        temp = self.Segment(n, temp_world_1, temp_world_2, curve, temp_color, [])
-        self.segments.append(temp)
-
-    def ease_in(self,a,b,percent):
-        ## Eases into a curve for road geometry
-        return a + (b-a)*math.pow(percent, 2)
-
-    def ease_out(self,a,b,percent):
-        ## Eases out of a curve for road geometry
-        return a + (b-a)*(1-math.pow(1-percent, 2))
-
-    def ease_in_out(self,a,b,percent):
-        ## Does both
-        return a + (b-a) * ((-1*math.cos(percent*3.14159)/2)+0.5)
-
-    def last_y(self):
-        ## Gets last y value; only useful for height modulation, which we don't really use... Yet.
-        return 0 if len(self.segments) == 0 else self.segments[len(self.segments)-1].p2.y
-
-    def reset_cars(self):
-        ## Reset the racers according to which segment they're entering
-        for n in range(len(self.players)):
-            segment = self.find_segment(self.players[n].position)
-            segment.cars.append(self.players[n])
-
-    def add_item(self, num, zpos, xpos, speed, owner, level=0):
-        ## Add an item into the field
-        if num == 0:
-            ## If it's a mystery tarot card, set it with these constants
-            temp = self.Item(0,0,0,1573,[xpos,zpos,0])
-        else:
-            ## Otherwise it's a fireball or ice chunk
-            temp = self.Item(num,level,speed,owner,[xpos,zpos,10])
-        self.items.append(temp)
-
-    def add_road(self, enter, hold, leave, curve, y):
-        start_y = self.last_y()
-        end_y = start_y + int(y) * self.segment_length
-        n = enter + hold + leave
-        total = enter + hold + leave
-
-        for n in range(enter):
-            self.add_segment(self.ease_in(0, curve, n/float(enter)), self.ease_in_out(start_y, end_y, n/float(total)))
-        for n in range(hold):
-            self.add_segment(curve, self.ease_in_out(start_y, end_y, (enter+n)/float(total)))
-        for n in range(leave):
-            self.add_segment(self.ease_in_out(curve, 0, n/float(leave)), self.ease_in_out(start_y, end_y, (enter+hold+n)/float(total)))
-
-    def add_straight(self, num=None):
-        num = num or ROAD.LENGTH.MEDIUM
-        self.add_road(num, num, num, 0, 0)
-
-    def add_hill(self, num=None, height=None):
-        num = num or ROAD.LENGTH.MEDIUM
-        height = height or ROAD.HILL.MEDIUM
-        self.add_road(num, num, num, 0, height)
-
-    def add_curve(self, num=None, curve=None, height=None):
-        num = num or ROAD.LENGTH.MEDIUM
-        curve = curve or ROAD.CURVE.MEDIUM
-        height = height or ROAD.HILL.NONE
-        self.add_road(num, num, num, curve, height)
-
-    def add_low_rolling_hills(self, num=None, height=None):
-        num = num or ROAD.LENGTH.SHORT
-        height = height or ROAD.HILL.LOW
-        self.add_road(num, num, num, 0, height/2)
-        self.add_road(num, num, num, 0, -1*height)
-        self.add_road(num, num, num, ROAD.CURVE.EASY, height)
-        self.add_road(num, num, num, 0, 0)
-        self.add_road(num, num, num, -1*ROAD.CURVE.EASY, height/2)
-        self.add_road(num, num, num, 0, 0)
-
-    def add_s_curves(self, num):
-        curve = random.choice((ROAD.CURVE.MEDIUM, ROAD.CURVE.HARD))
-        self.add_road(num, num, num, -curve, ROAD.HILL.NONE)
-        self.add_road(num, num, num, curve, ROAD.HILL.NONE)
-
-    def add_bumps(self):
-        self.add_road(10,10,10,0,5)
-        self.add_road(10,10,10,0,-2)
-        self.add_road(10,10,10,0,-5)
-        self.add_road(10,10,10,0,8)
-        self.add_road(10,10,10,0,5)
-
-    def add_downhill_to_end(self,num=None):
-        num = num or 200
-        self.add_road(num,num,num,0, -1 * self.last_y() / self.segment_length)
+    def reset_background(self):
+        ## Compose the course's sky, horizon and ground bands into the background surface
+        self.background.fill(self.current_course.dark_colors[1])
+        self.background.fill(self.current_course.light_colors[-1], (0, 0, self.width, self.height/3+29))
+        self.background.fill(self.current_course.dark_colors[4], (0, self.height/3+29, self.width, self.height*3/20))
+        self.background.fill(self.current_course.dark_colors[1], (0, self.height/3+13+self.height*3/20, self.width, self.height/3))
 
     def reset_road(self, is_title, course):
-        self.segments = []
-        self.items = []
-
         self.current_course = Course(course)
+        self.current_course.build_fog(self.draw_distance, self.fog_density)
+        self.reset_background()
 
-        for num in self.current_course.geometry:
-            curve = random.choice((ROAD.CURVE.MEDIUM, ROAD.CURVE.HARD))
-            if num == 0:
-                self.add_straight(30)
-            elif num == 1:
-                self.add_s_curves(30)
-            elif num == 2:
-                self.add_curve(30,-curve)
-            elif num == 3:
-                self.add_curve(30,curve)
+        ## The race lays out the road and places the tarot cards; the renderer reads them from it
+        self.race = Race(self.players, self.current_course.geometry, is_title, self.segment_length, self.rumble_length)
+        self.track = self.race.track
+        self.track_length = self.race.track_length
+        self.items = self.race.items
+        self.item_index = self.race.item_index
 
-        self.track_length = len(self.segments) * self.segment_length
-
-        if not is_title:
-            self.add_item(0,self.track_length/16,-0.8,0,0)
-            self.add_item(0,self.track_length/16,0.8,0,0)
-            self.add_item(0,self.track_length/16,0,0,0)
-            self.add_item(0,self.track_length/16,-0.4,0,0)
-            self.add_item(0,self.track_length/16,0.4,0,0)
-            self.add_item(0,self.track_length*9/16,-0.8,0,0)
-            self.add_item(0,self.track_length*9/16,0.8,0,0)
-            self.add_item(0,self.track_length*9/16,0,0,0)
-            self.add_item(0,self.track_length*9/16,0.4,0,0)
-            self.add_item(0,self.track_length*9/16,-0.4,0,0)
-
-            self.add_item(0,self.track_length*6/16,-0.8,0,0)
-            self.add_item(0,self.track_length*6/16,0.8,0,0)
-            self.add_item(0,self.track_length*6/16,0,0,0)
-            self.add_item(0,self.track_length*6/16,-0.4,0,0)
-            self.add_item(0,self.track_length*6/16,0.4,0,0)
-
-            self.add_item(0,self.track_length*12/16,-0.8,0,0)
-            self.add_item(0,self.track_length*12/16,0.8,0,0)
-            self.add_item(0,self.track_length*12/16,0,0,0)
-            self.add_item(0,self.track_length*12/16,-0.4,0,0)
-            self.add_item(0,self.track_length*12/16,0.4,0,0)
-
-        self.reset_cars()
-
-        self.segments[0] = self.segments[0]._replace(color = self.current_course.finish)
-        self.segments[1] = self.segments[1]._replace(color = self.current_course.start)
+        ## Batched projection over the track's coordinate arrays
+        self.projector = Projector(self.track)
 
 
     def percent_remaining(self, n, total):
         return (n%total) / total
 
+    def percent_along(self, z, index):
+        ## How far z is along a segment, past 0 or 1 if z is just outside it. Racers and items are drawn
+        ## between steps but bucketed by where the last step left them, which may be the next segment.
+        offset = (z - index * self.segment_length) % self.track_length
+        if offset > self.track_length / 2:
+            offset -= self.track_length
+        return offset / self.segment_length
+
     def interpolate(self, a, b, percent):
         return a + (b-a)*percent
 
     def find_segment(self,z):
-        return self.segments[int(math.floor(z/self.segment_length) % len(self.segments))]
-
-    def exponential_fog(self, distance, density):
-        return 1 / math.pow(math.e, distance*distance*density)
+        return self.race.find_segment(z)
 
     def render(self, is_done, course, is_title=False):
+        render_start = time.perf_counter()
+        self.blend()
+
         ## Player 1 screen
         count = 0
         for screen in self.subscreens:
 
-            base_segment = self.find_segment(self.players[count].position)
-            base_index = self.segments.index(base_segment)
-            max_y = self.height
-            base_percent = self.percent_remaining(self.players[count].position, self.segment_length)
-            player_segment = self.find_segment(self.players[count].position + self.players[count].player_z)
-            player_percent = self.percent_remaining(self.players[count].position + self.players[count].player_z, self.segment_length)
-            player_y = self.interpolate(player_segment.p1.y, player_segment.p2.y, player_percent)
-            temp_cam_height = self.camera_height + self.players[count].player_y * self.players[count].player_y / 2.5
+            base_segment = self.find_segment(self.players[count].view_z)
+            base_index = base_segment.index
+            base_percent = self.percent_remaining(self.players[count].view_z, self.segment_length)
+            player_segment = self.find_segment(self.players[count].view_z + self.players[count].player_z)
+            player_percent = self.percent_remaining(self.players[count].view_z + self.players[count].player_z, self.segment_length)
+            player_y = self.interpolate(self.track.y[player_segment.index], self.track.y[player_segment.index+1], player_percent)
+            temp_cam_height = self.camera_height + self.players[count].view_y * self.players[count].view_y / 2.5
             self.players[count].player_z = temp_cam_height * self.players[count].camera_depth
 
-            x = 0
-            dx = -1 * base_segment.curve * base_percent
-
-            clip = []
-
-            self.bg_top.fill(self.current_course.light_colors[-1])
-            screen.blit(self.bg_top, (0,0))
-            self.bg_mid.fill(self.current_course.dark_colors[4])
-            screen.blit(self.bg_mid, (0,self.height/3+29))
-            self.bg_bot.fill(self.current_course.dark_colors[1])
-            screen.blit(self.bg_bot, (0,self.height/3+13+self.height*3/20))
+            ## Project the whole draw window in one pass; the road, wall and sprite passes share the result
+            view = self.projector.project(base_index, base_percent,
+                                          self.players[count].view_x * self.road_width,
+                                          temp_cam_height + player_y,
+                                          self.players[count].view_z,
+                                          self.players[count].camera_depth, self.track_length,
+                                          self.draw_distance, self.width, self.height, self.road_width)
+            index = view.index.tolist()
+            clip = view.clip.tolist()
+            visible = view.visible.tolist()
+            projected = view.screen.tolist()
+            fog = self.current_course.fog
+
+            ## The road covers everything from its highest visible row down, so only the rows above
+            ## that need the background restored
+            if view.visible.any():
+                top = max(0, int(view.screen[view.visible, Y2].min()))
+            else:
+                top = self.height
+            screen.blit(self.background, (0,0), (0, 0, self.width, top))
             screen.lock()
 
-            for n in range(self.draw_distance):
-                temp_ind = (base_index + n) % len(self.segments)
-                looped = temp_ind < base_index
-                clip.append(max_y)
+            ## Fogged palette of the segment in every draw slot
+            road_colors = [fog[self.track.color[index[n]//self.current_course.road]][n] for n in range(self.draw_distance)]
+            wall_colors = [fog[self.track.color[index[n]//self.current_course.strip]][n][2] for n in range(self.draw_distance)]
 
-                temp_p1 = self.project(self.segments[temp_ind].p1, (self.players[count].player_x * self.road_width) - x,
-                             temp_cam_height + player_y, self.players[count].position - (self.track_length if looped else 0),
-                             self.players[count].camera_depth, self.width,
-                             self.height, self.road_width)
-                temp_p2 = self.project(self.segments[temp_ind].p2, (self.players[count].player_x * self.road_width) - x - dx,
-                             temp_cam_height + player_y, self.players[count].position  - (self.track_length if looped else 0),
-                             self.players[count].camera_depth, self.width,
-                             self.height, self.road_width)
-
-                self.segments[temp_ind] = self.segments[temp_ind]._replace(p1=temp_p1, p2=temp_p2)
-
-                x += dx
-                dx += self.segments[temp_ind].curve
-
-                if ((self.segments[temp_ind].p1.camera.z <= self.players[count].camera_depth) or\
-                    (self.segments[temp_ind].p2.screen.y >= max_y) or\
-                    (self.segments[temp_ind].p2.screen.y >= self.segments[temp_ind].p1.screen.y)):
-                    continue
+            if self.render_index == 1:
+                ## Scanline backend: every road row in a handful of array operations
+                self.scanline.render(screen, view, road_colors, self.lanes)
+            else:
+                ## Polygon backend: a rect and a few polygons per run of same-colored segments
+                render_road(screen, self.width, self.lanes, projected, visible, road_colors)
 
-                render_segment(screen, self.width, self.lanes,
-                               self.segments[temp_ind].p1.screen.x,
-                               self.segments[temp_ind].p1.screen.y,
-                               self.segments[temp_ind].p1.screen.w,
-                               self.segments[temp_ind].p2.screen.x,
-                               self.segments[temp_ind].p2.screen.y,
-                               self.segments[temp_ind].p2.screen.w,
-                               self.segments[temp_ind//self.current_course.road].color)
-
-                max_y = self.segments[temp_ind].p2.screen.y
-
-            for n in range(self.draw_distance-1,0,-1):
-                temp_ind = (base_index + n) % len(self.segments)
-
-                render_wall(screen, self.width, self.lanes,
-                            self.segments[temp_ind].p1.screen.x,
-                            min(clip[n],self.segments[temp_ind].p1.screen.y),
-                            self.segments[temp_ind].p1.screen.w,
-                            self.segments[temp_ind].p2.screen.x,
-                            min(clip[n],self.segments[temp_ind].p2.screen.y),
-                            self.segments[temp_ind].p2.screen.w,
-                            n, self.draw_distance, self.segments[temp_ind//self.current_course.strip].color,
-                            self.current_course.dark_colors)
+            render_walls(screen, self.width, self.lanes, projected, clip, wall_colors)
 
             screen.unlock()
 
-            for n in range(self.draw_distance-1, -5, -1):
-                temp_ind = (base_index + n) % len(self.segments)
-                segment = self.segments[temp_ind]
-
-                for i in range(len(self.items)):
-                    temp_seg = self.find_segment(self.items[i].xzd[1])
-                    if self.items[i].num == 0:
-                        if n >= 2 and temp_seg == segment:
-                            if self.mystery_width <= 0:
-                                sprite = pygame.transform.flip(self.item_img[0], True, False)
-                                sprite = pygame.transform.scale(sprite, (int(abs(self.mystery_width)), 64))
-                            else:
-                                sprite = pygame.transform.scale(self.item_img[0], (int(self.mystery_width), 64))
-                            percent = self.percent_remaining(self.items[i].xzd[1], self.segment_length)
-                            sprite_scale = self.interpolate(segment.p1.screen.scale, segment.p2.screen.scale, percent)
-                            sprite_x = self.interpolate(segment.p1.screen.x, segment.p2.screen.x, percent) + (sprite_scale * self.items[i].xzd[0] * self.road_width * self.width / 2)
-                            sprite_y = self.interpolate(segment.p1.screen.y, segment.p2.screen.y, percent)
-                            render_sprite(screen, self.width, self.height, self.resolution,
-                                          self.road_width, sprite, sprite_scale,
-                                          sprite_x, sprite_y, -0.5, -1, clip[n], is_item=True)
-                    elif self.items[i].num == 8:
-                        if temp_seg == segment:
-                            sprite = self.rot_center(self.item_img[8], self.item_img[0].get_rect(), self.fire_rot)[0]
-                            percent = self.percent_remaining(self.items[i].xzd[1], self.segment_length)
-                            sprite_scale = self.interpolate(segment.p1.screen.scale, segment.p2.screen.scale, percent)
-                            sprite_x = self.interpolate(segment.p1.screen.x, segment.p2.screen.x, percent) + (sprite_scale * self.items[i].xzd[0] * self.road_width * self.width / 2)
-                            sprite_y = self.interpolate(segment.p1.screen.y, segment.p2.screen.y, percent)
-                            render_sprite(screen, self.width, self.height, self.resolution,
-                                          self.road_width, sprite, sprite_scale,
-                                          sprite_x, sprite_y, -0.5, -1, clip[n], is_item=True)
+            ## Current frames of the spinning tarot card and fireball, from the pre-rendered banks
+            mystery_sprite = self.mystery_frames.frame(self.mystery_width)
+            fire_sprite = self.fire_frames.frame(self.fire_rot)
 
+            for n in range(self.draw_distance-1, -5, -1):
+                temp_ind = (base_index + n) % len(self.track)
+                bucket = self.item_index.buckets[temp_ind]
+                if not bucket:
+                    continue
+                p = self.track.screen[temp_ind].tolist()
+
+                for item in bucket:
+                    if item.num == 0:
+                        ## Tarot cards right under the camera aren't drawn
+                        if n < 2:
+                            continue
+                        sprite = mystery_sprite
+                    elif item.num == 8:
+                        sprite = fire_sprite
                     else:
-                        if temp_seg == segment:
-                            sprite = self.item_img[self.items[i].num]
-                            percent = self.percent_remaining(self.items[i].xzd[1], self.segment_length)
-                            sprite_scale = self.interpolate(segment.p1.screen.scale, segment.p2.screen.scale, percent)
-                            sprite_x = self.interpolate(segment.p1.screen.x, segment.p2.screen.x, percent) + (sprite_scale * self.items[i].xzd[0] * self.road_width * self.width / 2)
-                            sprite_y = self.interpolate(segment.p1.screen.y, segment.p2.screen.y, percent)
-                            render_sprite(screen, self.width, self.height, self.resolution,
-                                          self.road_width, sprite, sprite_scale,
-                                          sprite_x, sprite_y, -0.5, -1, clip[n], is_item=True)
+                        sprite = self.item_img[item.num]
+                    ## Back along the road by however much of the last step hasn't been shown yet
+                    percent = self.percent_along(item.xzd[1] - (1 - self.alpha) * self.step * item.speed, temp_ind)
+                    sprite_scale = self.interpolate(p[SCALE1], p[SCALE2], percent)
+                    sprite_x = self.interpolate(p[X1], p[X2], percent) + (sprite_scale * item.xzd[0] * self.road_width * self.width / 2)
+                    sprite_y = self.interpolate(p[Y1], p[Y2], percent)
+                    render_sprite(screen, self.width, self.height, self.resolution,
+                                  self.road_width, sprite, sprite_scale,
+                                  sprite_x, sprite_y, -0.5, -1, clip[n], is_item=True)
 
             self.hama_mask.set_alpha(min(150,self.players[count].hama_alpha))
             self.mudo_mask.set_alpha(min(150,self.players[count].mudo_alpha))
             screen.blit(self.mudo_mask, (0,0))
             screen.blit(self.hama_mask, (0,0))
 
-            if self.players[count].mudo_cast:
-                self.players[count].mudo_cast_alpha += 5 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-                self.mudo_mask.set_alpha(min(128,self.players[count].mudo_cast_alpha))
-                if self.players[count].mudo_cast_alpha >= 512:
-                    self.players[count].mudo_cast = False
-                screen.blit(self.mudo_mask, (0,0))
-            elif self.players[count].mudo_cast_alpha > 0:
-                self.players[count].mudo_cast_alpha -= 5 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+            ## Dim our own view while casting mudo or hama; the alphas advance in the race
+            if self.players[count].mudo_cast or self.players[count].mudo_cast_alpha > 0:
                 self.mudo_mask.set_alpha(min(128,self.players[count].mudo_cast_alpha))
                 screen.blit(self.mudo_mask, (0,0))
 
-            if self.players[count].hama_cast:
-                self.players[count].hama_cast_alpha += 5 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-                self.hama_mask.set_alpha(min(128,self.players[count].hama_cast_alpha))
-                if self.players[count].hama_cast_alpha >= 512:
-                    self.players[count].hama_cast = False
-                screen.blit(self.hama_mask, (0,0))
-            elif self.players[count].hama_cast_alpha > 0:
-                self.players[count].hama_cast_alpha -= 5 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+            if self.players[count].hama_cast or self.players[count].hama_cast_alpha > 0:
                 self.hama_mask.set_alpha(min(128,self.players[count].hama_cast_alpha))
                 screen.blit(self.hama_mask, (0,0))
 
@@ -1429,85 +1000,78 @@ class Main:
             if not is_title:
 
                 for n in range(self.draw_distance-1, -5, -1):
-                    temp_ind = (base_index + n) % len(self.segments)
-                    next_temp_ind = min(len(self.segments)-1,(base_index + n + 6) % len(self.segments))
-                    segment = self.segments[temp_ind]
-                    for i in range(len(segment.cars)):
-                        car = segment.cars[i]
-                        next_temp_segment = self.segments[next_temp_ind]
+                    temp_ind = (base_index + n) % len(self.track)
+                    next_temp_ind = min(len(self.track)-1,(base_index + n + 6) % len(self.track))
+                    p = self.track.screen[next_temp_ind].tolist()
+                    for car in self.track.cars[temp_ind]:
                         sprite = car.sprite
                         temp_lightning = None
                         if not (-0.1 < car.lightning < 0.1):
                             temp_lightning = self.lightning_img[int(car.lightning * 10) % 2]
-                        percent = self.percent_remaining(car.position, self.segment_length)
-                        sprite_scale = self.interpolate(next_temp_segment.p1.screen.scale, next_temp_segment.p2.screen.scale, percent)
-                        sprite_scale_x = self.interpolate(next_temp_segment.p1.screen.scale, next_temp_segment.p2.screen.scale, percent)
-                        temp_y = car.player_y*sprite_scale*7000
-                        sprite_x = self.interpolate(next_temp_segment.p1.screen.x, next_temp_segment.p2.screen.x, percent) + (sprite_scale_x * car.player_x * self.road_width * self.width / 2)
-                        sprite_y = self.interpolate(next_temp_segment.p1.screen.y-temp_y, next_temp_segment.p2.screen.y-temp_y, percent)
-                        shadow_y = self.interpolate(next_temp_segment.p1.screen.y, next_temp_segment.p2.screen.y, percent)
+                        percent = self.percent_along(car.view_z, temp_ind)
+                        sprite_scale = self.interpolate(p[SCALE1], p[SCALE2], percent)
+                        sprite_scale_x = self.interpolate(p[SCALE1], p[SCALE2], percent)
+                        temp_y = car.view_y*sprite_scale*7000
+                        sprite_x = self.interpolate(p[X1], p[X2], percent) + (sprite_scale_x * car.view_x * self.road_width * self.width / 2)
+                        sprite_y = self.interpolate(p[Y1]-temp_y, p[Y2]-temp_y, percent)
+                        shadow_y = self.interpolate(p[Y1], p[Y2], percent)
                         render_cpu(screen, car, self.width, self.height, self.resolution, self.road_width,
                                    percent, sprite_scale, sprite_x, sprite_y,
                                    car.speed * (-1 if car.inputs[0] else (1 if car.inputs[1] else 0)),
                                    self.item_img[car.item] if (car.item != None and car.id!=self.players[count].id) else None,
                                    temp_lightning, self.shadow, shadow_y)
 
-                temp_bar_1 = self.bar_3.subsurface(0,0, int(self.bar_3.get_width() * self.players[count].display_health / self.players[count].max_health), self.bar_3.get_height())
-                temp_bar_2 = self.bar_1.subsurface(0,0, int(self.bar_1.get_width() * self.players[count].health / self.players[count].max_health), self.bar_1.get_height())
-                screen.blit(self.bar_2, (19,17))
-                screen.blit(temp_bar_1, (13,11))
-                screen.blit(temp_bar_2, (13,11))
-
-                self.health_text.update("%04d/%04d" %(self.players[count].display_health, int(self.players[count].max_health)), (19,48))
-                self.health_text.draw(screen)
-
-                if self.players[count].item != None:
-                    screen.blit(self.item_img[self.players[count].item], self.item_img[self.players[count].item].get_rect(bottomright=(360*2+8*2,240*2+8*2)))
-
-                if self.players[count].place == 1:
-                    screen.blit(self.place_1, (2,480-128))
-                elif self.players[count].place == 2:
-                    screen.blit(self.place_2, (2,480-128))
-                elif self.players[count].place == 3:
-                    screen.blit(self.place_3, (2,480-128))
-                elif self.players[count].place == 4:
-                    screen.blit(self.place_4, (2,480-128))
-                elif self.players[count].place == 5:
-                    screen.blit(self.place_5, (2,480-128))
-                elif self.players[count].place == 6:
-                    screen.blit(self.place_6, (2,480-128))
-
-                for item in self.items:
-                    if item.num != 0:
-                        self.arrow_tick += 1
-                        if self.arrow_tick > 99:
-                            self.arrow_tick = 0
-                        if 0 < (self.players[i].position - item.xzd[1]) / self.segment_length < 300:
-                            if self.arrow_tick % 15 not in [0,1,2,3,4,5,6]:
-                                screen.blit(self.red_arrow, self.red_arrow.get_rect(midtop=(int((6 + item.xzd[0]*2 - self.players[i].player_x)*self.road_width/24), 480-80)))
-                            else:
-                                screen.blit(self.yellow_arrow, self.yellow_arrow.get_rect(midtop=(int((6 + item.xzd[0]*2 - self.players[i].player_x)*self.road_width/24), 480-80)))
-                            self.item_text.update("%dm" %((self.players[i].position - item.xzd[1]) / self.segment_length),
-                                                  center=(int((6 + item.xzd[0]*2 - self.players[i].player_x)*self.road_width/24), 480-48),
-                                                  antialiased=False)
-                            self.item_text.draw(screen)
-                        elif self.players[i].position / self.segment_length < 300 and (item.xzd[1] - self.track_length) / self.segment_length > 300:
-                            if self.arrow_tick % 15 not in [0,1,2,3,4,5,6]:
-                                screen.blit(self.red_arrow, self.red_arrow.get_rect(midtop=(int((6 + item.xzd[0]*2 - self.players[i].player_x)*self.road_width/24), 480-80)))
-                            else:
-                                screen.blit(self.yellow_arrow, self.yellow_arrow.get_rect(midtop=(int((6 + item.xzd[0]*2 - self.players[i].player_x)*self.road_width/24), 480-80)))
-                            self.item_text.update("%dm" %(((item.xzd[1] - self.track_length) - self.players[i].position) / self.segment_length),
-                                                  center=(int((6 + item.xzd[0]*2 - self.players[i].player_x)*self.road_width/24), 480-48),
-                                                  antialiased=False)
-                            self.item_text.draw(screen)
+                ## Recompose only the parts of the HUD whose values changed, then draw it all at once
+                player = self.players[count]
+                hud = self.huds[count]
+                inputs = (player.display_health, player.health, player.max_health)
+                if hud.stale("health", inputs):
+                    temp_bar_1 = self.bar_3.subsurface(0,0, int(self.bar_3.get_width() * player.display_health / player.max_health), self.bar_3.get_height())
+                    temp_bar_2 = self.bar_1.subsurface(0,0, int(self.bar_1.get_width() * player.health / player.max_health), self.bar_1.get_height())
+                    self.health_text.update("%04d/%04d" %(player.display_health, int(player.max_health)), (19,48))
+                    hud.compose("health", inputs, [(self.bar_2, (19,17)), (temp_bar_1, (13,11)), (temp_bar_2, (13,11)),
+                                                   (self.health_text.composite, (19-self.health_text.radius, 48-self.health_text.radius))])
+
+                if hud.stale("item", player.item):
+                    if player.item != None:
+                        hud.compose("item", player.item, [(self.item_img[player.item], self.item_img[player.item].get_rect(bottomright=(360*2+8*2,240*2+8*2)).topleft)])
+                    else:
+                        hud.compose("item", player.item, [])
 
-                #screen.blit(self.persona_img[self.players[count].p_index], self.persona_img[self.players[count].p_index].get_rect(topright=(360*2,0)))
-                screen.blit(self.overlay, self.overlay.get_rect(topright=(360*2,0)))
+                if hud.stale("place", player.place):
+                    places = [self.place_1, self.place_2, self.place_3, self.place_4, self.place_5, self.place_6]
+                    hud.compose("place", player.place, [(places[player.place-1], (2,480-128))] if 1 <= player.place <= 6 else [])
 
-                if self.players[count].lap_text_draw % 15 not in [0,1,2,3,4,5] or self.players[count].lap_text_draw >= 120:
-                    screen.blit(self.lap_img[min(4,self.players[count].laps*2-2)], (720-300,0))
+                if player.lap_text_draw % 15 not in [0,1,2,3,4,5] or player.lap_text_draw >= 120:
+                    lap = min(4,player.laps*2-2)
                 else:
-                    screen.blit(self.lap_img[min(5,self.players[count].laps*2-1)], (720-300,0))
+                    lap = min(5,player.laps*2-1)
+                if hud.stale("lap", lap):
+                    #screen.blit(self.persona_img[player.p_index], self.persona_img[player.p_index].get_rect(topright=(360*2,0)))
+                    hud.compose("lap", lap, [(self.overlay, self.overlay.get_rect(topright=(360*2,0)).topleft), (self.lap_img[lap], (720-300,0))])
+
+                hud.draw(screen)
+
+                for item in self.item_index.projectiles:
+                    self.arrow_tick += 1
+                    if self.arrow_tick > 99:
+                        self.arrow_tick = 0
+                    if 0 < (self.players[count].position - item.xzd[1]) / self.segment_length < 300:
+                        if self.arrow_tick % 15 not in [0,1,2,3,4,5,6]:
+                            screen.blit(self.red_arrow, self.red_arrow.get_rect(midtop=(int((6 + item.xzd[0]*2 - self.players[count].player_x)*self.road_width/24), 480-80)))
+                        else:
+                            screen.blit(self.yellow_arrow, self.yellow_arrow.get_rect(midtop=(int((6 + item.xzd[0]*2 - self.players[count].player_x)*self.road_width/24), 480-80)))
+                        self.item_text.update("%dm" %((self.players[count].position - item.xzd[1]) / self.segment_length),
+                                              center=(int((6 + item.xzd[0]*2 - self.players[count].player_x)*self.road_width/24), 480-48))
+                        self.item_text.draw(screen)
+                    elif self.players[count].position / self.segment_length < 300 and (item.xzd[1] - self.track_length) / self.segment_length > 300:
+                        if self.arrow_tick % 15 not in [0,1,2,3,4,5,6]:
+                            screen.blit(self.red_arrow, self.red_arrow.get_rect(midtop=(int((6 + item.xzd[0]*2 - self.players[count].player_x)*self.road_width/24), 480-80)))
+                        else:
+                            screen.blit(self.yellow_arrow, self.yellow_arrow.get_rect(midtop=(int((6 + item.xzd[0]*2 - self.players[count].player_x)*self.road_width/24), 480-80)))
+                        self.item_text.update("%dm" %(((item.xzd[1] - self.track_length) - self.players[count].position) / self.segment_length),
+                                              center=(int((6 + item.xzd[0]*2 - self.players[count].player_x)*self.road_width/24), 480-48))
+                        self.item_text.draw(screen)
 
                 if self.players[count].laps == self.max_laps:
                     if not is_done:
@@ -1577,94 +1141,102 @@ class Main:
                     elif -0.05 < (self.countdown/1000)%60 - 3 < 0.05:
                         self.countdown_end.play()
 
+        ## Hand the render time to the governor before the flip, which may wait on the display
+        self.update_draw_distance(time.perf_counter() - render_start)
         pygame.display.flip()
 
-    def update_items(self, dt):
-        if self.mystery_width_increase:
-            self.mystery_width += 4 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-            if self.mystery_width >= 64:
-                self.mystery_width_increase = False
-        else:
-            self.mystery_width -= 4 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-            if self.mystery_width <= -64:
-                self.mystery_width_increase = True
-
-        self.fire_rot += 10.0 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-        if self.fire_rot >= 360:
-            self.fire_rot = 0
-
-        for item in self.items:
-            for i in range(len(self.players)):
-                if item.owner != i and abs(self.players[i].position - item.xzd[1]) < abs(dt * self.players[i].speed - dt * item.speed) and\
-                   abs(self.players[i].player_x - item.xzd[0]) <= 0.48 and self.players[i].laps != self.max_laps:
-                    if self.players[i].player_y <= 0:
-                        if item.num == 0:
-                             if self.players[i].item == None:
-                                self.players[i].item_scrolling = 2.5
-                        elif not self.players[i].recover:
-                            self.players[i].item_hit += 1
-                            ## Fireball
-                            if item.num == 8:
-                                if self.sound_index == 0:
-                                    self.stop_all_sounds()
-                                    self.players[i].flame.play()
-                                    if random.randint(1,3) == 1 and self.sound_index == 0:
-                                        if self.players[i].voice_hit[self.players[i].voice_index].get_num_channels() == 0:
-                                            self.players[i].voice_hit[self.players[i].voice_index].play()
-                                            self.players[i].voice_index = 1 if self.players[i].voice_index == 0 else 0
-                                self.players[i].flying = True
-                                self.players[i].health -= 100
-                                self.players[i].no_control += item.level/4.0 + (self.players[i].position + ((self.players[i].laps - 1) * self.track_length)) / self.track_length * 0.6
-                            else: ## Ice attack
-                                if self.sound_index == 0:
-                                    self.stop_all_sounds()
-                                    self.players[i].crash.play()
-                                    if random.randint(1,3) == 1 and self.sound_index == 0:
-                                        if self.players[i].voice_hit[self.players[i].voice_index].get_num_channels() == 0:
-                                            self.players[i].voice_hit[self.players[i].voice_index].play()
-                                            self.players[i].voice_index = 1 if self.players[i].voice_index == 0 else 0
-                                self.players[i].flying = True
-                                self.players[i].health -= 50
-                                self.players[i].frozen = item.level - 1 + (self.players[i].position + ((self.players[i].laps - 1) * self.track_length)) / self.track_length * 0.8
-
-            item.xzd[1] = self.increase(item.xzd[1], dt * item.speed * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0), self.track_length)
-            if item.xzd[1] >= self.track_length:
-                item.xzd[1] -= self.track_length
-            new_segment = self.find_segment(item.xzd[1])
-            #item.xzd[0] = self.limit(item.xzd[0], -2, 2)
-            if item.num != 0:
-                item.xzd[2] -= dt * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-                if item.xzd[2] <= 0:
-                    self.items.remove(item)
-
-    def get_new_lap(self, first, is_title=False):
-        for p in range(len(self.players)):
-            if self.players[p].position >= self.track_length:
-                self.players[p].position -= self.track_length
-                ## Get a new lap
-                if not is_title:
-                    self.players[p].laps += 1
-                    if self.players[p].laps < self.max_laps:
-                        self.players[p].lap_text_draw = 0
-
-            elif first:
-                self.players[p].laps += 1
-                self.players[p].lap_text_draw = 0
+    def update_draw_distance(self, elapsed):
+        ## Let the governor pick the next frame's draw distance; the fog tables are laid out per draw
+        ## slot, so they're rebuilt whenever it changes
+        distance = self.draw_governor.update(elapsed)
+        if distance != self.draw_distance:
+            self.draw_distance = distance
+            self.current_course.build_fog(self.draw_distance, self.fog_density)
+
+    def frame_scale(self):
+        ## How much to stretch per-frame menu animations when frames come in slower than 60 per second;
+        ## the race itself runs in fixed steps instead
+        return max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+
+    def ticks(self, rate):
+        ## Number of steps to simulate for a frame that took rate milliseconds. The race always moves
+        ## in steps of self.step, so it plays out the same at any frame rate; the time left over carries
+        ## into the next frame, and render() draws the racers that far between their last two steps.
+        self.lag += rate / 1000.0
+        count = min(int(self.lag / self.step), self.max_ticks)
+        self.lag -= count * self.step
+        if count == self.max_ticks:
+            self.lag %= self.step
+        return count
+
+    def snapshot(self):
+        ## Where the racers are before a step, for blend()
+        self.previous = [(player.position, player.player_x, player.player_y) for player in self.players]
+
+    def blend(self):
+        ## Where to draw the racers: between the last two steps, as far as real time has got into the next
+        self.alpha = 1.0 if self.pause else min(1.0, self.lag / self.step)
+        for player, (position, player_x, player_y) in zip(self.players, self.previous):
+            distance = player.position - position
+            if distance < -self.track_length / 2: ## Crossed the line
+                distance += self.track_length
+            player.view_z = (position + distance * self.alpha) % self.track_length
+            player.view_x = player_x + (player.player_x - player_x) * self.alpha
+            player.view_y = player_y + (player.player_y - player_y) * self.alpha
 
     def update_places(self):
-        relative_pos = []
-        for i in range(len(self.players)):
-            temp = self.players[i].position + self.players[i].laps * self.track_length
-            relative_pos.append([temp,i])
-
-        for i in range(len(self.players)):
-            if self.players[i].laps == self.max_laps:
-                relative_pos[i][0] += (6-self.players[i].place) * self.track_length
+        self.race.update_places()
 
-        relative_pos.sort(key=lambda x:x[0])
-
-        for i in range(len(self.players)):
-            self.players[relative_pos[i][1]].place = len(self.players)-i
+    def play_events(self):
+        ## Sounds for whatever happened in the race since the last call
+        events = self.race.events
+        self.race.events = []
+        if self.sound_index != 0:
+            return
+        for kind, i, value in events:
+            player = self.players[i]
+            if kind == "item":
+                item, talk = value
+                ## Small chance to play "item use" voice once
+                if talk == 1:
+                    self.play_voice(player, player.voice_use)
+                if item in [1, 2]:
+                    ## Play whoosh sound to signify launch
+                    self.stop_all_sounds()
+                    player.whoosh.play()
+                elif item == 3:
+                    ## Play long whoosh to signify speedup, and a small chance of the "zooming" voice clip
+                    self.stop_all_sounds()
+                    player.whoosh_long.play()
+                    if talk > 1:
+                        self.play_voice(player, player.voice_speed)
+            elif kind == "zapped":
+                self.stop_all_sounds()
+                player.thunder.play()
+            elif kind in ["burned", "chilled"]:
+                self.stop_all_sounds()
+                if kind == "burned":
+                    player.flame.play()
+                else:
+                    player.crash.play()
+                if streams.cosmetic.randint(1,3) == 1:
+                    self.play_voice(player, player.voice_hit)
+            elif kind == "boost":
+                self.stop_all_sounds()
+                player.whoosh_long.play()
+                self.play_voice(player, player.voice_speed)
+            elif kind == "struck":
+                self.stop_all_sounds()
+                player.damage.play()
+            elif kind == "scroll":
+                if i == 0:
+                    self.scroll_sound.play()
+
+    def play_voice(self, player, voices):
+        ## Alternate between a racer's two clips for a situation, without talking over ourselves
+        if voices[player.voice_index].get_num_channels() == 0:
+            voices[player.voice_index].play()
+            player.voice_index = 1 if player.voice_index == 0 else 0
 
     def stop_all_sounds(self):
         for n in range(len(self.players)):
@@ -1682,183 +1254,25 @@ class Main:
                 pass
 
     def update(self, dt, is_title=False):
+        ## One fixed step of the race
+        self.snapshot()
         if not self.pause:
-            is_done = True
-            self.update_items(dt)
-            first_pos = 0
-
-            for p in range(len(self.players)):
-
-                first_pos = 0
-                is_player_done = False
-
-                for q in range(len(self.players)):
-                    if p != q and self.players[q].place == 1:
-                        first_pos = self.players[q].position + (self.players[q].laps-1) * self.track_length
-
-                    if self.players[q].laps != self.max_laps:
-                        is_done = False
-
-                if self.players[p].laps == self.max_laps:
-                    is_player_done = True
-                    self.players[p].item = None
-                    self.players[p].item_scrolling = 0
-
-                if self.players[p].lap_text_draw < 120:
-                    self.players[p].lap_text_draw += 1
-
-                if self.players[p].boost_diff > self.players[p].threshold:
-                    if random.randint(0,self.players[p].has_boosted+1) <= 50:
-                        self.players[p].has_boosted += 1
-                        if self.sound_index == 0:
-                            self.stop_all_sounds()
-                            self.players[p].whoosh_long.play()
-                            if self.players[p].voice_speed[self.players[p].voice_index].get_num_channels() == 0:
-                                self.players[p].voice_speed[self.players[p].voice_index].play()
-                                self.players[p].voice_index = 1 if self.players[p].voice_index == 0 else 0
-                        self.players[p].speed_up = 0.6
-                        self.players[p].speed = self.max_speed * 1.2
-                        self.players[p].boost = -1 * self.players[p].boost_diff
-                        self.players[p].boost_diff = 0.0
-                    else:
-                        self.players[p].no_control += self.players[p].boost_diff/10
-                        self.players[p].boost = -2 * self.players[p].boost_diff
-                        self.players[p].boost_diff = 0.0
-
-                if self.players[p].flying == True:
-                    self.players[p].player_y += 6 + self.gravity * self.players[p].accumulator * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-                    self.players[p].accumulator += 1 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-                    if self.players[p].player_y <= 0:
-                        self.players[p].player_y = 0
-                        self.players[p].accumulator = 0
-                        self.players[p].flying = False
-
-                if self.players[p].no_control > 0:
-                    self.players[p].no_control -= dt * self.players[p].recovery * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-
-                if self.players[p].attack > 0:
-                    self.players[p].attack -= 8
-                    if self.players[p].attack < 0:
-                        self.players[p].attack = 0
-                    for q in range(len(self.players)):
-                        if q != p and abs(self.players[p].position - self.players[q].position) < self.segment_length * 3 and\
-                           abs(self.players[p].player_x - self.players[q].player_x) <= 0.75 and not self.players[q].recover:
-                            if self.sound_index == 0:
-                                self.stop_all_sounds()
-                                self.players[q].damage.play()
-                            self.players[q].no_control += 0.2
-                            self.players[q].flying = True
-                            self.players[q].item_hit += 1
-                            self.players[q].health -= int(10 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
-
-                if self.players[p].health < 0:
-                    self.players[p].health = 0
-
-                if self.players[p].display_health <= 0:
-                    self.players[p].no_control += 1.5
-                    self.players[p].flying = True
-                    self.players[p].display_health = int(self.players[p].max_health)
-                    self.players[p].recover = True
-    
-                if self.players[p].health < self.players[p].display_health:
-                    if self.players[p].recover:
-                        self.players[p].health = int(self.players[p].health + 3 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
-                        if self.players[p].health >= int(self.players[p].max_health):
-                            self.players[p].health = int(self.players[p].max_health)
-                            self.players[p].recover = False
-                    else:
-                        self.players[p].display_health -= int(5 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
-
-                if self.players[p].frozen > 0:
-                    self.players[p].frozen -= dt * self.players[p].recovery * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-
-                if self.players[p].mudo:
-                    self.players[p].mudo_alpha += 5 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-                    if self.players[p].mudo_alpha >= 512:
-                        self.players[p].mudo = False
-                elif self.players[p].mudo_alpha > 0:
-                    self.players[p].mudo_alpha -= 5 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-
-                if self.players[p].hama:
-                    self.players[p].hama_alpha += 5 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-                    if self.players[p].hama_alpha >= 512:
-                        self.players[p].hama = False
-                elif self.players[p].hama_alpha > 0:
-                    self.players[p].hama_alpha -= 5 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-
-                if self.players[p].item_scrolling > 0:
-                    if p == 0 and self.sound_index == 0:
-                        #self.stop_all_sounds()
-                        self.scroll_sound.play()
-                    self.players[p].item_scrolling -= dt * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-                    self.players[p].item = random.choice(self.players[p].item_choice)
-
-                if self.players[p].lightning > 0:
-                    self.players[p].lightning -= dt * self.players[p].recovery * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-                elif self.players[p].lightning < 0:
-                    self.players[p].lightning += dt * self.players[p].recovery * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-
-                temp_factor_2 = 1.0 + self.players[p].speed_up*5
-                if self.players[p].speed_up > 0:
-                    self.players[p].speed_up -= dt * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-
-                ## Increase forward movement
-                start_position = self.players[p].position
-                old_segment = self.find_segment(self.players[p].position)
-
-                if old_segment.curve < 0:
-                    temp_factor_4 = max((24 - self.players[p].player_x*2) / 24, 1.0)
-                elif old_segment.curve > 0:
-                    temp_factor_4 = max((24 + self.players[p].player_x*2) / 24, 1.0)
-                else:
-                    temp_factor_4 = 1.0
-
-                speed_scale = (first_pos - (self.players[p].position+(self.players[p].laps-1)*self.track_length)) / (first_pos+1) + 1.0
-                temp_factor_1 = max(1.0, speed_scale)
-
-                self.players[p].position = self.increase(self.players[p].position, dt * self.players[p].speed * temp_factor_4 * temp_factor_1 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0), self.track_length*2)
-
-                new_segment = self.find_segment(self.players[p].position)
-
-                dx = dt * self.players[p].speed / (self.max_speed * self.players[p].max_speed_mod * temp_factor_4 * temp_factor_1) * (3.0 if ((self.players[p].player_x < -1) or (self.players[p].player_x > 1)) else 1.7)
-
-                ## X-axis movement
-                if self.players[p].inputs[0]:
-                    self.players[p].player_x -= dx * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-                elif self.players[p].inputs[1]:
-                    self.players[p].player_x += dx * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-
-                if self.players[p].lightning < -0.1:
-                    self.players[p].player_x -= dx * 2.5 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-                elif self.players[p].lightning > 0.1:
-                    self.players[p].player_x += dx * 2.5 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
-
-                if self.players[p].speed > 0:
-                    self.players[p].player_x = self.accelerate(self.players[p].player_x, self.accel * self.players[p].accel_mod * new_segment.curve / float(ROAD.CURVE.HARD) * -1 * self.players[p].speed / (self.max_speed * self.players[p].max_speed_mod) * 0.0005, dt * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
- 
-                ## Speed up or slow down
-                if is_player_done:
-                    self.players[p].speed = self.accelerate(self.players[p].speed, self.braking * self.players[p].braking_mod * 2.5, dt * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
-                elif self.players[p].frozen > 0:
-                    self.players[p].speed = self.accelerate(self.players[p].speed, self.braking * self.players[p].braking_mod * 1.0, dt * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
-                elif self.players[p].no_control > 0:
-                    self.players[p].speed = self.accelerate(self.players[p].speed, self.decel* self.players[p].decel_mod * 0.4, dt * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
-
-                if self.players[p].inputs[2]:
-                    if self.players[p].no_control <= 0 and self.players[p].frozen <= 0:
-                        self.players[p].speed = self.accelerate(self.players[p].speed, self.accel * self.players[p].accel_mod * temp_factor_1, dt * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
-                else:
-                    self.players[p].speed = self.accelerate(self.players[p].speed, self.decel * self.players[p].decel_mod, dt * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
-
-                if (((self.players[p].player_x < -1) or (self.players[p].player_x > 1)) and \
-                    (self.players[p].speed > self.offroad_limit * self.players[p].offroad_limit_mod)):
-                    self.players[p].speed = self.accelerate(self.players[p].speed, self.offroad_decel * self.players[p].offroad_decel_mod, dt * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
-
-                self.players[p].player_x = self.limit(self.players[p].player_x, -2.5, 2.5)
+            ## Spin the tarot cards and fireballs
+            if self.mystery_width_increase:
+                self.mystery_width += 4
+                if self.mystery_width >= 64:
+                    self.mystery_width_increase = False
+            else:
+                self.mystery_width -= 4
+                if self.mystery_width <= -64:
+                    self.mystery_width_increase = True
 
-                self.players[p].speed = self.limit(self.players[p].speed, 0, self.max_speed * self.players[p].max_speed_mod * temp_factor_2) * random.randint(99,101)/100.0
+            self.fire_rot += 10.0
+            if self.fire_rot >= 360:
+                self.fire_rot = 0
 
-                self.update_car(self.players[p], old_segment, new_segment)
+            is_done = self.race.update(dt)
+            self.play_events()
 
             if not is_title:
                 if self.players[0].laps == self.max_laps and not self.has_written:
@@ -1903,8 +1317,6 @@ class Main:
                             if self.players[p].engine01.get_num_channels() > 0:
                                 self.players[p].engine01.stop()
 
-            self.get_new_lap(False, is_title)
-
             return is_done
 
         return False
@@ -2423,6 +1835,7 @@ class Main:
 
     def title(self):
         self.load_achievements()
+        self.images.enter("title")
 
         running = False
         story_mode = False
@@ -2459,62 +1872,21 @@ class Main:
         persona_stats = []  ## Persona stats
 
         for i in range(17):
-            f = open("res/char/%d.dat" %(i+1), "r").readlines()
-            name = "Null"
-            temp_stat = [0,0,0,0,0,0]
-            temp_persona_list = []
+            character = roster.character(i)
+            name = character.name
+            temp_stat = [int(float(character.health)/175), character.max_speed, character.accel,
+                         character.offroad, character.recovery, character.threshold]
+            temp_persona_list = list(character.personas)
             temp_persona_names = []
             temp_persona_skills = []
             temp_persona_stats = []
-            temp_story_strings = []
-            for line in f:
-                ## Get the name string
-                if line.find("STORY:") != -1:
-                    for q in range(10):
-                        temp_story_strings.append(f[f.index(line)+q+1].replace("\n",""))
-                elif line.find("name = ") != -1:
-                    name = line.strip("name = ").replace("\n","")
-                elif line.find("max_speed = ") != -1:
-                    temp_stat[1] = int(line.strip("max_speed = "))
-                elif line.find("accel = ") != -1:
-                    temp_stat[2] = int(line.strip("accel = "))
-                elif line.find("offroad = ") != -1:
-                    temp_stat[3] = int(line.strip("offroad = "))
-                elif line.find("recovery = ") != -1:
-                    temp_stat[4] = int(line.strip("recovery = "))
-                elif line.find("threshold = ") != -1:
-                    temp_stat[5] = int(line.strip("threshold = "))
-                elif line.find("health = ") != -1:
-                    temp_stat[0] = int(float(line.strip("health = "))/175)
-                elif line.find("persona = ") != -1:
-                    temp_persona_list = line.strip("persona = ").split("/")
-                    temp_persona_list = [int(item) for item in temp_persona_list]
-                    for num in temp_persona_list:
-                        g = open("res/persona/p%03d.dat" %num, "r").readlines()
-                        temp_name = "Null"
-                        temp_skills = []
-                        temp_stat_list = [0,0,0,0,0,0]
-                        for line in g:
-                            if line.find("name = ") != -1:
-                                temp_name = line.strip("name = ").replace("\n","")
-                            elif line.find("spec = ") != -1:
-                                skill_list = line.strip("spec = ").split(",")
-                                temp_skills = [int(item) for item in skill_list]
-                            elif line.find("max_speed = ") != -1:
-                                temp_stat_list[1] = int(line.strip("max_speed = "))
-                            elif line.find("accel = ") != -1:
-                                temp_stat_list[2] = int(line.strip("accel = "))
-                            elif line.find("offroad = ") != -1:
-                                temp_stat_list[3] = int(line.strip("offroad = "))
-                            elif line.find("recovery = ") != -1:
-                                temp_stat_list[4] = int(line.strip("recovery = "))
-                            elif line.find("threshold = ") != -1:
-                                temp_stat_list[5] = int(line.strip("threshold = "))
-                            elif line.find("health = ") != -1:
-                                temp_stat_list[0] = int(float(line.strip("health = "))/150)
-                        temp_persona_names.append(temp_name)
-                        temp_persona_skills.append(temp_skills)
-                        temp_persona_stats.append(temp_stat_list)
+            temp_story_strings = list(character.story)
+            for num in temp_persona_list:
+                persona = roster.persona(num-1)
+                temp_persona_names.append(persona.name)
+                temp_persona_skills.append(list(persona.skills))
+                temp_persona_stats.append([int(persona.health/150), persona.max_speed, persona.accel,
+                                           persona.offroad, persona.recovery, persona.threshold])
 
             characters.append(name)
             story_strings.append(temp_story_strings)
@@ -2581,7 +1953,7 @@ class Main:
         self.credit_alpha = 0
 
         self.players = []
-        index1 = random.randint(0,6)
+        index1 = streams.cosmetic.randint(0,6)
         self.players.append(Player(index1,"TITLE", 1, is_title=True))
         course = 11
         self.reset_main(course, is_title=True)
@@ -2591,35 +1963,37 @@ class Main:
 
         while not running and not story_mode:
             rate = self.clock.tick(self.fps)
+            scale = self.frame_scale()
 
-            self.rotate_angle += 0.25 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+            self.rotate_angle += 0.25 * scale
             if self.rotate_angle > 360:
                 self.rotate_angle = 0
 
             if self.mode in [1,7]:
-                self.players[0].inputs[0] = False
-                self.players[0].inputs[1] = False
-
-                segment = self.find_segment(self.players[0].position)
-
-                if (segment.curve < 0 and self.players[0].player_x > self.players[0].lane) or\
-                   self.players[0].player_x > 1:
-                    self.players[0].inputs[0] = True
-                    car_center -= 1
-                    if car_center < 240:
-                        car_center = 240
-                elif (segment.curve > 0 and self.players[0].player_x < self.players[0].lane) or\
-                     self.players[0].player_x < -1:
-                    self.players[0].inputs[1] = True
-                    car_center += 1
-                    if car_center > 480:
-                        car_center = 480
+                ## The title car drives in fixed steps, like a race
+                for n in range(self.ticks(rate)):
+                    self.players[0].inputs[0] = False
+                    self.players[0].inputs[1] = False
+
+                    segment = self.find_segment(self.players[0].position)
+
+                    if (segment.curve < 0 and self.players[0].player_x > self.players[0].lane) or\
+                       self.players[0].player_x > 1:
+                        self.players[0].inputs[0] = True
+                        car_center -= 1
+                        if car_center < 240:
+                            car_center = 240
+                    elif (segment.curve > 0 and self.players[0].player_x < self.players[0].lane) or\
+                         self.players[0].player_x < -1:
+                        self.players[0].inputs[1] = True
+                        car_center += 1
+                        if car_center > 480:
+                            car_center = 480
 
-                self.players[0].inputs[2] = True
-                self.players[0].speed = self.max_speed * 0.15
+                    self.players[0].inputs[2] = True
+                    self.players[0].speed = self.max_speed * 0.15
 
-                dt = 1.0/rate
-                self.update(self.step, is_title=True)
+                    self.update(self.step, is_title=True)
                 self.render(False, course, is_title=True)
 
                 if self.mode == 7:
@@ -2643,7 +2017,7 @@ class Main:
                 shake1 = 96
 
                 if self.interface_index == 0:
-                    title_scale += 0.0036 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+                    title_scale += 0.0036 * scale
                     if title_scale > 1.0375:
                         temp_scale = 2.075 - title_scale
                     else:
@@ -2655,12 +2029,13 @@ class Main:
                     if abs(title_shake) > 0:
                         title_shake /= -2
 
-                    temp = pygame.transform.smoothscale(self.title_img, (int(self.title_img.get_width()*temp_scale),
-                                                                   int(self.title_img.get_height()*temp_scale)))
+                    title_img = self.images.get("title_img.png")
+                    temp = pygame.transform.smoothscale(title_img, (int(title_img.get_width()*temp_scale),
+                                                              int(title_img.get_height()*temp_scale)))
                     self.subscreen1.blit(temp, temp.get_rect(center=(200,200)))
                 else:
                     title_shake = 0
-                    self.subscreen1.blit(self.title_img, self.title_img.get_rect(center=(200,200)))
+                    self.subscreen1.blit(self.images.get("title_img.png"), self.images.get("title_img.png").get_rect(center=(200,200)))
                 
 
                 pygame.draw.rect(self.subscreen1, colors[menu_index][1], (404 if menu_index==0 else (428 if menu_index==1 else 448),28*menu_index+36,720,32))
@@ -2689,7 +2064,7 @@ class Main:
 
                 if self.interface_index == 0:
                     if shake1 > 0:
-                        shake1 /= int(2 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
+                        shake1 /= int(2 * scale)
                 else:
                     shake1 = 0
 
@@ -2732,7 +2107,7 @@ class Main:
                     a = 10-int(self.arrow_pos)
 
                 if self.icon_alpha > 0:
-                    self.icon_alpha -= 25 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+                    self.icon_alpha -= 25 * scale
                     if self.icon_alpha < 0:
                         self.icon_alpha = 0
 
@@ -2750,7 +2125,7 @@ class Main:
 
                 if self.interface_index == 0:
                     if shake1 > 0:
-                        shake1 /= int(2 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
+                        shake1 /= int(2 * scale)
                 else:
                     shake1 = 0
                     
@@ -2783,7 +2158,7 @@ class Main:
                     a = 10-int(self.arrow_pos)
 
                 if self.icon_alpha > 0:
-                    self.icon_alpha -= 25 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+                    self.icon_alpha -= 25 * scale
                     if self.icon_alpha < 0:
                         self.icon_alpha = 0
 
@@ -3289,7 +2664,9 @@ class Main:
                                     self.confirm_sound.play()
                                 self.reset_main(new_course, is_title=True)
                                 self.stage_intro(story_strings[story_index][0])
+                                self.images.enter("story")
                                 run_story = self.run_story(story_index)
+                                self.images.leave()
                                 story_mode = True
                             elif self.mode == 4:
                                 if self.sound_index == 0:
@@ -3453,7 +2830,9 @@ class Main:
                                 self.mode = 7
                             else:
                                 self.stage_intro(story_strings[story_index][0])
+                                self.images.enter("story")
                                 run_story = self.run_story(story_index)
+                                self.images.leave()
                                 story_mode = True
                                 
                         elif e.key == pygame.K_UP:
@@ -3706,6 +3085,8 @@ class Main:
                                 self.confirm_sound.play()
                             running = True
 
+        ## Menu art can go while racing
+        self.images.leave()
         if running:
             self.main(new_course, None, character_index, persona_list[character_index][p_index_1]-1)
         elif story_mode:
@@ -3727,8 +3108,8 @@ class Main:
         self.pause_text_1 = Text("", (0,0))
         self.pause_text_2 = Text("", (0,0))
         self.pause_text_3 = Text("", (0,0))
-        self.item_text = Text("", (0,0), size=24)
-        self.health_text = Text("", (0,0), size=24, border=True)
+        self.item_text = DigitText((0,0), size=24, antialiased=False)
+        self.health_text = DigitText((0,0), size=24, border=True)
         self.win_text = []
         for i in range(8):
             temp_text = Text("", (135*2,36*(i+2)) if i != 6 else (135*2, 36*5), border=True)
@@ -3745,8 +3126,9 @@ class Main:
         while True:
             self.subscreen1.fill((0,0,0))
             self.clock.tick(self.fps)
+            scale = self.frame_scale()
 
-            self.stage_alpha -= 10 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+            self.stage_alpha -= 10 * scale
             self.stage_mask.set_alpha(max(0,int(self.stage_alpha)))
 
             text1.update(string, center=(180*2,18*6*2))
@@ -3771,7 +3153,7 @@ class Main:
                     return True
 
     def run_credits(self):
-        f = open("res/script/8.dat", "r").readlines()
+        f = resources.lines("res/script/8.dat")
         credit_text = []
         for i in range(len(f)):
             credit_text.append(Text(f[i].replace("\n",""), size=24, pos=(32,480+26*i)))
@@ -3785,14 +3167,17 @@ class Main:
         while True:
             self.subscreen1.fill((0,0,0))
 
-            self.stage_alpha -= 1 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+            scale = self.frame_scale()
+            self.stage_alpha -= 1 * scale
             self.stage_mask.set_alpha(max(0,int(self.stage_alpha)))
 
-            self.credits_01.set_alpha(255-int(self.credit_alpha))
-            self.subscreen1.blit(self.credits_01, (0,0))
+            credits_01 = self.images.get("credits_01.png")
+            credits_01.set_alpha(255-int(self.credit_alpha))
+            self.subscreen1.blit(credits_01, (0,0))
 
-            self.credits_02.set_alpha(int(self.credit_alpha))
-            self.subscreen1.blit(self.credits_02, (0,0))
+            credits_02 = self.images.get("credits_02.png")
+            credits_02.set_alpha(int(self.credit_alpha))
+            self.subscreen1.blit(credits_02, (0,0))
             self.credit_alpha = min(255, self.credit_alpha + 0.1)
 
             self.subscreen1.blit(self.stage_mask, (0,0))
@@ -3801,7 +3186,7 @@ class Main:
 
             for i in range(len(credit_text)):
                 if credit_text[i].y > -40 and credit_text[-1].y > 240:
-                    credit_text[i].update(pos=(32,credit_text[i].y-int(max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))))
+                    credit_text[i].update(pos=(32,credit_text[i].y-int(scale)))
 
             for i in range(len(credit_text)):
                 credit_text[i].draw(self.subscreen1)
@@ -3833,7 +3218,7 @@ class Main:
         story_text5 = Text("Confirm: Advance Dialogue", (4,2), size=20)
         story_text6 = Text("ESC / Pause: Skip Scene", (4,2), size=20)
         
-        f = open("res/script/%d.dat" %(index+1), "r").readlines()
+        f = resources.lines("res/script/%d.dat" %(index+1))
         self.scenes = []
         count = 0
         racers = []
@@ -3869,7 +3254,7 @@ class Main:
                 count += 1
 
         self.players = []
-        index1 = random.randint(0,6)
+        index1 = streams.cosmetic.randint(0,6)
         self.players.append(Player(index1,"TITLE", 1, is_title=True))
 
         course = self.scenes[0].background
@@ -3886,27 +3271,28 @@ class Main:
         while True:
             self.subscreen1.fill((0,0,0))
             rate = self.clock.tick(self.fps)
+            scale = self.frame_scale()
 
-            self.players[0].inputs[0] = False
-            self.players[0].inputs[1] = False
+            for n in range(self.ticks(rate)):
+                self.players[0].inputs[0] = False
+                self.players[0].inputs[1] = False
 
-            segment = self.find_segment(self.players[0].position)
+                segment = self.find_segment(self.players[0].position)
 
-            if (segment.curve < 0 and self.players[0].player_x > self.players[0].lane) or\
-               self.players[0].player_x > 1:
-                self.players[0].inputs[0] = True
-            elif (segment.curve > 0 and self.players[0].player_x < self.players[0].lane) or\
-                 self.players[0].player_x < -1:
-                self.players[0].inputs[1] = True
+                if (segment.curve < 0 and self.players[0].player_x > self.players[0].lane) or\
+                   self.players[0].player_x > 1:
+                    self.players[0].inputs[0] = True
+                elif (segment.curve > 0 and self.players[0].player_x < self.players[0].lane) or\
+                     self.players[0].player_x < -1:
+                    self.players[0].inputs[1] = True
 
-            self.players[0].inputs[2] = True
-            self.players[0].speed = self.max_speed * 0.15
+                self.players[0].inputs[2] = True
+                self.players[0].speed = self.max_speed * 0.15
 
-            dt = 1.0/rate
-            self.update(self.step, is_title=True)
+                self.update(self.step, is_title=True)
 
             if shake1 > 0:
-                shake1 /= int(2 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
+                shake1 /= int(2 * scale)
 
             self.render(False, course, is_title=True)
             if old_scene != current_scene:
@@ -3936,7 +3322,7 @@ class Main:
                 else:
                     self.subscreen1.blit(self.portraits[self.scenes[current_scene].char2-1],
                                          self.portraits[self.scenes[current_scene].char2-1].get_rect(bottomright=(800,240*2+100-(shake1 if self.scenes[current_scene].pos == 1 else 0))))
-            self.subscreen1.blit(self.text_box, (0,0))
+            self.subscreen1.blit(self.images.get("text_box.png"), (0,0))
 
             pygame.draw.rect(self.subscreen1, (0,0,0), (0,0,720,30))
             story_text5.draw(self.subscreen1)
@@ -3952,13 +3338,13 @@ class Main:
             story_text3.draw_sub(self.subscreen1, num2)
             story_text4.draw_sub(self.subscreen1, num3)
 
-            num1 += int(10 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
+            num1 += int(10 * scale)
             if num1 >= story_text2.width:
                 num1 = story_text2.width
-                num2 += int(10 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
+                num2 += int(10 * scale)
             if num2 >= story_text3.width:
                 num2 = story_text3.width
-                num3 += int(10 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0))
+                num3 += int(10 * scale)
             if num3 >= story_text4.width:
                 num3 = story_text4.width
                 if self.sound_index == 0:
@@ -4064,8 +3450,9 @@ class Main:
             while True:
                 self.subscreen1.fill((0,0,0))
                 self.clock.tick(self.fps)
+                scale = self.frame_scale()
 
-                self.stage_alpha -= 15 * max(1.0, 1.0 + (60 - self.clock.get_fps()) / 60.0)
+                self.stage_alpha -= 15 * scale
                 if self.stage_alpha < 255:
                     self.stage_mask.set_alpha(max(0,int(self.stage_alpha)))
                 else:
@@ -4092,10 +3479,13 @@ class Main:
                         self.stage_alpha = 255
                         return
 
-    def main(self, course, racers, index1, p_index_1):
+    def main(self, course, racers, index1, p_index_1, seed=None):
         if self.music_index == 0:
             pygame.mixer.music.stop()
 
+        ## Everything the race rolls, from the grid to the road, comes from this seed; see self.seed
+        self.race_seed = streams.reseed(self.seed if seed == None else seed)
+
         ## Initialize player objects
         self.players = []
         if racers != None:
@@ -4109,8 +3499,8 @@ class Main:
             positions.append(start_pos)
             start_pos += 2/5.0
 
-        random.shuffle(positions)
-        random.shuffle(players)
+        streams.gameplay.shuffle(positions)
+        streams.gameplay.shuffle(players)
 
         self.players.append(Player(index1, "P1", p_index_1, is_title=False, player_x=positions[0], position=0, engine=self.engine_class))
         count = 1
@@ -4130,26 +3520,29 @@ class Main:
 
         while True:
             rate = self.clock.tick(self.fps)
-            dt = 1.0/rate
-            finish = self.update(self.step)
-            if (self.countdown/1000)%60 > 3:
-                if self.get_inputs(dt, finish):
-                    if self.mode == 8 and self.players[0].laps == self.max_laps and self.players[0].num == 6 and self.players[0].place == 1:
-                        self.run_credits()
-                    self.display_unlock()
-                    return
-                if not self.pause:
-                    self.time += rate
-                    if not self.music_playing and self.music_index == 0:
-                        pygame.mixer.music.play(-1)
-                        self.music_playing = True
-                    self.get_cpu_inputs(dt)
-                    self.update_places()
-            else:
-                self.countdown += rate
-                for e in pygame.event.get():
-                    if e.type == pygame.QUIT:
-                        self._quit()
+            ## As many fixed steps as the frame took, then one render
+            for n in range(self.ticks(rate)):
+                finish = self.update(self.step)
+                if (self.countdown/1000)%60 > 3:
+                    if self.get_inputs(self.step, finish):
+                        if self.mode == 8 and self.players[0].laps == self.max_laps and self.players[0].num == 6 and self.players[0].place == 1:
+                            self.images.enter("credits")
+                            self.run_credits()
+                            self.images.leave()
+                        self.display_unlock()
+                        return
+                    if not self.pause:
+                        self.time += self.step * 1000
+                        if not self.music_playing and self.music_index == 0:
+                            pygame.mixer.music.play(-1)
+                            self.music_playing = True
+                        self.get_cpu_inputs(self.step)
+                        self.update_places()
+                else:
+                    self.countdown += self.step * 1000
+                    for e in pygame.event.get():
+                        if e.type == pygame.QUIT:
+                            self._quit()
 
             self.render(finish, course)
 
@@ -0,0 +1,80 @@
+import numpy
+from collections import namedtuple
+
+## Column layout of the per-segment screen buffer
+SCALE1, X1, Y1, W1, SCALE2, X2, Y2, W2 = range(8)
+
+## Result of projecting one draw window; every array is read-only and indexed by draw slot n
+Projection = namedtuple("Projection", "index clip visible screen")
+
+## Batched projection engine for the road draw window ##
+########################################################
+class Projector(object):
+    def __init__(self, track):
+        ## World coordinates of both ends of every segment, as contiguous views into the track store
+        self.count = len(track)
+        self.x1 = track.x[:-1]
+        self.y1 = track.y[:-1]
+        self.z1 = track.z[:-1]
+        self.x2 = track.x[1:]
+        self.y2 = track.y[1:]
+        self.z2 = track.z[1:]
+        self.curve = track.curve
+
+        ## Projected values are written into the track's per-segment scratch buffer
+        self.screen = track.screen
+
+    def project(self, base_index, base_percent, camera_x, camera_y, camera_z, camera_depth,
+                track_length, draw_distance, width, height, road_width):
+        ## Segment indices covered by the window, and whether they've wrapped past the finish line
+        n = numpy.arange(draw_distance)
+        index = (base_index + n) % self.count
+        looped = index < base_index
+
+        ## Accumulate the curve offsets the same way the road is walked: x is the running sum of dx,
+        ## and dx starts at the partial curve of the base segment then adds each segment's curve
+        steps = numpy.empty(draw_distance, dtype=numpy.float64)
+        steps[0] = -1 * self.curve[base_index] * base_percent
+        steps[1:] = self.curve[index[:-1]]
+        dx = numpy.cumsum(steps)
+        x = numpy.zeros(draw_distance, dtype=numpy.float64)
+        x[1:] = numpy.cumsum(dx)[:-1]
+
+        ## Camera-space coordinates for both ends of every segment
+        cam_x1 = camera_x - x
+        cam_x2 = cam_x1 - dx
+        cam_z = camera_z - numpy.where(looped, track_length, 0)
+        temp_x1 = self.x1[index] - cam_x1
+        temp_x2 = self.x2[index] - cam_x2
+        temp_y1 = self.y1[index] - camera_y
+        temp_y2 = self.y2[index] - camera_y
+        temp_z1 = self.z1[index] - cam_z
+        temp_z2 = self.z2[index] - cam_z
+
+        ## Project onto the screen
+        screen = numpy.empty((draw_distance, 8), dtype=numpy.float64)
+        scale1 = camera_depth / numpy.maximum(1, temp_z1 + 1)
+        scale2 = camera_depth / numpy.maximum(1, temp_z2 + 1)
+        screen[:,SCALE1] = scale1
+        screen[:,X1] = numpy.rint((width/2) + (scale1 * temp_x1 * width / 2))
+        screen[:,Y1] = numpy.rint((height/2) - (scale1 * temp_y1 * height / 2))
+        screen[:,W1] = numpy.rint(scale1 * road_width * width / 2)
+        screen[:,SCALE2] = scale2
+        screen[:,X2] = numpy.rint((width/2) + (scale2 * temp_x2 * width / 2))
+        screen[:,Y2] = numpy.rint((height/2) - (scale2 * temp_y2 * height / 2))
+        screen[:,W2] = numpy.rint(scale2 * road_width * width / 2)
+        self.screen[index] = screen
+
+        ## A segment is drawn if it's in front of the camera, faces up, and pokes out above everything
+        ## nearer to it. The clip height at slot n is the lowest top edge of the nearer drawable segments;
+        ## segments that fail only the clip test never lower it, so a running minimum is enough.
+        eligible = (temp_z1 > camera_depth) & (screen[:,Y2] < screen[:,Y1])
+        tops = numpy.where(eligible, screen[:,Y2], height)
+        clip = numpy.empty(draw_distance, dtype=numpy.float64)
+        clip[0] = height
+        clip[1:] = numpy.minimum.accumulate(numpy.minimum(tops[:-1], height))
+        visible = eligible & (screen[:,Y2] < clip)
+
+        for array in (index, clip, visible, screen):
+            array.flags.writeable = False
+        return Projection(index, clip, visible, screen)
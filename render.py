@@ -1,6 +1,9 @@
-import pygame, random
+import pygame
 from pygame.locals import *
 from const import *
+from sprite import scale_cache
+from projection import X1, Y1, W1, X2, Y2, W2
+from rng import streams
 
 ## Global functions for 3D polygonal rendering ##
 #################################################
@@ -17,54 +20,117 @@ def render_rumble_width(projected_road_width, lanes):
 def render_lane_marker_width(projected_road_width, lanes):
     return projected_road_width / max(10, 4*lanes)
 
-## Draw a polygon with four points to the screen, filled with the color
-def render_polygon(screen, x1, y1, x2, y2, x3, y3, x4, y4, color):
-    pygame.draw.polygon(screen,color, [[x1,y1],[x2,y2],[x3,y3],[x4,y4]])
-
-## Render the left and right walls, as well as the ceiling
-def render_wall(screen, width, lanes, x1, y1, w1, x2, y2, w2, n, draw_dist, color, dark_color):
-    ## Get x distance to place wall
-    r1 = render_wall_width(w1)
-    r2 = render_wall_width(w2)
-
-    ## Calculate color fade with fog; color[2] = wall, color[4] = fog
-    rate1 = (float(color[2][0]-color[4][0]),
-             float(color[2][1]-color[4][1]),
-             float(color[2][2]-color[4][2]))
-    ## Wall color is [a,b,c]
-    a = int(color[2][0] - n*rate1[0]/draw_dist)
-    b = int(color[2][1] - n*rate1[1]/draw_dist)
-    c = int(color[2][2] - n*rate1[2]/draw_dist)
+## Render a run of wall segments sharing one color as a single polygon per side; points holds the
+## (x, y, w) of every segment boundary along the run
+def render_wall_run(screen, width, lanes, points, color):
+    left_bottom = []
+    left_top = []
+    right_bottom = []
+    right_top = []
+    for x, y, w in points:
+        ## Get x distance to place wall
+        r = render_wall_width(w)
+        left_bottom.append([x-w-r, y])
+        left_top.append([x-w-r, y-r-20])
+        right_bottom.append([x+w+r, y])
+        right_top.append([x+w+r, y-r-20])
 
     ## Draw them
-    render_polygon(screen, x1-w1-r1, y1, x2-w2-r2, y2, x2-w2-r2, y2-r2-20, x1-w1-r1, y1-r1-20, [a,b,c])
-    render_polygon(screen, x1+w1+r1, y1, x2+w2+r2, y2, x2+w2+r2, y2-r2-20, x1+w1+r1, y1-r1-20, [a,b,c])
-
-## Render the road and offroad on the ground
-def render_segment(screen, width, lanes, x1, y1, w1, x2, y2, w2, color):
-    ## Calculate widths
-    r1 = render_rumble_width(w1, lanes)
-    r2 = render_rumble_width(w2, lanes)
-    l1 = render_lane_marker_width(w1, lanes)
-    l2 = render_lane_marker_width(w2, lanes)
-
-    ## Draw a large rect for the base, then draw trapezoids for the road proper
+    pygame.draw.polygon(screen, color, left_bottom + left_top[::-1])
+    pygame.draw.polygon(screen, color, right_bottom + right_top[::-1])
+
+## Which way a wall moves sideways between two boundaries: -1, 0 or 1
+def render_wall_step(near, far):
+    left = (far[0] - far[2] - render_wall_width(far[2])) - (near[0] - near[2] - render_wall_width(near[2]))
+    right = (far[0] + far[2] + render_wall_width(far[2])) - (near[0] + near[2] + render_wall_width(near[2]))
+    return (left > 0) - (left < 0), (right > 0) - (right < 0)
+
+## Render the walls of the whole draw window, farthest first. Neighbouring segments with the same
+## color and a shared edge are merged, as long as each wall keeps moving the same way sideways so
+## the merged outline stays a simple polygon.
+def render_walls(screen, width, lanes, projected, clip, colors):
+    points = []
+    color = None
+    step = (0, 0)
+    for n in range(len(projected)-1, 0, -1):
+        p = projected[n]
+        far = (p[X2], min(clip[n],p[Y2]), p[W2])
+        near = (p[X1], min(clip[n],p[Y1]), p[W1])
+        left, right = render_wall_step(near, far)
+        if points and (colors[n] != color or far != points[-1] or left*step[0] < 0 or right*step[1] < 0):
+            render_wall_run(screen, width, lanes, points, color)
+            points = []
+        if not points:
+            points.append(far)
+            color = colors[n]
+            step = (0, 0)
+        points.append(near)
+        step = (step[0] or left, step[1] or right)
+    if points:
+        render_wall_run(screen, width, lanes, points, color)
+
+## Render a run of road segments sharing one color as a single set of polygons; points holds the
+## (x, y, w) of every segment boundary along the run, nearest first
+def render_road_run(screen, width, lanes, points, color):
+    ## Calculate the left and right edges of the rumble strips, the road and the lane markers
+    road_left = []
+    road_right = []
+    rumble_left = []
+    rumble_right = []
+    markers = [([], []) for LANE in range(1, lanes)] if color[5] != None else []
+    for x, y, w in points:
+        r = render_rumble_width(w, lanes)
+        l = render_lane_marker_width(w, lanes)
+        road_left.append([x-w, y])
+        road_right.append([x+w, y])
+        rumble_left.append([x-w-r, y])
+        rumble_right.append([x+w+r, y])
+        lanew = w*2/lanes
+        lanex = x - w + lanew
+        for marker_left, marker_right in markers:
+            marker_left.append([lanex-l/2, y])
+            marker_right.append([lanex+l/2, y])
+            lanex += lanew
+
+    ## Draw a large rect for the base, then draw strips for the road proper
     ## color[0] = road, color[1] = offroad, color[3] = rumble
+    y1 = points[0][1]
+    y2 = points[-1][1]
     pygame.draw.rect(screen, color[1], (0, y2, width, y1-y2))
-    render_polygon(screen, x1-w1-r1, y1, x1-w1, y1, x2-w2, y2, x2-w2-r2, y2, color[3])
-    render_polygon(screen, x1+w1+r1, y1, x1+w1, y1, x2+w2, y2, x2+w2+r2, y2, color[3])
-    render_polygon(screen, x1-w1, y1, x1+w1, y1, x2+w2, y2, x2-w2, y2, color[0])
+    pygame.draw.polygon(screen, color[3], rumble_left + road_left[::-1])
+    pygame.draw.polygon(screen, color[3], rumble_right + road_right[::-1])
+    pygame.draw.polygon(screen, color[0], road_left + road_right[::-1])
 
     ## If we're on an odd alternation, draw a dashed lane marker
-    if color[5] != None:
-        lanew1 = w1*2/lanes
-        lanew2 = w2*2/lanes
-        lanex1 = x1 - w1 + lanew1
-        lanex2 = x2 - w2 + lanew2
-        for LANE in range(1, lanes):
-            render_polygon(screen, lanex1-l1/2, y1, lanex1+l1/2, y1, lanex2+l2/2, y2, lanex2-l2/2, y2, color[5])
-            lanex1 += lanew1
-            lanex2 += lanew2
+    for marker_left, marker_right in markers:
+        pygame.draw.polygon(screen, color[5], marker_left + marker_right[::-1])
+
+## Whether two palettes paint the ground identically; the wall color is left out as it fades per slot
+def render_same_road(a, b):
+    return a[0] == b[0] and a[1] == b[1] and a[3] == b[3] and a[5] == b[5]
+
+## Render the road of the whole draw window, nearest first. Runs of visible segments with the same
+## color share their edges, so each run is drawn as one strip instead of one polygon per segment.
+def render_road(screen, width, lanes, projected, visible, colors):
+    points = []
+    color = None
+    for n in range(len(projected)):
+        if not visible[n]:
+            if points:
+                render_road_run(screen, width, lanes, points, color)
+                points = []
+            continue
+
+        p = projected[n]
+        if points and not render_same_road(colors[n], color):
+            render_road_run(screen, width, lanes, points, color)
+            points = []
+        if not points:
+            points.append((p[X1], p[Y1], p[W1]))
+            color = colors[n]
+        points.append((p[X2], p[Y2], p[W2]))
+    if points:
+        render_road_run(screen, width, lanes, points, color)
 
 ## Render a sprite on-screen, i.e. item or character
 def render_sprite(screen, width, height, resolution, road_width, sprite, scale, dest_x, dest_y, offset_x,
@@ -111,11 +177,11 @@ def render_sprite(screen, width, height, resolution, road_width, sprite, scale,
 
             ## Draw the shadow
             if shadow != None and floor != None:
-                temp = pygame.transform.scale(shadow,(int(dest_w_3),int(dest_h_3)))
+                temp = scale_cache.scale(shadow,(int(dest_w_3),int(dest_h_3)))
                 screen.blit(temp, (dest_x, floor))
 
-            ## Draw the sprite
-            screen.blit(pygame.transform.scale(sprite,(dest_w,dest_h)), (dest_x, dest_y))
+            ## Draw the sprite; scaled surfaces come from the shared cache instead of being resampled
+            screen.blit(scale_cache.scale(sprite,(dest_w,dest_h)), (dest_x, dest_y))
 
             ## Render the exhaust as circles growing and shrinking randomly
             if smoke != None:
@@ -123,17 +189,17 @@ def render_sprite(screen, width, height, resolution, road_width, sprite, scale,
                 pos2 = (int(dest_x+dest_w*7/8.0),int(dest_y+dest_h))
 
                 ## Calculate random circle sizes, larger if mini-turbo is active
-                smoke1 = int((random.randint(1 if boost <= threshold-0.5 else (8 if boost <= threshold else 10),smoke[0] + (0 if boost <= threshold-0.5 else (8 if boost <= threshold else 10))) * scale * width / 2) * 0.3 * (1/40.0) * road_width)
-                smoke2 = int((random.randint(1 if boost <= threshold-0.5 else (8 if boost <= threshold else 10),smoke[0] + (0 if boost <= threshold-0.5 else (8 if boost <= threshold else 10))) * scale * width / 2) * 0.3 * (1/40.0) * road_width)
-                smoke3 = int((random.randint(1 if boost <= threshold-0.5 else (8 if boost <= threshold else 10),smoke[0] + (0 if boost <= threshold-0.5 else (8 if boost <= threshold else 10))) * scale * width / 2) * 0.3 * (1/40.0) * road_width)
+                smoke1 = int((streams.cosmetic.randint(1 if boost <= threshold-0.5 else (8 if boost <= threshold else 10),smoke[0] + (0 if boost <= threshold-0.5 else (8 if boost <= threshold else 10))) * scale * width / 2) * 0.3 * (1/40.0) * road_width)
+                smoke2 = int((streams.cosmetic.randint(1 if boost <= threshold-0.5 else (8 if boost <= threshold else 10),smoke[0] + (0 if boost <= threshold-0.5 else (8 if boost <= threshold else 10))) * scale * width / 2) * 0.3 * (1/40.0) * road_width)
+                smoke3 = int((streams.cosmetic.randint(1 if boost <= threshold-0.5 else (8 if boost <= threshold else 10),smoke[0] + (0 if boost <= threshold-0.5 else (8 if boost <= threshold else 10))) * scale * width / 2) * 0.3 * (1/40.0) * road_width)
 
-                a = random.randint(3 if 0 < boost <= threshold-0.5 else 5, 12 if 0 < boost <= threshold-0.5 else 17)
-                b = random.randint(3 if 0 < boost <= threshold-0.5 else 5, 12 if 0 < boost <= threshold-0.5 else 17)
-                c = random.randint(3 if 0 < boost <= threshold-0.5 else 5, 12 if 0 < boost <= threshold-0.5 else 17)
-                d = random.randint(3 if 0 < boost <= threshold-0.5 else 5, 12 if 0 < boost <= threshold-0.5 else 17)
+                a = streams.cosmetic.randint(3 if 0 < boost <= threshold-0.5 else 5, 12 if 0 < boost <= threshold-0.5 else 17)
+                b = streams.cosmetic.randint(3 if 0 < boost <= threshold-0.5 else 5, 12 if 0 < boost <= threshold-0.5 else 17)
+                c = streams.cosmetic.randint(3 if 0 < boost <= threshold-0.5 else 5, 12 if 0 < boost <= threshold-0.5 else 17)
+                d = streams.cosmetic.randint(3 if 0 < boost <= threshold-0.5 else 5, 12 if 0 < boost <= threshold-0.5 else 17)
 
                 ## Flicker the color
-                tempcolor = random.choice((COLORS.BOOST1,COLORS.BOOST2))
+                tempcolor = streams.cosmetic.choice((COLORS.BOOST1,COLORS.BOOST2))
 
                 ## Draw the exhaust
                 if smoke1 > 0:
@@ -154,13 +220,13 @@ def render_sprite(screen, width, height, resolution, road_width, sprite, scale,
 
             ## If an item is above the character, blit it
             if item != None:
-                temp_1 = pygame.transform.scale(item,(int(dest_w_1/2),int(dest_h_1/2)))
+                temp_1 = scale_cache.scale(item,(int(dest_w_1/2),int(dest_h_1/2)))
                 screen.blit(temp_1, temp_1.get_rect(topleft=(dest_x, dest_y-dest_h)))
             ## If lightning is above the character, blit it
             if lightning != None:
                 new_dest_y = dest_y + dest_y * 0.1 * scale * width / 2 * 0.3 * (1/40.0) * road_width
                 new_dest_x = dest_x + dest_x * 0.1 * scale * width / 2 * 0.3 * (1/40.0) * road_width
-                temp_2 = pygame.transform.scale(lightning,(int(dest_w_2),int(dest_h_2)))
+                temp_2 = scale_cache.scale(lightning,(int(dest_w_2),int(dest_h_2)))
                 screen.blit(temp_2, temp_2.get_rect(midbottom=(int(new_dest_x), int(new_dest_y))))
 
 ## Render a player unit; note that this supplies data to be fed into the above function, does not draw on its own
@@ -168,11 +234,11 @@ def render_cpu(screen, player, width, height, resolution, road_width, speed_perc
         dest_x, dest_y, steer, item, lightning, shadow, floor):
 
     ## Bounce due to motor
-    bounce = (1.5 * random.random() * speed_percent * resolution) * random.choice((-1,1))
+    bounce = (1.5 * streams.cosmetic.random() * speed_percent * resolution) * streams.cosmetic.choice((-1,1))
 
     ## Shaking occurs if you're frozen and you're mashing the D-Pad or other
     if player.shake:
-        shake = 3.0 * random.random() * random.choice((-1,1))
+        shake = 3.0 * streams.cosmetic.random() * streams.cosmetic.choice((-1,1))
     else:
         shake = 0
 
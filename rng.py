@@ -0,0 +1,29 @@
+import random
+
+## Seeded random number streams, one per subsystem ##
+#####################################################
+class Streams(object):
+    def __init__(self, seed=None):
+        ## Separate generators, so that drawing one more frame can't change what the race rolls next:
+        ## - track: course geometry and curve directions, rolled while a race is set up
+        ## - gameplay: everything the race rules roll, the starting grid included
+        ## - cosmetic: smoke, bounce and voice lines, rolled as often as frames are drawn
+        self.track = random.Random()
+        self.gameplay = random.Random()
+        self.cosmetic = random.Random()
+        self.seed = None ## What the streams were last seeded with
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        ## Seed every stream from one value, a fresh one if None; returns it, since the same seed and the
+        ## same inputs play the same race again
+        if seed == None:
+            seed = random.getrandbits(32)
+        self.seed = seed
+        self.track.seed("%s/track" %seed)
+        self.gameplay.seed("%s/gameplay" %seed)
+        self.cosmetic.seed("%s/cosmetic" %seed)
+        return seed
+
+## Shared by the course, the race rules and the renderer
+streams = Streams()
@@ -0,0 +1,114 @@
+from collections import namedtuple
+from archive import resources
+
+## Stats as written in res/char/N.dat; num counts from 0, personas are the file numbers of res/persona/pNNN.dat
+Character = namedtuple("Character", "num name max_speed accel offroad recovery threshold health personas story")
+## Stat modifiers as written in res/persona/pNNN.dat; items is the 50 slot list skills are drawn from
+Persona = namedtuple("Persona", "num name max_speed accel offroad recovery threshold health items skills")
+## Left, right and straight driving frames, plus the same three while frozen
+SpriteSet = namedtuple("SpriteSet", "left right straight left_frozen right_frozen straight_frozen")
+
+## Item numbers for the skill chances in a persona file
+SKILLS = [("agi = ", 1), ("bufu = ", 2), ("garu = ", 3), ("zio = ", 4), ("hama = ", 5), ("mudo = ", 6), ("phys = ", 7)]
+
+## Character and persona data, parsed and converted once per process ##
+#######################################################################
+class Roster(object):
+    def __init__(self):
+        self.characters = {} ## Character number -> Character
+        self.personas = {}   ## Persona index -> Persona
+        self.sprites = {}    ## Character number -> SpriteSet
+
+    def character(self, num):
+        if num not in self.characters:
+            self.characters[num] = self.load_character(num)
+        return self.characters[num]
+
+    def persona(self, p_index):
+        ## p_index counts from 0, the files from 1
+        if p_index not in self.personas:
+            self.personas[p_index] = self.load_persona(p_index)
+        return self.personas[p_index]
+
+    def sprite_set(self, num):
+        ## The surfaces are shared by every racer driving this character, so they must not be drawn on
+        if num not in self.sprites:
+            self.sprites[num] = self.load_sprites(num)
+        return self.sprites[num]
+
+    def load_character(self, num):
+        ## Note that this does not check for errors and will crash the game if the data file is not
+        ## found (this should never happen, though)
+        f = resources.lines("res/char/%d.dat" %(num+1))
+        name = "Null"
+        stats = [0,0,0,0,0,0] ## Max speed, accel, offroad, recovery, threshold, health
+        personas = []
+        story = []
+        for line in f:
+            if line.find("STORY:") != -1:
+                for q in range(10):
+                    story.append(f[f.index(line)+q+1].replace("\n",""))
+            elif line.find("name = ") != -1:
+                name = line.strip("name = ").replace("\n","")
+            elif line.find("max_speed = ") != -1:
+                stats[0] = int(line.strip("max_speed = "))
+            elif line.find("accel = ") != -1:
+                stats[1] = int(line.strip("accel = "))
+            elif line.find("offroad = ") != -1:
+                stats[2] = int(line.strip("offroad = "))
+            elif line.find("recovery = ") != -1:
+                stats[3] = int(line.strip("recovery = "))
+            elif line.find("threshold = ") != -1:
+                stats[4] = int(line.strip("threshold = "))
+            elif line.find("health = ") != -1:
+                stats[5] = int(line.strip("health = "))
+            elif line.find("persona = ") != -1:
+                personas = [int(item) for item in line.strip("persona = ").split("/")]
+        return Character(num, name, *stats, personas=tuple(personas), story=tuple(story))
+
+    def load_persona(self, p_index):
+        f = resources.lines("res/persona/p%03d.dat" %(p_index+1))
+        name = "Null"
+        stats = [0,0,0,0,0,0.0] ## Max speed, accel, offroad, recovery, threshold, health
+        items = []
+        skills = []
+        for line in f:
+            if line.find("name = ") != -1:
+                name = line.strip("name = ").replace("\n","")
+            elif line.find("spec = ") != -1:
+                skills = [int(item) for item in line.strip("spec = ").split(",")]
+            elif line.find("max_speed = ") != -1:
+                stats[0] = int(line.strip("max_speed = "))
+            elif line.find("accel = ") != -1:
+                stats[1] = int(line.strip("accel = "))
+            elif line.find("offroad = ") != -1:
+                stats[2] = int(line.strip("offroad = "))
+            elif line.find("recovery = ") != -1:
+                stats[3] = int(line.strip("recovery = "))
+            elif line.find("threshold = ") != -1:
+                stats[4] = int(line.strip("threshold = "))
+            elif line.find("health = ") != -1:
+                stats[5] = float(line.strip("health = "))
+            else:
+                ## Percent chances of each skill showing up, scaled to a list of 50
+                for key, item in SKILLS:
+                    if line.find(key) != -1:
+                        items += [item] * int(float(line.strip(key)) * 50)
+                        break
+        return Persona(p_index, name, *stats, items=tuple(items), skills=tuple(skills))
+
+    def load_sprites(self, num):
+        ## Only drawing needs pygame, so the headless simulation can use the stats without it
+        from assets import loader
+        frames = []
+        for sheet in ["player_%d.png", "player_%d_frozen.png"]:
+            image = loader.image(sheet %(num+1))
+            ## Subsurfaces for left, right and center images, converted and keyed on their own
+            for x in [0, 128, 64]:
+                frame = image.subsurface((x,0,64,64)).convert()
+                frame.set_colorkey((0,255,255))
+                frames.append(frame)
+        return SpriteSet(*frames)
+
+## Shared by the menus and every racer
+roster = Roster()
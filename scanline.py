@@ -0,0 +1,74 @@
+import numpy, pygame
+from projection import X1, Y1, W1, X2, Y2, W2
+
+## NumPy scanline rasterizer for the road, an alternative to the polygon path in render.py ##
+#############################################################################################
+class ScanlineRoad(object):
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.columns = numpy.arange(width, dtype=numpy.int16) ## Pixel columns along a row
+        self.owner = numpy.empty(height, dtype=numpy.int64) ## Draw slot of the segment covering each row
+
+    def render(self, screen, view, colors, lanes):
+        ## Fill every road row of the screen from the projected draw window. colors[n] is the ready-faded
+        ## palette for slot n, laid out like the colors passed to render_road.
+        visible = numpy.flatnonzero(view.visible)
+        if len(visible) == 0:
+            return
+
+        ## Farther segments are painted over nearer ones, so the last visible segment spanning a row owns it
+        owner = self.owner
+        owner.fill(-1)
+        tops = numpy.clip(view.screen[visible,Y2], 0, self.height).astype(numpy.int64).tolist()
+        bottoms = numpy.clip(view.screen[visible,Y1], 0, self.height).astype(numpy.int64).tolist()
+        for n, top, bottom in zip(visible.tolist(), tops, bottoms):
+            owner[top:bottom] = n
+        rows = numpy.flatnonzero(owner >= 0)
+        if len(rows) == 0:
+            return
+        slots = owner[rows]
+
+        ## Interpolate the road center and half width down each segment, row by row
+        p = view.screen[slots]
+        t = (p[:,Y1] - (rows + 0.5)) / (p[:,Y1] - p[:,Y2])
+        center = p[:,X1] + (p[:,X2] - p[:,X1]) * t
+        half = p[:,W1] + (p[:,W2] - p[:,W1]) * t
+
+        ## Mapped colors per slot: offroad, rumble, road and lane marker (-1 if there's no marker)
+        pixels = pygame.surfarray.pixels2d(screen)
+        table = numpy.full((len(colors), 4), -1, dtype=numpy.int64)
+        for n in visible.tolist():
+            color = colors[n]
+            table[n,0] = screen.map_rgb(color[1])
+            table[n,1] = screen.map_rgb(color[3])
+            table[n,2] = screen.map_rgb(color[0])
+            if color[5] != None:
+                table[n,3] = screen.map_rgb(color[5])
+        row_colors = table[slots].astype(pixels.dtype)[:,:,None]
+
+        ## Offroad everywhere, then the rumble strips, the road and the lane markers on top. Spans are
+        ## turned into whole pixel columns per row first, so the per-pixel work is integer compares only.
+        ## The frame is built row-major so each screen row is contiguous, like the surface's own pixels.
+        frame = numpy.empty((len(rows), self.width), dtype=pixels.dtype)
+        frame[:] = row_colors[:,0]
+        self.fill(frame, center - half * 1.5, center + half * 1.5, row_colors[:,1])
+        self.fill(frame, center - half, center + half, row_colors[:,2])
+        marker = half / max(10, 4*lanes)
+        has_lane = table[slots,3] >= 0
+        for lane in range(1, lanes):
+            lane_x = center - half + lane * half * 2 / lanes
+            self.fill(frame, numpy.where(has_lane, lane_x - marker / 2, 0), numpy.where(has_lane, lane_x + marker / 2, 0), row_colors[:,3])
+
+        ## Rows are almost always one contiguous band, which can be written as a plain slice
+        if rows[-1] - rows[0] + 1 == len(rows):
+            pixels[:,rows[0]:rows[-1]+1] = frame.T
+        else:
+            pixels[:,rows] = frame.T
+        del pixels
+
+    def fill(self, frame, left, right, color):
+        ## Paint the span [left, right) of every row, taking the pixels whose centers fall inside it
+        left = numpy.clip(numpy.ceil(left - 0.5), 0, self.width).astype(numpy.int16)[:,None]
+        right = numpy.clip(numpy.ceil(right - 0.5), 0, self.width).astype(numpy.int16)[:,None]
+        numpy.copyto(frame, color, where=(self.columns >= left) & (self.columns < right))
@@ -1,5 +1,6 @@
 from distutils.core import setup
 import py2exe, os, glob
+import archive
 
 dfiles = []
 
@@ -17,6 +18,9 @@ def get_files(dfiles, directory):
 
 get_files(dfiles, 'res/')
 
+## Images, character, persona, stage and script files ship packed into one archive
+archive.pack()
+
 setup(
     version = "1.0",
     description = "Persona 4: Racing All Afternoon",
@@ -25,6 +29,7 @@ setup(
     author = "MaxieManDanceParty",
     author_email = "",
     license = "MIT License",
+    requires = ["pygame (>=2.1.4)", "numpy (>=1.20)"],
 
     # targets to build
     windows = [{
@@ -37,7 +42,7 @@ setup(
         'bundle_files': 1,
         'compressed': True,
         'excludes': [],
-        'packages': [],
+        'packages': ['numpy'],
         'dll_excludes': [''],
         'includes': [
         'const',
@@ -46,6 +51,19 @@ setup(
         'player',
         'text',
         'render',
+        'sprite',
+        'projection',
+        'track',
+        'scanline',
+        'governor',
+        'hud',
+        'assets',
+        'archive',
+        'roster',
+        'sim',
+        'batch',
+        'tournament',
+        'rng',
         ],
         'excludes':[
             'setup',
@@ -56,11 +74,7 @@ setup(
     data_files = [
         ('res/font', glob.glob('res/font/*.ttf')),
         ('res/data', glob.glob('res/data/*.dat')),
-        ('res/stage', glob.glob('res/stage/*.dat')),
-        ('res/char', glob.glob('res/char/*.dat')),
-        ('res/img', glob.glob('res/img/*.png') + glob.glob('res/img/*.ico')),
-        ('res/persona', glob.glob('res/persona/*.dat')),
-        ('res/script', glob.glob('res/script/*.dat')),
+        ('res', [archive.ARCHIVE]),
         ('res/sound', glob.glob('res/sound/*.ogg')),
         ('res/sound/1', glob.glob('res/sound/1/*.ogg')),
         ('res/sound/2', glob.glob('res/sound/2/*.ogg')),
@@ -0,0 +1,543 @@
+import math
+from collections import namedtuple
+from const import ROAD
+from track import Track, ItemIndex, remove_identical
+from roster import roster
+from rng import streams
+
+## Tarot cards, fireballs and ice chunks on the road; xzd is [lateral x, position, seconds left]
+Item = namedtuple("Item", "num level speed owner xzd")
+
+def increase(start, increment, maximum):
+    ## Increase a value but restrict it to the interval [0,maximum]
+    return max(0, min(maximum, start + increment))
+
+def accelerate(speed, accel, dt):
+    ## Accelerate according to dt
+    return speed + accel * dt
+
+def limit(value, minimum, maximum):
+    ## Restrict a value to the interval [minimum, maximum]
+    return max(minimum, min(value, maximum))
+
+## Racer state, everything the race rules read and write ##
+###########################################################
+class Racer(object):
+    def __init__(self, num, idno, p_index, is_title=False, player_x=None, position=None, engine=0):
+        ## Load the stats from the appropriately numbered file in res/char
+        self.load_data(num, idno, engine, p_index)
+        ## Set the persona type
+        self.p_index = p_index
+
+        ## If solo mode, use the random attribute fed into the constructor
+        if not is_title:
+            self.player_x = player_x
+            self.lane = player_x
+            self.position = position
+        else: ## If multiplayer mode or title, use a predefined value here
+            self.player_x = 0.0
+            self.lane = 0.0
+            self.position = 10000
+
+        ## Player coordinates and other attributes to move through the map
+        self.player_y = 0
+        self.speed = 0
+        ## The last two inputs are not used
+        self.inputs = [False,False,False,False,False] ## Left, Right, Faster, Slower, Debug
+
+        self.item = None          ## Start without an item
+        self.item_scrolling = 0.0 ## Whether or not we're scrolling through the item list
+        self.place = 0            ## Current place in the race
+        self.item_hit = 0         ## Whether or not we've been hit by an item (used for achievements)
+        self.item_use = 0         ## Whether or not we've used an item (used for achievements)
+        self.shake = False        ## Whether or not we're shaking out of being frozen
+        self.has_boosted = 0      ## The number of times we've mini-turbo'd
+        self.boost = 0.0          ## Mini-turbo accumulator, builds up to determine how much speed-up is achieved
+        self.boost_diff = 0.0     ## Mini-turbo effect decrementer, applies the speed-up
+
+        ## Items used for achievements
+        self.used_agi = 0  ## Causes opponents to spin out
+        self.used_zio = 0  ## Zaps and pushes opponents offroad
+        self.used_mudo = 0 ## Blacken screen + reverse steering
+        self.used_garu = 0 ## Small speed boost
+        self.used_hama = 0 ## Whiten screen + reverse steering
+        self.used_bufu = 0 ## Freezing projectile
+        self.used_phys = 0 ## Short-range attack
+
+        ## Item effects
+        self.recover = False      ## Whether we're restoring our health
+        self.no_control = 0.0     ## Whether we're spinning out of control
+        self.speed_up = 0.0       ## The length of time we're sped up
+        self.mudo = False         ## Whether or not we're under mudo
+        self.mudo_alpha = 0       ## Personal mudo alpha value
+        self.mudo_cast = False    ## Whether or not we're casting mudo
+        self.mudo_cast_alpha = 0  ## Personal mudo alpha value
+        self.hama = False         ## WHether or not we're under hama
+        self.hama_alpha = 0       ## Personal hama alpha value
+        self.hama_cast = False    ## Whether or not we're casting hama
+        self.hama_cast_alpha = 0  ## Personal hama alpha value
+        self.frozen = 0.0         ## The length of time we're currently frozen
+        self.lightning = 0.0      ## The length of time we're affected by lightning
+        self.flying = False       ## Whether or not we've been launched (jolt reaction due to being hit, for example)
+        self.attack = 0.0         ## The length of time we're attacking physically
+        self.accumulator = 0      ## Gravity to fall from being launched
+
+        self.laps = 0          ## Number of laps we've cleared
+        self.lap_text_draw = 0 ## Used to flash orange
+
+    def load_data(self, num, idno, engine, p_index):
+        #engine = engine/2.0 ## Scale down the impact of the engine class
+        ## Player attributes for identification
+        self.num = num
+        self.id = idno
+        self.offroad_limit_mod = 0.75 ## This is a constant
+
+        ## Stat modifiers and item list from the persona
+        persona = roster.persona(p_index)
+        self.persona_name = persona.name
+        self.item_choice = persona.items
+
+        character = roster.character(num)
+        self.name = character.name
+        ## Convert the max speed into game terms
+        max_speed = 0.8 + 0.012 * (character.max_speed - 1 - engine + persona.max_speed)
+        self.max_speed_mod = max_speed * 1.02
+        self.braking_mod = max_speed * 0.5 * 1.02
+        self.decel_mod = max_speed * 0.5 * 1.02
+        ## Convert the acceleration into game terms
+        accel = 1.4 + 0.4 * (character.accel - 1 - engine + persona.accel)
+        self.accel_mod = accel * 1.02
+        ## Convert the offroad mod into game terms
+        offroad_decel = self.accel_mod + 0.24 * (7 - (character.offroad - engine + persona.offroad))
+        self.offroad_decel_mod = offroad_decel * 1.02
+        ## Convert the recovery mod into game terms
+        self.recovery = 1.2 + 0.1 * (character.recovery - 2 - engine + persona.recovery)
+        ## Convert the mini-turbo mod into game terms
+        self.threshold = 1.5 * (7 - (character.threshold - engine + persona.threshold))
+        ## Raw health value
+        self.health = character.health - engine*100
+        self.display_health = self.health
+        self.max_health = float(self.health)
+
+## One race, advanced from racer state and inputs alone ##
+##########################################################
+class Race(object):
+    def __init__(self, racers, geometry, is_title=False, segment_length=150.0, rumble_length=1, step=1/60.):
+        ## racers are Racers (or Players) with their inputs set from outside; geometry is Course.geometry.
+        ## Nothing here draws, plays sounds or reads the clock. What happened during a call that the
+        ## player should hear about is left in events as (kind, racer index, value), see Main.play_events.
+        self.racers = racers
+        self.is_title = is_title
+        self.segment_length = segment_length
+        self.events = []
+
+        ## Base speeds for cars
+        self.max_speed = segment_length / step       ## Top speed
+        self.accel = self.max_speed / 5              ## Acceleration rate
+        self.braking = -1 * self.max_speed           ## Deceleration for brakes
+        self.decel = -1 * self.max_speed / 5         ## Natural deceleration
+        self.offroad_decel = -1 * self.max_speed / 2 ## Offroad deceleration
+        self.offroad_limit = self.max_speed / 2      ## Speed limit when offroad
+        self.gravity = -3                            ## Gravitational constant
+        self.max_laps = 4 ## Maximum laps is 3, but we add 1 at the beginning of the race
+
+        self.track = Track(segment_length, rumble_length)
+        self.track.lay_out(geometry)
+        self.track.build()
+        self.track.color[0] = Track.FINISH
+        self.track.color[1] = Track.START
+        self.track_length = len(self.track) * segment_length
+
+        self.items = []
+        self.item_index = ItemIndex(len(self.track))
+        if not is_title:
+            ## Rows of tarot cards a sixteenth, six, nine and twelve sixteenths of the way around
+            for x in [-0.8, 0.8, 0, -0.4, 0.4]:
+                self.add_item(0,self.track_length/16,x,0,0)
+            for x in [-0.8, 0.8, 0, 0.4, -0.4]:
+                self.add_item(0,self.track_length*9/16,x,0,0)
+            for x in [-0.8, 0.8, 0, -0.4, 0.4]:
+                self.add_item(0,self.track_length*6/16,x,0,0)
+            for x in [-0.8, 0.8, 0, -0.4, 0.4]:
+                self.add_item(0,self.track_length*12/16,x,0,0)
+
+        ## Racers are bucketed by the segment they're on
+        for racer in racers:
+            self.find_segment(racer.position).cars.append(racer)
+
+        self.get_new_lap(True) ## Get a new lap at the very start
+
+    def find_segment(self, z):
+        return self.track[int(math.floor(z/self.segment_length) % len(self.track))]
+
+    def add_item(self, num, zpos, xpos, speed, owner, level=0):
+        ## Add an item into the field
+        if num == 0:
+            ## If it's a mystery tarot card, set it with these constants
+            temp = Item(0,0,0,1573,[xpos,zpos,0])
+        else:
+            ## Otherwise it's a fireball or ice chunk
+            temp = Item(num,level,speed,owner,[xpos,zpos,10])
+        self.items.append(temp)
+        self.item_index.add(temp, self.find_segment(zpos).index)
+
+    def get_new_lap(self, first, is_title=False):
+        for racer in self.racers:
+            if racer.position >= self.track_length:
+                racer.position -= self.track_length
+                ## Get a new lap
+                if not is_title:
+                    racer.laps += 1
+                    if racer.laps < self.max_laps:
+                        racer.lap_text_draw = 0
+
+            elif first:
+                racer.laps += 1
+                racer.lap_text_draw = 0
+
+    def update_places(self):
+        relative_pos = []
+        for i in range(len(self.racers)):
+            temp = self.racers[i].position + self.racers[i].laps * self.track_length
+            relative_pos.append([temp,i])
+
+        for i in range(len(self.racers)):
+            if self.racers[i].laps == self.max_laps:
+                relative_pos[i][0] += (6-self.racers[i].place) * self.track_length
+
+        relative_pos.sort(key=lambda x:x[0])
+
+        for i in range(len(self.racers)):
+            self.racers[relative_pos[i][1]].place = len(self.racers)-i
+
+    def get_cpu_inputs(self):
+        ## Steer, accelerate and use items for racers 2 through 6
+        for i in range(1,len(self.racers)):
+            racer = self.racers[i]
+            racer.shake = False      ## Not shaking
+            racer.inputs[0] = False  ## Not steering
+            racer.inputs[1] = False  ## Not steering
+            racer.inputs[2] = False  ## Not accelerating
+
+            ## Do things if not spinning out and not frozen
+            if racer.no_control <= 0 and racer.frozen <= 0:
+                ## Find the current segment we're on for reference
+                segment = self.find_segment(racer.position)
+
+                ## Steer left
+                if (segment.curve < 0 and racer.player_x > racer.lane) or racer.player_x > 1:
+                    if racer.hama_alpha <= 0 and racer.mudo_alpha <= 0:
+                        racer.inputs[0] = True
+                        if racer.lightning <= 0:
+                            racer.boost += 0.04
+                    else:
+                        ## Reverse steering if under hama or mudo
+                        racer.inputs[1] = True
+
+                ## Steer right
+                elif (segment.curve > 0 and racer.player_x < racer.lane) or racer.player_x < -1:
+                    if racer.hama_alpha <= 0 and racer.mudo_alpha <= 0:
+                        racer.inputs[1] = True
+                        if racer.lightning <= 0:
+                            racer.boost += 0.04
+                    else:
+                        ## Reverse steering if under hama or mudo
+                        racer.inputs[0] = True
+                else:
+                    ## If we're not steering, decrease the mini-turbo
+                    if racer.boost > racer.boost_diff:
+                        racer.boost_diff = racer.boost
+                    racer.boost -= 0.1
+                    if racer.boost < 0:
+                        racer.boost += 0.1
+
+                racer.inputs[2] = True ## Accelerate
+
+                ## If we have a skill, 2% chance to use it every frame
+                if racer.item != None and streams.gameplay.randint(1,50) == 1 and racer.item_scrolling <= 0.0:
+                    self.use_item(i, i)
+
+    def use_item(self, i, owner):
+        ## Use racer i's skill and return which one it was. owner is who its projectiles belong to and who
+        ## is spared by it, normally i itself.
+        racer = self.racers[i]
+        item = racer.item
+        talk = streams.gameplay.randint(1,3) ## Small chance to call out, see the "item" event
+        self.events.append(("item", i, (item, talk)))
+
+        ## Skill 1 - Agi - Launches three fireball projectiles that follow the road
+        if item == 1:
+            self.add_item(8, racer.position+self.segment_length*2, racer.player_x,
+                          max(racer.speed, self.max_speed*2), owner, 3)
+        ## Skill 2 - Bufu - Launches one ice chunk that follows the road and freezes on contact
+        elif item == 2:
+            self.add_item(9, racer.position+self.segment_length*2, racer.player_x,
+                          max(racer.speed, self.max_speed*2), owner, 3)
+        ## Skill 3 - Garu - Grants a temporary speed boost
+        elif item == 3:
+            racer.speed_up = 0.3 * 2
+            racer.speed = self.max_speed * 1.5
+        ## Skill 4 - Zio - Zaps all players ahead of you and pushes them offroad
+        elif item == 4:
+            for p in range(len(self.racers)):
+                other = self.racers[p]
+                if p != owner and other.place < racer.place and other.laps != self.max_laps and not other.recover:
+                    self.events.append(("zapped", p, None))
+                    ## Negative/positive signifies left or right pushing
+                    other.lightning += streams.gameplay.choice((-1,1)) * (0.5 + other.place / 16.0)
+
+                    other.flying = True ## Player gets launched a little when hit
+                    other.boost = -1    ## Cannot turbo out of it
+                    other.no_control += abs(other.lightning) ## A little out of control
+                    other.item_hit += 1
+                    other.health -= 25
+        ## Skill 5 - Hama and 6 - Mudo - Reverse the steering of all players ahead of you
+        elif item in [5, 6]:
+            for p in range(len(self.racers)):
+                other = self.racers[p]
+                ## Don't affect people who are under hama/mudo or who are using hama/mudo
+                if p != owner and other.hama_alpha <= 0 and other.mudo_alpha <= 0 and\
+                   other.hama_cast_alpha <= 0 and other.mudo_cast_alpha <= 0 and\
+                   other.no_control <= 0 and other.frozen <= 0 and\
+                   other.place < racer.place:
+                    if item == 5:
+                        other.hama = True
+                    else:
+                        other.mudo = True
+                    other.item_hit += 1
+        ## Skill 7 - Physical - Damages opponents in a small radius
+        elif item == 7:
+            racer.attack = 90 ## Set the attack radius
+
+        ## Remove item from player
+        racer.item = None
+        return item
+
+    def update_items(self, dt):
+        ## Over a copy, since burnt out projectiles are taken out of the list as we go
+        for item in list(self.items):
+            for i in range(len(self.racers)):
+                racer = self.racers[i]
+                if item.owner != i and abs(racer.position - item.xzd[1]) < abs(dt * racer.speed - dt * item.speed) and\
+                   abs(racer.player_x - item.xzd[0]) <= 0.48 and racer.laps != self.max_laps:
+                    if racer.player_y <= 0:
+                        if item.num == 0:
+                            if racer.item == None:
+                                racer.item_scrolling = 2.5
+                        elif not racer.recover:
+                            racer.item_hit += 1
+                            ## Fireball
+                            if item.num == 8:
+                                self.events.append(("burned", i, None))
+                                racer.flying = True
+                                racer.health -= 100
+                                racer.no_control += item.level/4.0 + (racer.position + ((racer.laps - 1) * self.track_length)) / self.track_length * 0.6
+                            else: ## Ice attack
+                                self.events.append(("chilled", i, None))
+                                racer.flying = True
+                                racer.health -= 50
+                                racer.frozen = item.level - 1 + (racer.position + ((racer.laps - 1) * self.track_length)) / self.track_length * 0.8
+
+            item.xzd[1] = increase(item.xzd[1], dt * item.speed, self.track_length)
+            if item.xzd[1] >= self.track_length:
+                item.xzd[1] -= self.track_length
+            new_segment = self.find_segment(item.xzd[1])
+            self.item_index.move(item, new_segment.index)
+            #item.xzd[0] = limit(item.xzd[0], -2, 2)
+            if item.num != 0:
+                item.xzd[2] -= dt
+                if item.xzd[2] <= 0:
+                    remove_identical(self.items, item)
+                    self.item_index.remove(item)
+
+    def update(self, dt):
+        ## Advance the race one fixed step and return whether everyone has finished; dt should be the
+        ## step the race was set up with, since the fades and timers below count in steps
+        is_done = True
+        self.update_items(dt)
+        first_pos = 0
+
+        for p in range(len(self.racers)):
+            racer = self.racers[p]
+            first_pos = 0
+            is_player_done = False
+
+            for q in range(len(self.racers)):
+                if p != q and self.racers[q].place == 1:
+                    first_pos = self.racers[q].position + (self.racers[q].laps-1) * self.track_length
+
+                if self.racers[q].laps != self.max_laps:
+                    is_done = False
+
+            if racer.laps == self.max_laps:
+                is_player_done = True
+                racer.item = None
+                racer.item_scrolling = 0
+
+            if racer.lap_text_draw < 120:
+                racer.lap_text_draw += 1
+
+            if racer.boost_diff > racer.threshold:
+                if streams.gameplay.randint(0,racer.has_boosted+1) <= 50:
+                    racer.has_boosted += 1
+                    self.events.append(("boost", p, None))
+                    racer.speed_up = 0.6
+                    racer.speed = self.max_speed * 1.2
+                    racer.boost = -1 * racer.boost_diff
+                    racer.boost_diff = 0.0
+                else:
+                    racer.no_control += racer.boost_diff/10
+                    racer.boost = -2 * racer.boost_diff
+                    racer.boost_diff = 0.0
+
+            if racer.flying == True:
+                racer.player_y += 6 + self.gravity * racer.accumulator
+                racer.accumulator += 1
+                if racer.player_y <= 0:
+                    racer.player_y = 0
+                    racer.accumulator = 0
+                    racer.flying = False
+
+            if racer.no_control > 0:
+                racer.no_control -= dt * racer.recovery
+
+            if racer.attack > 0:
+                racer.attack -= 8
+                if racer.attack < 0:
+                    racer.attack = 0
+                for q in range(len(self.racers)):
+                    other = self.racers[q]
+                    if q != p and abs(racer.position - other.position) < self.segment_length * 3 and\
+                       abs(racer.player_x - other.player_x) <= 0.75 and not other.recover:
+                        self.events.append(("struck", q, None))
+                        other.no_control += 0.2
+                        other.flying = True
+                        other.item_hit += 1
+                        other.health -= 10
+
+            if racer.health < 0:
+                racer.health = 0
+
+            if racer.display_health <= 0:
+                racer.no_control += 1.5
+                racer.flying = True
+                racer.display_health = int(racer.max_health)
+                racer.recover = True
+
+            if racer.health < racer.display_health:
+                if racer.recover:
+                    racer.health = int(racer.health + 3)
+                    if racer.health >= int(racer.max_health):
+                        racer.health = int(racer.max_health)
+                        racer.recover = False
+                else:
+                    racer.display_health -= 5
+
+            if racer.frozen > 0:
+                racer.frozen -= dt * racer.recovery
+
+            if racer.mudo:
+                racer.mudo_alpha += 5
+                if racer.mudo_alpha >= 512:
+                    racer.mudo = False
+            elif racer.mudo_alpha > 0:
+                racer.mudo_alpha -= 5
+
+            if racer.hama:
+                racer.hama_alpha += 5
+                if racer.hama_alpha >= 512:
+                    racer.hama = False
+            elif racer.hama_alpha > 0:
+                racer.hama_alpha -= 5
+
+            ## Casting hama or mudo dims the caster's own view for a while, and shields them meanwhile
+            if racer.mudo_cast:
+                racer.mudo_cast_alpha += 5
+                if racer.mudo_cast_alpha >= 512:
+                    racer.mudo_cast = False
+            elif racer.mudo_cast_alpha > 0:
+                racer.mudo_cast_alpha -= 5
+
+            if racer.hama_cast:
+                racer.hama_cast_alpha += 5
+                if racer.hama_cast_alpha >= 512:
+                    racer.hama_cast = False
+            elif racer.hama_cast_alpha > 0:
+                racer.hama_cast_alpha -= 5
+
+            if racer.item_scrolling > 0:
+                self.events.append(("scroll", p, None))
+                racer.item_scrolling -= dt
+                racer.item = streams.gameplay.choice(racer.item_choice)
+
+            if racer.lightning > 0:
+                racer.lightning -= dt * racer.recovery
+            elif racer.lightning < 0:
+                racer.lightning += dt * racer.recovery
+
+            temp_factor_2 = 1.0 + racer.speed_up*5
+            if racer.speed_up > 0:
+                racer.speed_up -= dt
+
+            ## Increase forward movement
+            old_segment = self.find_segment(racer.position)
+
+            if old_segment.curve < 0:
+                temp_factor_4 = max((24 - racer.player_x*2) / 24, 1.0)
+            elif old_segment.curve > 0:
+                temp_factor_4 = max((24 + racer.player_x*2) / 24, 1.0)
+            else:
+                temp_factor_4 = 1.0
+
+            speed_scale = (first_pos - (racer.position+(racer.laps-1)*self.track_length)) / (first_pos+1) + 1.0
+            temp_factor_1 = max(1.0, speed_scale)
+
+            racer.position = increase(racer.position, dt * racer.speed * temp_factor_4 * temp_factor_1, self.track_length*2)
+
+            new_segment = self.find_segment(racer.position)
+
+            dx = dt * racer.speed / (self.max_speed * racer.max_speed_mod * temp_factor_4 * temp_factor_1) * (3.0 if ((racer.player_x < -1) or (racer.player_x > 1)) else 1.7)
+
+            ## X-axis movement
+            if racer.inputs[0]:
+                racer.player_x -= dx
+            elif racer.inputs[1]:
+                racer.player_x += dx
+
+            if racer.lightning < -0.1:
+                racer.player_x -= dx * 2.5
+            elif racer.lightning > 0.1:
+                racer.player_x += dx * 2.5
+
+            if racer.speed > 0:
+                racer.player_x = accelerate(racer.player_x, self.accel * racer.accel_mod * new_segment.curve / float(ROAD.CURVE.HARD) * -1 * racer.speed / (self.max_speed * racer.max_speed_mod) * 0.0005, dt)
+
+            ## Speed up or slow down
+            if is_player_done:
+                racer.speed = accelerate(racer.speed, self.braking * racer.braking_mod * 2.5, dt)
+            elif racer.frozen > 0:
+                racer.speed = accelerate(racer.speed, self.braking * racer.braking_mod * 1.0, dt)
+            elif racer.no_control > 0:
+                racer.speed = accelerate(racer.speed, self.decel* racer.decel_mod * 0.4, dt)
+
+            if racer.inputs[2]:
+                if racer.no_control <= 0 and racer.frozen <= 0:
+                    racer.speed = accelerate(racer.speed, self.accel * racer.accel_mod * temp_factor_1, dt)
+            else:
+                racer.speed = accelerate(racer.speed, self.decel * racer.decel_mod, dt)
+
+            if (((racer.player_x < -1) or (racer.player_x > 1)) and \
+                (racer.speed > self.offroad_limit * racer.offroad_limit_mod)):
+                racer.speed = accelerate(racer.speed, self.offroad_decel * racer.offroad_decel_mod, dt)
+
+            racer.player_x = limit(racer.player_x, -2.5, 2.5)
+
+            racer.speed = limit(racer.speed, 0, self.max_speed * racer.max_speed_mod * temp_factor_2) * streams.gameplay.randint(99,101)/100.0
+
+            ## Move the racer to the bucket of the segment it's entered
+            if old_segment.index != new_segment.index:
+                old_segment.cars.remove(racer)
+                new_segment.cars.append(racer)
+
+        self.get_new_lap(False, self.is_title)
+        return is_done
@@ -0,0 +1,78 @@
+import pygame
+from collections import OrderedDict
+
+## Cache of pre-scaled sprite surfaces ##
+#########################################
+class ScaleCache(object):
+    def __init__(self, budget=16*1024*1024, step=2):
+        self.budget = budget  ## Memory budget in bytes for all cached surfaces
+        self.step = step      ## Target sizes are rounded to multiples of this many pixels
+        self.used = 0         ## Bytes currently held
+        self.surfaces = OrderedDict() ## (source, width, height) -> scaled surface, oldest first
+
+    def quantize(self, length):
+        ## Round a target length to the nearest step
+        return max(0, (int(length) + self.step//2) // self.step * self.step)
+
+    def scale(self, surface, size):
+        ## Get a scaled copy of surface, resampling only if this quantized size hasn't been seen lately
+        key = (surface, self.quantize(size[0]), self.quantize(size[1]))
+        scaled = self.surfaces.get(key)
+        if scaled != None:
+            self.surfaces.move_to_end(key)
+            return scaled
+
+        scaled = pygame.transform.scale(surface, key[1:])
+        self.surfaces[key] = scaled
+        self.used += self.size_of(scaled)
+
+        ## Evict the least recently used surfaces until we're back under budget
+        while self.used > self.budget and len(self.surfaces) > 1:
+            old_key, old = self.surfaces.popitem(last=False)
+            self.used -= self.size_of(old)
+        return scaled
+
+    def size_of(self, surface):
+        ## Approximate memory footprint of a surface's pixels
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def clear(self):
+        self.surfaces.clear()
+        self.used = 0
+
+## Shared by every render_sprite call
+scale_cache = ScaleCache()
+
+## Bank of pre-rendered animation frames ##
+###########################################
+class FrameBank(object):
+    def __init__(self, frames, start, step, wrap=False):
+        self.frames = frames ## Frame i shows the animation at value start + i*step
+        self.start = start   ## Animation value of the first frame
+        self.step = step     ## Animation value between neighbouring frames
+        self.wrap = wrap     ## Whether values past the end loop back around, e.g. angles
+
+    def frame(self, value):
+        ## Get the pre-rendered frame nearest to an animation value
+        i = int(round((value - self.start) / float(self.step)))
+        if self.wrap:
+            i %= len(self.frames)
+        else:
+            i = max(0, min(len(self.frames)-1, i))
+        return self.frames[i]
+
+def rotation_frames(image, step):
+    ## Frames of an image rotated through a full turn, step degrees apart
+    frames = []
+    for i in range(int(round(360.0 / step))):
+        frames.append(pygame.transform.rotate(image, i*step))
+    return FrameBank(frames, 0, step, wrap=True)
+
+def flip_frames(image, width, step, height):
+    ## Frames of an image squeezed from full width down to nothing and out again mirrored, as if
+    ## spinning about its vertical axis, every one scaled to height. Negative widths are the mirrored side.
+    mirrored = pygame.transform.flip(image, True, False)
+    frames = []
+    for i in range(-width, width+1, step):
+        frames.append(pygame.transform.scale(mirrored if i <= 0 else image, (abs(i), height)))
+    return FrameBank(frames, -width, step)
@@ -0,0 +1,47 @@
+import os, sys
+import pygame
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rng import streams
+from course import Course
+from sim import Race, Racer
+from render import render_cpu
+
+STEPS = 1200
+STEP = 1/60.
+KEYS = ["position", "player_x", "player_y", "speed", "place", "laps", "item", "health", "no_control",
+        "frozen", "lightning", "boost"]
+
+def play(seed, every):
+    ## A six CPU race on one seed, drawing every racer on every every-th step
+    streams.reseed(seed)
+    racers = [Racer(num, "CPU", 0, player_x=-1.0 + 0.4*num, position=0) for num in range(6)]
+    race = Race(racers, Course(3).geometry)
+
+    screen = pygame.Surface((320, 240))
+    sprite = pygame.Surface((64, 64))
+    for racer in racers:
+        racer.shake = False
+        for name in ["left", "right", "straight", "left_frozen", "right_frozen", "straight_frozen"]:
+            setattr(racer, "player_" + name, sprite)
+
+    trace = []
+    for step in range(STEPS):
+        race.update(STEP)
+        race.get_cpu_inputs()
+        race.update_places()
+        if step % every == 0:
+            for racer in racers:
+                render_cpu(screen, racer, 320, 240, 1, 2000, 0.5, 0.002, 160, 200, 0, None, None, None, None)
+        trace.append([tuple(getattr(racer, key) for key in KEYS) for racer in racers])
+    return trace
+
+def test_seed_replays_race(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    assert play(7, 1) == play(7, 13)
+
+def test_seed_changes_race(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    assert play(7, 1) != play(8, 1)
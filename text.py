@@ -1,31 +1,121 @@
 import pygame
 from pygame.locals import *
 
+## Fonts and glyph atlases shared by every Text ##
+##################################################
+class FontRegistry(object):
+    def __init__(self):
+        self.fonts = {}   ## (num, size) -> opened font
+        self.atlases = {} ## (num, size, color, antialiased) -> glyph atlas
+
+    def font(self, num, size):
+        ## Open each font file at each size only once
+        key = (num, size)
+        font = self.fonts.get(key)
+        if font == None:
+            font = pygame.font.Font("res/font/font%d.ttf" %num, size)
+            self.fonts[key] = font
+        return font
+
+    def atlas(self, num, size, color, antialiased=True):
+        key = (num, size, tuple(color), antialiased)
+        atlas = self.atlases.get(key)
+        if atlas == None:
+            atlas = GlyphAtlas(self.font(num, size), color, antialiased)
+            self.atlases[key] = atlas
+        return atlas
+
+## Shared by every Text
+font_registry = FontRegistry()
+
+## Glyphs of one font in one color, rendered once and pieced together into strings ##
+#####################################################################################
+class GlyphAtlas(object):
+    def __init__(self, font, color, antialiased=True):
+        self.font = font
+        self.color = color
+        self.antialiased = antialiased
+        self.glyphs = {}   ## Character -> (rendered glyph, advance)
+        self.outlines = {} ## (character, radius) -> glyph smeared out radius pixels every way
+
+    def glyph(self, char):
+        glyph = self.glyphs.get(char)
+        if glyph == None:
+            glyph = (self.font.render(char, self.antialiased, self.color), self.font.size(char)[0])
+            self.glyphs[char] = glyph
+        return glyph
+
+    def outline(self, char, radius):
+        key = (char, radius)
+        outline = self.outlines.get(key)
+        if outline == None:
+            glyph = self.glyph(char)[0]
+            outline = pygame.Surface((glyph.get_width() + 2*radius, glyph.get_height() + 2*radius), SRCALPHA)
+            for i in range(-radius,radius+1):
+                for j in range(-radius,radius+1):
+                    outline.blit(glyph, (radius+i, radius+j))
+            self.outlines[key] = outline
+        return outline
+
+    def render(self, string, radius=0):
+        ## Piece a string together from cached glyphs. With a radius, build its outline instead, padded by
+        ## the radius on every side like Text's composite.
+        width = 0
+        for char in string:
+            width += self.glyph(char)[1]
+        surface = pygame.Surface((max(1, width) + 2*radius, self.font.get_height() + 2*radius), SRCALPHA)
+        x = 0
+        for char in string:
+            glyph, advance = self.glyph(char)
+            surface.blit(self.outline(char, radius) if radius else glyph, (x, 0))
+            x += advance
+        return surface
+
 ## Text wrapper to handle TTF fonts ##
 ######################################
 class Text(object):
-    def __init__(self, string, pos, color=[255,255,255], size=32, num=1, border=False, outline=[0,0,0]):
-        self.font = pygame.font.Font("res/font/font%d.ttf" %num, size)
+    def __init__(self, string, pos, color=[255,255,255], size=32, num=1, border=False, outline=[0,0,0], radius=2,
+                 glyphs=False):
+        self.font = font_registry.font(num, size)
+        self.num = num
+        self.size = size
         self.x = pos[0]        ## X topleft
         self.y = pos[1]        ## Y topleft
         self.color = color     ## Color tuple
         self.outline = outline ## Default outline
         self.text = string     ## Text string to draw
         self.height = self.font.get_height() ## Height of font
-        #self.border = border
-        self.black_text = self.font.render(self.text, True, self.outline)
-        self.white_text = self.font.render(self.text, True, self.color)
-        self.width = self.white_text.get_width()
         self.is_border = border
+        self.radius = radius   ## Outline thickness in pixels around the text
+        self.antialiased = True
+        self.glyphs = glyphs   ## Piece the string together from the glyph atlas, for often-changing numbers
+        self.render()
+
+    def render(self):
+        ## Render the text, and if it's bordered, build the outlined composite so drawing is one blit
+        r = self.radius
+        if self.glyphs:
+            self.white_text = font_registry.atlas(self.num, self.size, self.color, self.antialiased).render(self.text)
+            if self.is_border:
+                self.composite = font_registry.atlas(self.num, self.size, self.outline, self.antialiased).render(self.text, r)
+                self.composite.blit(self.white_text, (r, r))
+        else:
+            self.white_text = self.font.render(self.text, self.antialiased, self.color)
+            if self.is_border:
+                black_text = self.font.render(self.text, self.antialiased, self.outline)
+                self.composite = pygame.Surface((self.white_text.get_width() + 2*r, self.white_text.get_height() + 2*r), SRCALPHA)
+                for i in range(-r,r+1):
+                    for j in range(-r,r+1):
+                        self.composite.blit(black_text, (r+i, r+j))
+                self.composite.blit(self.white_text, (r, r))
+        self.width = self.white_text.get_width()
 
     def draw(self, surface):
-        # Draw the black outline first, "border" pixels wide
+        ## Bordered text is already composed with its outline, offset by the outline radius
         if self.is_border:
-            for i in range(-2,3):
-                for j in range(-2,3):
-                    surface.blit(self.black_text, (self.x+i, self.y+j))
-        ## Draw the white text next at the same position
-        surface.blit(self.white_text, (self.x, self.y))
+            surface.blit(self.composite, (self.x-self.radius, self.y-self.radius))
+        else:
+            surface.blit(self.white_text, (self.x, self.y))
 
     def draw_sub(self, surface, width):
         ## Draw the white text next at the same position
@@ -34,7 +124,8 @@ class Text(object):
         else:
             surface.blit(self.white_text.subsurface((0,0,self.width,self.height)), (self.x, self.y))
 
-    def update(self, string=None, pos=None, center=None, color=None, right=None, size=None, antialiased=True):
+    def update(self, string=None, pos=None, center=None, color=None, right=None, size=None, antialiased=True,
+               outline=None, radius=None):
         ## Update various parameters as needed
         changed = False
         if color != None and self.color != color: ## Update the color
@@ -43,16 +134,87 @@ class Text(object):
         if string != None and string != self.text:
             self.text = string
             changed = True
+        if outline != None and self.outline != outline: ## Update the outline color
+            self.outline = outline
+            changed = True
+        if radius != None and self.radius != radius: ## Update the outline thickness
+            self.radius = radius
+            changed = True
         if changed:
-            if self.is_border:
-                self.black_text = self.font.render(self.text, antialiased, self.outline)
-            self.white_text = self.font.render(self.text, antialiased, self.color)
-            self.width = self.white_text.get_width()
+            self.antialiased = antialiased
+            self.render()
+        if pos != None:        ## Update the topleft
+            self.x = pos[0]
+            self.y = pos[1]
+        if center != None:     ## Update the center
+            self.x = center[0] - self.width/2
+            self.y = center[1]
+        if right != None:      ## Update the rightmost point
+            self.x = right - self.width
+
+## Fixed-layout readout pieced together from a pre-rendered strip, for HUD numbers ##
+#####################################################################################
+class DigitText(object):
+    def __init__(self, pos, color=[255,255,255], size=24, num=1, border=False, outline=[0,0,0], radius=2,
+                 chars="0123456789/m", antialiased=True):
+        font = font_registry.font(num, size)
+        self.x = pos[0]   ## X topleft
+        self.y = pos[1]   ## Y topleft
+        self.text = None  ## Text string currently composed
+        self.radius = radius if border else 0 ## Outline thickness, none if there's no border
+        self.height = font.get_height()
+
+        ## Every digit takes the width of the widest one, so readouts don't jitter as they count down
+        digit_width = max([font.size(c)[0] for c in chars if c.isdigit()] or [0])
+        self.advances = {}
+        for c in chars:
+            self.advances[c] = digit_width if c.isdigit() else font.size(c)[0]
+
+        ## Render every character once, side by side in one strip, with its outline in a second strip
+        r = self.radius
+        cell = max(self.advances.values()) + 2*r
+        atlas = font_registry.atlas(num, size, color, antialiased)
+        self.fills = pygame.Surface((cell * len(chars), self.height + 2*r), SRCALPHA)
+        self.outlines = pygame.Surface((cell * len(chars), self.height + 2*r), SRCALPHA) if border else None
+        self.cells = {} ## Character -> area of its cell in the strips
+        for i, c in enumerate(chars):
+            glyph, advance = atlas.glyph(c)
+            offset = (self.advances[c] - advance) // 2 ## Center narrow digits in the cell
+            self.fills.blit(glyph, (i*cell + offset + r, r))
+            if border:
+                self.outlines.blit(font_registry.atlas(num, size, outline, antialiased).outline(c, r), (i*cell + offset, 0))
+            self.cells[c] = pygame.Rect(i*cell, 0, cell, self.height + 2*r)
+
+        self.composite = None
+        self.width = 0
+
+    def render(self):
+        ## Compose the current string out of the strips; all the outlines go down first so no character's
+        ## outline covers part of its neighbour
+        r = self.radius
+        self.width = sum([self.advances[c] for c in self.text])
+        self.composite = pygame.Surface((max(1, self.width) + 2*r, self.height + 2*r), SRCALPHA)
+        for strip in (self.outlines, self.fills):
+            if strip == None:
+                continue
+            x = 0
+            for c in self.text:
+                self.composite.blit(strip, (x, 0), self.cells[c])
+                x += self.advances[c]
+
+    def draw(self, surface):
+        surface.blit(self.composite, (self.x-self.radius, self.y-self.radius))
+
+    def update(self, string=None, pos=None, center=None, right=None):
+        ## Recompose only when the string actually changes
+        if string != None and string != self.text:
+            self.text = string
+            self.render()
         if pos != None:        ## Update the topleft
             self.x = pos[0]
             self.y = pos[1]
         if center != None:     ## Update the center
-            self.x = center[0] - self.font.size(self.text)[0]/2
+            self.x = center[0] - self.width/2
             self.y = center[1]
         if right != None:      ## Update the rightmost point
-            self.x = right - self.font.size(self.text)[0]
+            self.x = right - self.width
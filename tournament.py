@@ -0,0 +1,92 @@
+import os, sys, csv, time, argparse
+from multiprocessing import Pool
+from archive import resources
+from const import ENGINE_CLASSES, STAGE_NAMES
+from course import Course
+from sim import Racer
+from batch import BatchRace
+from rng import streams
+
+## Columns of the results file, one row per configuration
+FIELDS = ["character", "character_name", "persona", "persona_name", "engine", "stage", "stage_name",
+          "races", "win_rate", "average_place", "finish_time", "finished"]
+## Columns that identify a configuration, for picking up an interrupted sweep
+KEY = ["character", "persona", "engine", "stage"]
+## Characters the CPU picks opponents from, as in Main.main
+OPPONENTS = list(range(16))
+
+def numbered(folder, prefix=""):
+    ## Numbers of the data files in a res/ folder, e.g. 1 for res/persona/p001.dat
+    return sorted(int(os.path.splitext(name)[0][len(prefix):]) for name in resources.listdir(folder)
+                  if name.startswith(prefix) and name.endswith(".dat"))
+
+def configurations():
+    ## Every character and persona, in every engine class on every stage; numbers count from 0 like
+    ## roster and Course, so the character and persona files are one off
+    for num in [n-1 for n in numbered("res/char")]:
+        for p_index in [n-1 for n in numbered("res/persona", "p")]:
+            for engine in sorted(ENGINE_CLASSES):
+                for stage in numbered("res/stage"):
+                    yield num, p_index, engine, stage
+
+def play(job):
+    ## Race one configuration in a worker, returns its results row. The stage's road and the order the
+    ## CPU opponents are picked in only depend on the seed and the stage. The field is the first five in
+    ## that order other than the character being tested, so a character that is one of those five meets
+    ## the sixth in its place; every other configuration on a stage meets the same field on the same road.
+    (num, p_index, engine, stage), races, seed = job
+    streams.reseed("%d/%d" %(seed, stage))
+    course = Course(stage)
+    field = [p for p in streams.gameplay.sample(OPPONENTS, len(OPPONENTS)) if p != num][:5]
+    racers = [Racer(num, "P1", p_index, player_x=0.0, position=0, engine=engine)]
+    racers += [Racer(p, "CPU", 0, player_x=0.0, position=0, engine=engine) for p in field]
+
+    batch = BatchRace(racers, course.geometry, races, seed=[seed, num, p_index, engine, stage])
+    batch.run()
+    place = batch.place[:,0]
+    finish = batch.finish[:,0]
+    finished = finish >= 0
+    finish_time = finish[finished].mean() * batch.step if finished.any() else float("nan")
+    return [num, racers[0].name, p_index, racers[0].persona_name, ENGINE_CLASSES[engine], stage,
+            STAGE_NAMES[stage], races, "%.4f" %(place == 1).mean(), "%.3f" %place.mean(),
+            "%.2f" %finish_time, "%.4f" %finished.mean()]
+
+def finished_keys(path):
+    ## Configurations already in a results file
+    if not os.path.isfile(path):
+        return set()
+    with open(path, newline="") as f:
+        return set(tuple(row[key] for key in KEY) for row in csv.DictReader(f))
+
+def main():
+    parser = argparse.ArgumentParser(description="Race every character, persona, engine class and stage "
+                                                 "against CPU fields and write the results to a CSV file.")
+    parser.add_argument("output", nargs="?", default="tournament.csv",
+                        help="results file; configurations already in it are skipped")
+    parser.add_argument("--races", type=int, default=32, help="races per configuration")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes, all cores by default")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the roads, fields and races")
+    args = parser.parse_args()
+
+    done = finished_keys(args.output)
+    jobs = [(config, args.races, args.seed) for config in configurations()
+            if (str(config[0]), str(config[1]), ENGINE_CLASSES[config[2]], str(config[3])) not in done]
+    print("%d configurations to race, %d already done" %(len(jobs), len(done)))
+
+    start = time.perf_counter()
+    with open(args.output, "a", newline="") as f:
+        writer = csv.writer(f)
+        if f.tell() == 0:
+            writer.writerow(FIELDS)
+        ## Rows are written as they come in, so an interrupted sweep keeps everything finished so far
+        with Pool(args.processes) as pool:
+            for count, row in enumerate(pool.imap_unordered(play, jobs), 1):
+                writer.writerow(row)
+                f.flush()
+                elapsed = time.perf_counter() - start
+                sys.stdout.write("\r%d/%d configurations, %.0fs left " %(count, len(jobs), elapsed / count * (len(jobs) - count)))
+                sys.stdout.flush()
+    print()
+
+if __name__ == "__main__":
+    main()
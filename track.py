@@ -0,0 +1,175 @@
+import numpy, math
+from collections import namedtuple
+from const import ROAD
+from rng import streams
+
+## Handle returned by the indexed accessor; cars is the live list of racers on that segment
+Segment = namedtuple("Segment", "index curve cars")
+
+## Easing between two values, for laying out curves and hills
+def ease_in(a, b, percent):
+    return a + (b-a)*math.pow(percent, 2)
+
+def ease_out(a, b, percent):
+    return a + (b-a)*(1-math.pow(1-percent, 2))
+
+def ease_in_out(a, b, percent):
+    return a + (b-a) * ((-1*math.cos(percent*3.14159)/2)+0.5)
+
+## Struct-of-arrays store for the road segments ##
+##################################################
+class Track(object):
+    ## Color indices into Course.palette
+    LIGHT = 0
+    DARK = 1
+    START = 2
+    FINISH = 3
+
+    def __init__(self, segment_length, rumble_length=1):
+        self.segment_length = segment_length
+        self.rumble_length = rumble_length ## Segments per strip
+        self.count = 0
+
+        ## Plain lists while the road is being laid out, frozen into arrays by build()
+        self._y = [0]
+        self._curve = []
+        self._color = []
+
+    def add(self, curve, y, color):
+        ## Append a segment running from the current end of the road up to height y
+        self._y.append(y)
+        self._curve.append(curve)
+        self._color.append(color)
+        self.count += 1
+
+    def last_y(self):
+        ## Height at the far end of the road laid out so far
+        return self._y[-1] if self._y is not None else float(self.y[-1])
+
+    def add_segment(self, curve, y):
+        ## The road is defined in discrete strips called segments, alternating light and dark
+        n = self.count
+        self.add(curve, y, Track.DARK if math.floor(n/self.rumble_length)%2 else Track.LIGHT)
+
+    def add_road(self, enter, hold, leave, curve, y):
+        start_y = self.last_y()
+        end_y = start_y + int(y) * self.segment_length
+        total = enter + hold + leave
+
+        for n in range(enter):
+            self.add_segment(ease_in(0, curve, n/float(enter)), ease_in_out(start_y, end_y, n/float(total)))
+        for n in range(hold):
+            self.add_segment(curve, ease_in_out(start_y, end_y, (enter+n)/float(total)))
+        for n in range(leave):
+            self.add_segment(ease_in_out(curve, 0, n/float(leave)), ease_in_out(start_y, end_y, (enter+hold+n)/float(total)))
+
+    def add_straight(self, num=None):
+        num = num or ROAD.LENGTH.MEDIUM
+        self.add_road(num, num, num, 0, 0)
+
+    def add_hill(self, num=None, height=None):
+        num = num or ROAD.LENGTH.MEDIUM
+        height = height or ROAD.HILL.MEDIUM
+        self.add_road(num, num, num, 0, height)
+
+    def add_curve(self, num=None, curve=None, height=None):
+        num = num or ROAD.LENGTH.MEDIUM
+        curve = curve or ROAD.CURVE.MEDIUM
+        height = height or ROAD.HILL.NONE
+        self.add_road(num, num, num, curve, height)
+
+    def add_low_rolling_hills(self, num=None, height=None):
+        num = num or ROAD.LENGTH.SHORT
+        height = height or ROAD.HILL.LOW
+        self.add_road(num, num, num, 0, height/2)
+        self.add_road(num, num, num, 0, -1*height)
+        self.add_road(num, num, num, ROAD.CURVE.EASY, height)
+        self.add_road(num, num, num, 0, 0)
+        self.add_road(num, num, num, -1*ROAD.CURVE.EASY, height/2)
+        self.add_road(num, num, num, 0, 0)
+
+    def add_s_curves(self, num):
+        curve = streams.track.choice((ROAD.CURVE.MEDIUM, ROAD.CURVE.HARD))
+        self.add_road(num, num, num, -curve, ROAD.HILL.NONE)
+        self.add_road(num, num, num, curve, ROAD.HILL.NONE)
+
+    def add_bumps(self):
+        self.add_road(10,10,10,0,5)
+        self.add_road(10,10,10,0,-2)
+        self.add_road(10,10,10,0,-5)
+        self.add_road(10,10,10,0,8)
+        self.add_road(10,10,10,0,5)
+
+    def add_downhill_to_end(self, num=None):
+        num = num or 200
+        self.add_road(num,num,num,0, -1 * self.last_y() / self.segment_length)
+
+    def lay_out(self, geometry):
+        ## Lay the road out from a course's geometry: 0 straight, 1 s-curves, 2 left and 3 right curves
+        for num in geometry:
+            curve = streams.track.choice((ROAD.CURVE.MEDIUM, ROAD.CURVE.HARD))
+            if num == 0:
+                self.add_straight(30)
+            elif num == 1:
+                self.add_s_curves(30)
+            elif num == 2:
+                self.add_curve(30,-curve)
+            elif num == 3:
+                self.add_curve(30,curve)
+
+    def build(self):
+        ## World coordinates of the segment boundaries; segment n runs from boundary n to n+1
+        count = self.count
+        self.x = numpy.ones(count+1, dtype=numpy.float64)
+        self.y = numpy.array(self._y, dtype=numpy.float64)
+        self.z = numpy.arange(count+1, dtype=numpy.float64) * self.segment_length
+        self.curve = numpy.array(self._curve, dtype=numpy.float64)
+        self.color = numpy.array(self._color, dtype=numpy.int8)
+
+        ## Racers currently on each segment
+        self.cars = [[] for n in range(count)]
+
+        ## Per-frame projected values, see projection.py for the column layout. Sprites may sit on
+        ## segments just outside the draw window, so these persist between frames.
+        self.screen = numpy.ones((count, 8), dtype=numpy.float64)
+
+        self._y = None
+        self._curve = None
+        self._color = None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return Segment(index, float(self.curve[index]), self.cars[index])
+
+def remove_identical(items, item):
+    ## list.remove compares by value, and two items can be equal; take out this very one
+    del items[next(n for n, other in enumerate(items) if other is item)]
+
+## Buckets of the items sitting on each road segment ##
+########################################################
+class ItemIndex(object):
+    def __init__(self, count):
+        self.buckets = [[] for n in range(count)] ## Items on each segment, by segment index
+        self.projectiles = []                     ## Fireballs and ice chunks, for the HUD arrows
+        self.where = {}                           ## id(item) -> segment index the item is bucketed in
+
+    def add(self, item, index):
+        self.buckets[index].append(item)
+        self.where[id(item)] = index
+        if item.num != 0:
+            self.projectiles.append(item)
+
+    def move(self, item, index):
+        ## Re-bucket an item if it's crossed into another segment
+        old_index = self.where[id(item)]
+        if old_index != index:
+            remove_identical(self.buckets[old_index], item)
+            self.buckets[index].append(item)
+            self.where[id(item)] = index
+
+    def remove(self, item):
+        remove_identical(self.buckets[self.where.pop(id(item))], item)
+        if item.num != 0:
+            remove_identical(self.projectiles, item)